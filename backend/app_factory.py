@@ -0,0 +1,227 @@
+from fastapi import FastAPI, status
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from contextlib import asynccontextmanager
+from typing import List, Optional
+import asyncio
+from settings import Settings
+from database.client import create_motor_client, prewarm_pool
+from database.connection import init_database, close_database, ensure_product_indexes
+from database.mongodb import connect_to_mongo, close_mongo_connection, ensure_user_indexes
+from models.product import Product
+from services.cache import cache_stats
+from services.compression import CompressionMiddleware
+from services.change_feed import change_feed, stream_enabled
+from services.json_response import FastJSONResponse
+from services.http_cache import watch_foreign_writes
+from services.jobs import job_runner
+from services.leader import LEASE_COLLECTION, leader_lease
+from services.inventory_summary import incremental_enabled, reconcile_periodically, rebuild_summary
+from services.low_stock_watcher import low_stock_watcher, watch_enabled
+from services.replenishment import backfill_reorder_gap
+from services.memory_persistence import StorePersistence
+from services.metrics import MetricsMiddleware, endpoint_routes, registry
+from services.readiness import Readiness
+from routes.alerts import router as alerts_router
+from routes.analytics import router as analytics_router
+from routes.changes import router as changes_router
+from routes.jobs import router as jobs_router
+from routes.products import prime_product_cache, router as products_router
+from routes.replenishment import router as replenishment_router
+from routes.memory_products import router as memory_products_router, store as memory_store
+from routes.user_routes import router as user_router
+from services.user_service import user_service
+
+# /readyz 檢查資料庫連線的逾時秒數（應小於探針本身的逾時）
+READYZ_PING_TIMEOUT = 2.0
+
+async def _backfill_reorder_gap():
+    """舊資料沒有 reorder_gap 時在背景補上，不延遲啟動"""
+    updated = await backfill_reorder_gap(Product.get_motor_collection())
+    if updated:
+        print(f"✅ 已為 {updated} 個產品補上 reorder_gap")
+
+async def _ensure_indexes(client, settings: Settings):
+    """同時建立用戶與產品資料庫的索引（索引已存在時立即完成）"""
+    await asyncio.gather(
+        ensure_user_indexes(client[settings.users_database_name]),
+        ensure_product_indexes(client[settings.database_name]),
+    )
+    print("✅ 資料庫索引創建完成!")
+
+async def _start_mongo(app: FastAPI, settings: Settings, readiness: Readiness) -> List[asyncio.Task]:
+    """建立共用客戶端並初始化產品與用戶資料庫，其餘啟動步驟在背景同時進行
+
+    只有連線與 Beanie 初始化會延遲啟動；暖機步驟（連線池、快取、摘要）完成前 /readyz 回傳 503。
+    """
+    client = create_motor_client(settings)
+    app.state.mongo_client = client
+    await asyncio.gather(
+        connect_to_mongo(client, settings.users_database_name),
+        init_database(client, settings.database_name),
+    )
+    products = Product.get_motor_collection()
+
+    tasks = [
+        # 索引建置與舊資料補齊不影響就緒：大集合上建立新索引可能需要數分鐘
+        readiness.track("indexes", _ensure_indexes(client, settings), required=False),
+        readiness.track("reorderGap", _backfill_reorder_gap(), required=False),
+        # 預先建立 minPoolSize 條連線，第一批請求不必等待連線握手
+        readiness.track("pool", prewarm_pool(client, settings.min_pool_size)),
+    ]
+    if settings.cache_prime_count > 0:
+        tasks.append(readiness.track("cache", prime_product_cache(settings.cache_prime_count)))
+    # 多個 worker 時只由持有租約的 leader 寫回低庫存續傳點與定期對帳
+    if incremental_enabled() or watch_enabled():
+        tasks.append(asyncio.create_task(leader_lease.run(products.database[LEASE_COLLECTION])))
+    # 遞增統計模式：啟動時重建摘要，並在背景定期對帳
+    if incremental_enabled():
+        tasks.append(readiness.track("summary", rebuild_summary(products)))
+        tasks.append(asyncio.create_task(reconcile_periodically(products, lease=leader_lease)))
+    # 低庫存監看與變更訂閱：以 change stream 取代輪詢（需副本集，單機時自動停用）
+    if watch_enabled():
+        tasks.append(asyncio.create_task(low_stock_watcher.run(products, lease=leader_lease)))
+    if stream_enabled():
+        tasks.append(asyncio.create_task(change_feed.follow(products)))
+    # 其他 worker 的寫入：產品在 change stream 運作時逐筆同步，否則與用戶快取一樣由版本輪詢清空
+    tasks.append(asyncio.create_task(watch_foreign_writes(products, change_feed.on_foreign_writes)))
+    if user_service.cache.process_local:
+        users = client[settings.users_database_name][user_service.collection_name]
+        tasks.append(asyncio.create_task(watch_foreign_writes(users, user_service.cache.clear)))
+    # 暖機步驟都登記後才記錄連線完成，避免在步驟登記前就被判定為就緒
+    readiness.mark_done("mongo")
+    return tasks
+
+def _start_memory(settings: Settings) -> Optional[StorePersistence]:
+    """設定資料目錄時從快照與日誌還原後開始記錄變更"""
+    if not settings.memory_data_dir:
+        return None
+    persistence = StorePersistence(memory_store, settings.memory_data_dir)
+    result = persistence.load()
+    print(f"✅ 已從 {settings.memory_data_dir} 還原 {len(memory_store)} 個產品（快照 {result['snapshotRecords']} 筆，重播日誌 {result['replayedEntries']} 筆）")
+    persistence.start()
+    return persistence
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """建立應用程式：產品與用戶 API 共用同一個 Motor 客戶端
+
+    啟動：uvicorn app_factory:create_app --factory（MongoDB 後端可使用 --workers 或 gunicorn -w）
+    行程內的快取、變更緩衝區與分析資料由 change stream（或集合版本輪詢）同步其他 worker 的寫入，
+    只能由單一行程執行的背景工作以 watcher_state 中的租約選出 leader。
+    記憶體後端的資料只存在單一行程內，設定資料目錄時第二個行程會因目錄已鎖定而無法啟動。
+    """
+    settings = settings or Settings.from_env()
+    if settings.storage_backend not in ("mongo", "memory"):
+        raise ValueError(f"不支援的儲存後端: {settings.storage_backend}")
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        readiness = app.state.readiness = Readiness()
+        tasks = []
+        persistence = None
+        if settings.uses_mongo:
+            job_runner.configure(settings.job_workers)
+            tasks = await _start_mongo(app, settings, readiness)
+        else:
+            persistence = _start_memory(settings)
+            readiness.mark_done("restore")
+
+        yield
+
+        # 先標記為不就緒，讓負載平衡器停止導入新流量
+        readiness.draining = True
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await job_runner.shutdown()
+        if persistence:
+            persistence.close()
+        if settings.uses_mongo:
+            await close_mongo_connection()
+            await close_database()
+            app.state.mongo_client.close()
+
+    app = FastAPI(
+        title="存貨管理系統 API",
+        description="前後端分離的存貨管理系統後端 API",
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse
+    )
+    app.state.settings = settings
+    app.state.readiness = Readiness()
+
+    # CORS 設定
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "ETag"],
+    )
+    if settings.compression_enabled:
+        app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_size)
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware, route_of=endpoint_routes(app))
+
+    # 註冊路由
+    if settings.uses_mongo:
+        # 分析、警示與變更路由需在產品路由之前註冊（避免被 /products/{product_id} 攔截）
+        app.include_router(analytics_router, prefix="/api")
+        app.include_router(alerts_router, prefix="/api")
+        app.include_router(changes_router, prefix="/api")
+        app.include_router(jobs_router, prefix="/api")
+        app.include_router(products_router, prefix="/api")
+        app.include_router(replenishment_router, prefix="/api")
+        app.include_router(user_router, prefix="/api", tags=["users"])
+    else:
+        app.include_router(memory_products_router, prefix="/api")
+
+    @app.get("/")
+    async def root():
+        return {
+            "message": "存貨管理系統 API",
+            "version": "1.0.0",
+            "storage": settings.storage_backend,
+            "docs": "/docs",
+            "redoc": "/redoc"
+        }
+
+    @app.get("/cache/stats")
+    async def get_cache_stats():
+        """快取命中/未命中/淘汰統計"""
+        return cache_stats()
+
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics():
+        """Prometheus 文字格式的效能指標"""
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/livez")
+    async def liveness_check():
+        """存活檢查：只確認行程仍在回應，不檢查資料庫（資料庫中斷時重啟 worker 也無濟於事）"""
+        return {"status": "alive"}
+
+    @app.get("/readyz")
+    async def readiness_check():
+        """就緒檢查：必要的啟動步驟完成且資料庫可連線時才回傳 200"""
+        readiness = app.state.readiness
+        content = {**readiness.to_dict(), "storage": settings.storage_backend}
+        if not readiness.ready:
+            return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=content)
+        if not settings.uses_mongo:
+            return {**content, "products": len(memory_store)}
+        try:
+            await asyncio.wait_for(app.state.mongo_client.admin.command("ping"), READYZ_PING_TIMEOUT)
+            return {**content, "database": "connected"}
+        except Exception as e:
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={**content, "status": "unavailable", "database": "disconnected", "error": str(e) or type(e).__name__}
+            )
+
+    # 舊的健康檢查路徑，與 /readyz 相同
+    app.add_api_route("/health", readiness_check, methods=["GET"], include_in_schema=False)
+
+    return app
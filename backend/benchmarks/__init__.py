@@ -0,0 +1 @@
+# 初始化 benchmarks 包
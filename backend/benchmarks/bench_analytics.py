@@ -0,0 +1,126 @@
+"""
+分析報表效能比較：逐筆 Product 的 Python 迴圈 vs. NumPy 欄位引擎
+
+需要本機 mongod 與 numpy，使用獨立的 inventory_bench 資料庫，結束時會刪除。
+欄位引擎分別列出首次載入時間與載入後每份報表的查詢時間。
+
+    cd backend
+    python -m benchmarks.bench_analytics --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+from models.product import Product
+from services.analytics import AnalyticsEngine
+from benchmarks.bench_inventory_stats import fill_collection
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+def _percentile(sorted_values, q):
+    """與 numpy 預設（線性內插）相同的百分位數"""
+    position = (len(sorted_values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+def legacy_reports(products):
+    """舊版寫法：對每個 Product 做 Python 迴圈"""
+    matrix = defaultdict(float)
+    risk = defaultdict(int)
+    prices = defaultdict(list)
+    reorder = []
+    for p in products:
+        matrix[(p.category, p.supplier)] += p.price * p.stock
+        if p.stock <= 0:
+            risk["outOfStock"] += 1
+        elif 2 * p.stock <= p.min_stock:
+            risk["critical"] += 1
+        elif p.stock <= p.min_stock:
+            risk["low"] += 1
+        elif p.stock > 2 * p.min_stock:
+            risk["overstocked"] += 1
+        else:
+            risk["healthy"] += 1
+        prices[p.category].append(p.price)
+        if p.min_stock - p.stock > 0:
+            reorder.append((p.min_stock - p.stock, str(p.id)))
+    percentiles = {
+        category: [_percentile(sorted(values), q) for q in PERCENTILES]
+        for category, values in prices.items()
+    }
+    reorder.sort(reverse=True)
+    return {
+        "totalValue": sum(matrix.values()),
+        "risk": dict(risk),
+        "percentiles": percentiles,
+        "reorderCount": len(reorder),
+    }
+
+def columnar_reports(columns):
+    matrix = columns.value_matrix()
+    risk = columns.stockout_risk()
+    percentiles = columns.price_percentiles(PERCENTILES)
+    reorder = columns.reorder_quantities(limit=100)
+    return {
+        "totalValue": matrix["totalValue"],
+        "risk": {k: v for k, v in risk["total"].items() if v},
+        "percentiles": {row["name"]: row["values"] for row in percentiles["byCategory"]},
+        "reorderCount": reorder["count"],
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description="分析報表效能比較")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mongodb-url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client["inventory_bench"]
+    await init_beanie(database=db, document_models=[Product])
+    collection = Product.get_motor_collection()
+
+    print(f"{'筆數':>10} {'Python 迴圈 (s)':>16} {'欄位載入 (s)':>14} {'欄位報表 (s)':>14} {'加速':>8}")
+    try:
+        for size in args.sizes:
+            await fill_collection(collection, size)
+
+            legacy_best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                products = await Product.find_all().to_list()
+                legacy = legacy_reports(products)
+                legacy_best = min(legacy_best, time.perf_counter() - start)
+                del products
+
+            start = time.perf_counter()
+            columns = await AnalyticsEngine().load(collection)
+            load_time = time.perf_counter() - start
+
+            report_best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = columnar_reports(columns)
+                report_best = min(report_best, time.perf_counter() - start)
+
+            assert result["risk"] == legacy["risk"]
+            assert result["reorderCount"] == legacy["reorderCount"]
+            assert abs(result["totalValue"] - legacy["totalValue"]) < 1e-6 * max(1.0, legacy["totalValue"])
+            for name, values in legacy["percentiles"].items():
+                assert all(abs(a - b) < 1e-6 for a, b in zip(values, result["percentiles"][name]))
+
+            print(f"{size:>10} {legacy_best:>16.3f} {load_time:>14.3f} {report_best:>14.4f} {legacy_best / report_best:>7.1f}x")
+    finally:
+        await client.drop_database("inventory_bench")
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
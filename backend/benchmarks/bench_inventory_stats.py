@@ -0,0 +1,101 @@
+"""
+庫存統計效能比較：Python 全量掃描 vs. MongoDB 聚合管線
+
+需要本機 mongod，使用獨立的 inventory_bench 資料庫，結束時會刪除。
+
+    cd backend
+    python -m benchmarks.bench_inventory_stats --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+from models.product import Product
+from services.inventory_stats import compute_inventory_stats
+
+CATEGORIES = ["手機", "筆記型電腦", "平板電腦", "耳機", "充電器", "保護套", "螢幕", "鍵盤", "滑鼠", "攝影機"]
+SUPPLIERS = ["Apple Taiwan", "Samsung", "華碩", "宏碁", "微星", "技嘉", "聯想", "戴爾", "HP", "小米"]
+
+async def fill_collection(collection, size: int, batch: int = 10000):
+    """以原始文件批量寫入測試資料"""
+    await collection.delete_many({})
+    rng = random.Random(42)
+    now = datetime.now()
+    for start in range(0, size, batch):
+        docs = [
+            {
+                "name": f"商品 {i}",
+                "description": None,
+                "category": rng.choice(CATEGORIES),
+                "price": float(rng.randint(100, 80000)),
+                "stock": rng.randint(0, 100),
+                "min_stock": rng.randint(5, 20),
+                "supplier": rng.choice(SUPPLIERS),
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(start, min(start + batch, size))
+        ]
+        await collection.insert_many(docs, ordered=False)
+
+async def legacy_stats():
+    """舊版實作：載入所有 Product 後以 Python 迴圈計算"""
+    products = await Product.find_all().to_list()
+    return {
+        "totalProducts": len(products),
+        "totalValue": sum(p.price * p.stock for p in products),
+        "lowStockCount": sum(1 for p in products if p.stock <= p.min_stock),
+        "categories": list(set(p.category for p in products)),
+    }
+
+async def timed(func, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+async def main():
+    parser = argparse.ArgumentParser(description="庫存統計效能比較")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mongodb-url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--skip-legacy-above", type=int, default=1000000,
+                        help="超過此筆數時略過舊版實作（避免耗盡記憶體）")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client["inventory_bench"]
+    await init_beanie(database=db, document_models=[Product])
+    collection = Product.get_motor_collection()
+
+    print(f"{'筆數':>10} {'Python 掃描 (s)':>16} {'聚合管線 (s)':>14} {'加速':>8}")
+    try:
+        for size in args.sizes:
+            await fill_collection(collection, size)
+            new_time, new_result = await timed(lambda: compute_inventory_stats(collection), args.repeat)
+
+            if size <= args.skip_legacy_above:
+                old_time, old_result = await timed(legacy_stats, args.repeat)
+                assert old_result["totalProducts"] == new_result["totalProducts"]
+                assert old_result["lowStockCount"] == new_result["lowStockCount"]
+                assert abs(old_result["totalValue"] - new_result["totalValue"]) < 1e-6 * max(1.0, old_result["totalValue"])
+                print(f"{size:>10} {old_time:>16.3f} {new_time:>14.3f} {old_time / new_time:>7.1f}x")
+            else:
+                print(f"{size:>10} {'(略過)':>16} {new_time:>14.3f} {'-':>8}")
+    finally:
+        await client.drop_database("inventory_bench")
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
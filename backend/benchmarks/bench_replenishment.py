@@ -0,0 +1,112 @@
+"""
+補貨規劃效能：$expr 全表掃描 + 記憶體分組 vs. replenishment 部分索引串流
+
+需要本機 mongod，使用獨立的 inventory_bench 資料庫，結束時會刪除。
+同時列出兩種查詢檢查的文件數（explain executionStats）與 Python 端的記憶體峰值（tracemalloc）。
+
+    cd backend
+    python -m benchmarks.bench_replenishment --sizes 100000 1000000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+from database.connection import ensure_product_indexes
+from models.product import Product
+from services.replenishment import LOW_STOCK_QUERY, order_quantity, plan_orders, stream_plan
+from services.seed_data import seed_products
+
+LEGACY_QUERY = {"$expr": {"$lte": ["$stock", "$min_stock"]}}
+MULTIPLIER = 2.0
+
+async def legacy_plan(collection) -> int:
+    """未維護 reorder_gap 時的寫法：全表掃描後在記憶體中依供應商分組"""
+    orders = defaultdict(list)
+    async for product in collection.find(LEGACY_QUERY):
+        orders[product["supplier"]].append({
+            "_id": str(product["_id"]),
+            "quantity": order_quantity(product["stock"], product["min_stock"], MULTIPLIER, 1),
+        })
+    return sum(len(lines) for lines in orders.values())
+
+async def streamed_plan(collection) -> int:
+    """實際的 GET /api/replenishment/plan：串流輸出，只保留目前一張採購單"""
+    lines = 0
+
+    async def counted():
+        nonlocal lines
+        async for order in plan_orders(collection, MULTIPLIER, 1):
+            lines += order["lineCount"]
+            yield order
+
+    async for _ in stream_plan(counted(), {}):
+        pass
+    return lines
+
+async def docs_examined(collection, query) -> int:
+    plan = await collection.database.command({
+        "explain": {"find": collection.name, "filter": query, "sort": {"supplier": 1, "reorder_gap": -1}},
+        "verbosity": "executionStats",
+    })
+    return plan["executionStats"]["totalDocsExamined"]
+
+async def measure(func, collection, repeat: int, trace: bool):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await func(collection)
+        best = min(best, time.perf_counter() - start)
+    peak = None
+    if trace:
+        tracemalloc.start()
+        await func(collection)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, best, peak
+
+def _mb(value) -> str:
+    return "-" if value is None else f"{value / 1e6:.1f}"
+
+async def main():
+    parser = argparse.ArgumentParser(description="補貨規劃效能比較")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-trace", action="store_true", help="不量測記憶體峰值（tracemalloc 會拖慢執行）")
+    parser.add_argument("--mongodb-url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client["inventory_bench"]
+    await init_beanie(database=db, document_models=[Product])
+    await ensure_product_indexes(db)
+    collection = Product.get_motor_collection()
+
+    print(f"{'筆數':>10} {'需補貨':>8} {'方式':<8} {'檢查文件':>10} {'時間 (s)':>10} {'記憶體峰值 (MB)':>16}")
+    try:
+        for size in args.sizes:
+            await seed_products(collection, size, seed=42)
+            rows = [
+                ("$expr", legacy_plan, LEGACY_QUERY),
+                ("索引串流", streamed_plan, LOW_STOCK_QUERY),
+            ]
+            results = []
+            for name, func, query in rows:
+                lines, seconds, peak = await measure(func, collection, args.repeat, not args.no_trace)
+                examined = await docs_examined(collection, query)
+                results.append(lines)
+                print(f"{size:>10} {lines:>8} {name:<8} {examined:>10} {seconds:>10.3f} {_mb(peak):>16}")
+            assert results[0] == results[1]
+    finally:
+        await client.drop_database("inventory_bench")
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
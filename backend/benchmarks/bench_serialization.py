@@ -0,0 +1,102 @@
+"""
+列表回應序列化的 CPU 時間：FastAPI response_model 路徑 vs. 直接序列化原始文件
+
+只量測伺服器端把驅動回傳的文件轉成回應本文的成本，不需要 mongod。
+舊路徑：response_model 驗證 + jsonable_encoder + 標準 json（用戶列表另外逐筆建立 UserResponse）
+新路徑：FastJSONResponse（orjson，未安裝時為標準 json）直接輸出 dict
+
+    cd backend
+    python -m benchmarks.bench_serialization --rows 10000
+"""
+import argparse
+import asyncio
+import copy
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from models.user import UserResponse
+from services import json_response
+from services.json_response import FastJSONResponse, stream_json_array
+from services.seed_data import generate_users, iter_products
+from services.user_service import USER_PROJECTION, _to_dict, _to_response
+
+def product_documents(rows: int) -> List[Dict[str, Any]]:
+    """模擬 collection.find() 回傳的產品文件"""
+    return [{"_id": ObjectId(), **product} for product in iter_products(rows, 1)]
+
+def user_documents(rows: int) -> List[Dict[str, Any]]:
+    return [
+        {"_id": ObjectId(), **{key: user[key] for key in USER_PROJECTION}}
+        for batch in generate_users(rows, 1) for user in batch
+    ]
+
+async def legacy_products(documents) -> bytes:
+    field = create_response_field(name="Response_get_all_products", type_=List[Dict[str, Any]])
+    for document in documents:
+        document["_id"] = str(document["_id"])
+    content = await serialize_response(field=field, response_content=documents, is_coroutine=True)
+    return JSONResponse(content).body
+
+async def fast_products(documents) -> bytes:
+    return FastJSONResponse(documents).body
+
+async def legacy_users(documents) -> bytes:
+    field = create_response_field(name="Response_get_all_users", type_=List[UserResponse])
+    users = [_to_response(user) for user in documents]
+    content = await serialize_response(field=field, response_content=users, is_coroutine=True)
+    return JSONResponse(content).body
+
+async def fast_users(documents) -> bytes:
+    return FastJSONResponse([_to_dict(user) for user in documents]).body
+
+async def streamed_products(documents) -> bytes:
+    async def cursor():
+        for document in documents:
+            yield document
+    return b"".join([chunk async for chunk in stream_json_array(cursor())])
+
+async def cpu_time(func, documents, repeat: int) -> float:
+    """最佳一次的行程 CPU 時間（每次使用新的文件副本，避免原地修改影響下一輪）"""
+    best = float("inf")
+    for _ in range(repeat):
+        data = copy.deepcopy(documents)
+        start = time.process_time()
+        await func(data)
+        best = min(best, time.process_time() - start)
+    return best
+
+async def main():
+    parser = argparse.ArgumentParser(description="列表回應序列化 CPU 時間")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    products = product_documents(args.rows)
+    users = user_documents(args.rows)
+    # 兩條路徑的輸出必須逐位元組相同
+    assert await legacy_products(copy.deepcopy(products)) == await fast_products(copy.deepcopy(products))
+    assert await legacy_users(copy.deepcopy(users)) == await fast_users(copy.deepcopy(users))
+
+    engine = "orjson" if json_response.orjson is not None else "json（未安裝 orjson）"
+    print(f"每 {args.rows} 筆的 CPU 時間，新路徑使用 {engine}")
+    print(f"{'端點':<22} {'舊 (ms)':>10} {'新 (ms)':>10} {'加速':>8}")
+    cases = [
+        ("GET /products", legacy_products, fast_products, products),
+        ("GET /products (串流)", legacy_products, streamed_products, products),
+        ("GET /users", legacy_users, fast_users, users),
+    ]
+    for name, legacy, fast, documents in cases:
+        old = await cpu_time(legacy, documents, args.repeat)
+        new = await cpu_time(fast, documents, args.repeat)
+        print(f"{name:<22} {old * 1000:>10.1f} {new * 1000:>10.1f} {old / new:>7.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+"""
+啟動時間：匯入時間、lifespan 開始服務的時間、/readyz 就緒時間與第一批請求延遲
+
+匯入時間在獨立的子行程中量測；啟動與第一批請求需要本機 mongod，
+使用獨立的 inventory_bench 資料庫，結束時會刪除。
+比較未暖機（minPoolSize=0、不預載快取）與暖機（預先建立連線、預載最近更新的產品）兩種設定。
+
+    cd backend
+    python -m benchmarks.bench_startup --products 100000 --pool 20 --prime 1000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import replace
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DESCENDING
+from app_factory import create_app
+from routes.products import product_cache
+from settings import Settings
+from services.seed_data import seed_products
+
+BENCH_DATABASE = "inventory_bench"
+BENCH_USERS_DATABASE = "inventory_bench_users"
+_IMPORT_SCRIPT = (
+    "import sys, time; start = time.perf_counter(); import app_factory; "
+    "print(time.perf_counter() - start, 'numpy' in sys.modules)"
+)
+
+def measure_import(runs: int):
+    """每次以新的直譯器匯入 app_factory，回傳 (各次秒數, numpy 是否已載入)"""
+    seconds = []
+    numpy_loaded = False
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT_SCRIPT], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.split()
+        seconds.append(float(output[0]))
+        numpy_loaded = output[1] == "True"
+    return seconds, numpy_loaded
+
+async def measure_boot(settings: Settings, product_ids, concurrency: int):
+    """回傳 (lifespan 開始服務秒數, 就緒秒數, 第一批請求延遲毫秒列表)"""
+    # 快取是模組層級的單例，清掉前一個設定留下的內容
+    await product_cache.clear()
+    app = create_app(settings)
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        serving = time.perf_counter() - start
+        while not app.state.readiness.ready:
+            if app.state.readiness.failed:
+                raise RuntimeError(app.state.readiness.to_dict())
+            await asyncio.sleep(0.005)
+        ready = time.perf_counter() - start
+
+        async def timed(client, product_id):
+            begin = time.perf_counter()
+            response = await client.get(f"/api/products/{product_id}")
+            response.raise_for_status()
+            return (time.perf_counter() - begin) * 1000
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            latencies = await asyncio.gather(*(timed(client, product_id) for product_id in product_ids[:concurrency]))
+    return serving, ready, latencies
+
+async def main():
+    parser = argparse.ArgumentParser(description="啟動時間測試")
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--pool", type=int, default=20, help="暖機設定的 minPoolSize")
+    parser.add_argument("--prime", type=int, default=1000, help="暖機設定預載的產品數")
+    parser.add_argument("--concurrency", type=int, default=50, help="第一批同時送出的請求數")
+    parser.add_argument("--import-runs", type=int, default=5)
+    parser.add_argument("--mongodb-url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    args = parser.parse_args()
+
+    seconds, numpy_loaded = measure_import(args.import_runs)
+    print(f"匯入 app_factory：中位數 {statistics.median(seconds):.3f}s，最快 {min(seconds):.3f}s（numpy {'已' if numpy_loaded else '未'}載入）")
+
+    client = AsyncIOMotorClient(args.mongodb_url)
+    collection = client[BENCH_DATABASE]["products"]
+    try:
+        await seed_products(collection, args.products, seed=42)
+        # 第一批請求讀取最近更新的產品，也就是暖機時預載的範圍
+        cursor = collection.find({}, {"_id": 1}).sort([("updated_at", DESCENDING), ("_id", DESCENDING)])
+        product_ids = [str(document["_id"]) for document in await cursor.to_list(args.concurrency)]
+
+        base = Settings.from_env(
+            mongodb_url=args.mongodb_url,
+            database_name=BENCH_DATABASE,
+            users_database_name=BENCH_USERS_DATABASE,
+            metrics_enabled=False,
+        )
+        scenarios = [
+            ("未暖機", dict(min_pool_size=0, cache_prime_count=0)),
+            ("暖機", dict(min_pool_size=args.pool, cache_prime_count=args.prime)),
+        ]
+        print(f"{'設定':<6} {'開始服務 (s)':>12} {'就緒 (s)':>10} {'首批 p50 (ms)':>14} {'首批 max (ms)':>14}")
+        for name, overrides in scenarios:
+            serving, ready, latencies = await measure_boot(replace(base, **overrides), product_ids, args.concurrency)
+            print(f"{name:<6} {serving:>12.3f} {ready:>10.3f} {statistics.median(latencies):>14.2f} {max(latencies):>14.2f}")
+    finally:
+        await client.drop_database(BENCH_DATABASE)
+        await client.drop_database(BENCH_USERS_DATABASE)
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,296 @@
+"""
+產品與用戶 API 負載測試：行程內啟動應用程式（httpx ASGI transport），輸出 JSON 報告
+
+後端：
+  memory  記憶體產品儲存（simple_api.py 的後端），不提供用戶 API，略過 email 情境
+  mongo   本機 mongod，使用獨立的 inventory_loadtest / users_loadtest 資料庫，結束時刪除
+
+情境：list、get、create、update、stats、email、mixed（約 80% 讀 / 20% 寫）。
+每個情境以 --concurrency 指定的各個並行數執行 --requests 次，記錄 p50/p95/p99 延遲與吞吐量。
+資料由固定 seed 產生，相同參數在不同提交之間可直接比較：
+
+    cd backend
+    python -m benchmarks.load_test --backend memory --products 100000 --output before.json
+    python -m benchmarks.load_test --backend memory --products 100000 --baseline before.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+from app_factory import create_app
+from settings import Settings
+from routes.memory_products import store as memory_store
+from services.seed_data import CATEGORIES, generate_products, generate_users, insert_batches, iter_products, user_email
+
+SCENARIOS = ["list", "get", "create", "update", "stats", "email", "mixed"]
+PRODUCTS_DB = "inventory_loadtest"
+USERS_DB = "users_loadtest"
+# 保留的產品 ID 樣本數（隨機存取用，避免百萬筆時整份 ID 清單佔用記憶體）
+ID_SAMPLE_SIZE = 10000
+
+Request = Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]
+
+class Target:
+    """一個受測後端：應用程式、已植入資料的樣本，以及各情境的請求"""
+
+    def __init__(self, name: str, app, product_ids: List[str], users: int, seed: int):
+        self.name = name
+        self.app = app
+        self.product_ids = product_ids
+        self.users = users
+        # 新增情境使用另一個 seed，避免與植入資料重複
+        self._new_products = iter_products(sys.maxsize, seed + 1)
+
+    @property
+    def memory(self) -> bool:
+        return self.name == "memory"
+
+    def product_body(self, product: Dict[str, Any]) -> Dict[str, Any]:
+        return memory_body(product) if self.memory else api_body(product)
+
+    async def list(self, client, rng):
+        return await client.get("/api/products/", params={"category": rng.choice(CATEGORIES)})
+
+    async def get(self, client, rng):
+        return await client.get(f"/api/products/{rng.choice(self.product_ids)}")
+
+    async def create(self, client, rng):
+        return await client.post("/api/products/", json=self.product_body(next(self._new_products)))
+
+    async def update(self, client, rng):
+        url = f"/api/products/{rng.choice(self.product_ids)}"
+        body = {"stock": rng.randint(0, 100)}
+        # 記憶體後端只有 PUT（部分欄位合併），MongoDB 後端以 PATCH 部分更新
+        return await (client.put(url, json=body) if self.memory else client.patch(url, json=body))
+
+    async def stats(self, client, rng):
+        return await client.get("/api/products/stats/inventory")
+
+    async def email(self, client, rng):
+        return await client.get(f"/api/users/email/{user_email(rng.randrange(self.users))}")
+
+    async def mixed(self, client, rng):
+        roll = rng.random()
+        if roll < 0.60:
+            return await self.get(client, rng)
+        if roll < 0.75:
+            return await self.list(client, rng)
+        if roll < 0.80:
+            return await self.stats(client, rng)
+        if roll < 0.95:
+            return await self.update(client, rng)
+        return await self.create(client, rng)
+
+    def supports(self, scenario: str) -> bool:
+        return not (scenario == "email" and (self.memory or not self.users))
+
+def api_body(product: Dict[str, Any]) -> Dict[str, Any]:
+    """產生器文件 -> POST /api/products/ 請求本文（時間戳記由伺服器設定）"""
+    return {key: value for key, value in product.items() if key not in ("created_at", "updated_at")}
+
+def memory_body(product: Dict[str, Any]) -> Dict[str, Any]:
+    """記憶體後端使用 minStock 欄位名稱"""
+    body = api_body(product)
+    body["minStock"] = body.pop("min_stock")
+    return body
+
+def _sample(rng: random.Random, sample: List[str], seen: int, item: str):
+    """水庫抽樣：串流中保留均勻分布的 ID 樣本"""
+    if len(sample) < ID_SAMPLE_SIZE:
+        sample.append(item)
+    else:
+        index = rng.randrange(seen)
+        if index < ID_SAMPLE_SIZE:
+            sample[index] = item
+
+def seed_memory(products: int, seed: int) -> List[str]:
+    memory_store.clear()
+    rng = random.Random(seed)
+    sample: List[str] = []
+    for i, product in enumerate(iter_products(products, seed)):
+        _sample(rng, sample, i + 1, memory_store.create(memory_body(product))["id"])
+    return sample
+
+async def seed_mongo(client: AsyncIOMotorClient, products: int, users: int, seed: int, batch: int) -> List[str]:
+    await client.drop_database(PRODUCTS_DB)
+    await client.drop_database(USERS_DB)
+    collection = client[PRODUCTS_DB]["products"]
+    await insert_batches(collection, generate_products(products, seed, batch))
+    await insert_batches(client[USERS_DB]["users"], generate_users(users, seed, batch))
+    # ObjectId 由驅動產生、每次執行都不同，隨機抽樣即可
+    cursor = collection.aggregate([{"$sample": {"size": ID_SAMPLE_SIZE}}, {"$project": {"_id": 1}}])
+    return [str(document["_id"]) async for document in cursor]
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """最近排名法"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+async def run_scenario(client: httpx.AsyncClient, request: Request, requests: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    """concurrency 個工作者共用同一份請求配額，回傳延遲分布與吞吐量"""
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker(worker_id: int):
+        nonlocal errors
+        rng = random.Random(seed * 1000 + worker_id)
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await request(client, rng)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+async def run_target(target: Target, args) -> List[Dict[str, Any]]:
+    results = []
+    # ASGI transport 不會觸發 lifespan，手動進入以初始化資料庫與背景工作
+    async with target.app.router.lifespan_context(target.app):
+        transport = httpx.ASGITransport(app=target.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+            for scenario in args.scenarios:
+                if not target.supports(scenario):
+                    print(f"⚠️ {target.name} 不支援 {scenario} 情境，略過", file=sys.stderr)
+                    continue
+                request = getattr(target, scenario)
+                for concurrency in args.concurrency:
+                    if args.warmup:
+                        await run_scenario(client, request, args.warmup, concurrency, args.seed)
+                    result = await run_scenario(client, request, args.requests, concurrency, args.seed)
+                    result.update(backend=target.name, scenario=scenario, concurrency=concurrency)
+                    results.append(result)
+                    latency = result["latency_ms"]
+                    print(
+                        f"{target.name:<7} {scenario:<7} c={concurrency:<4} "
+                        f"{result['throughput_rps']:>9.1f} req/s  p50 {latency['p50']:>8.2f}  "
+                        f"p95 {latency['p95']:>8.2f}  p99 {latency['p99']:>8.2f} ms  錯誤 {result['errors']}",
+                        file=sys.stderr
+                    )
+    return results
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: List[Dict[str, Any]], baseline_path: str):
+    """與先前的報告比較 p95 與吞吐量"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(r["backend"], r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"\n與 {baseline_path}（{baseline['meta'].get('commit')}）比較：", file=sys.stderr)
+    for result in results:
+        old = previous.get((result["backend"], result["scenario"], result["concurrency"]))
+        if old is None:
+            continue
+        p95_change = (result["latency_ms"]["p95"] / old["latency_ms"]["p95"] - 1) * 100 if old["latency_ms"]["p95"] else 0.0
+        rps_change = (result["throughput_rps"] / old["throughput_rps"] - 1) * 100 if old["throughput_rps"] else 0.0
+        print(
+            f"{result['backend']:<7} {result['scenario']:<7} c={result['concurrency']:<4} "
+            f"p95 {p95_change:+7.1f}%  吞吐量 {rps_change:+7.1f}%",
+            file=sys.stderr
+        )
+
+async def main():
+    parser = argparse.ArgumentParser(description="產品與用戶 API 負載測試")
+    parser.add_argument("--backend", choices=["memory", "mongo", "both"], default="memory")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--products", type=int, default=10000, help="植入的產品數")
+    parser.add_argument("--users", type=int, default=10000, help="植入的用戶數（僅 mongo）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=2000, help="每個情境、每個並行數的請求數")
+    parser.add_argument("--warmup", type=int, default=100, help="正式量測前的暖身請求數")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--batch", type=int, default=10000, help="植入 MongoDB 的批次大小")
+    parser.add_argument("--mongodb-url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--keep", action="store_true", help="結束時保留 MongoDB 測試資料庫")
+    parser.add_argument("--output", help="JSON 報告寫入的檔案（預設輸出到 stdout）")
+    parser.add_argument("--baseline", help="先前的 JSON 報告，列出 p95 與吞吐量的變化")
+    args = parser.parse_args()
+
+    backends = ["memory", "mongo"] if args.backend == "both" else [args.backend]
+    results: List[Dict[str, Any]] = []
+    for backend in backends:
+        start = time.perf_counter()
+        if backend == "memory":
+            product_ids = seed_memory(args.products, args.seed)
+            app = create_app(Settings.from_env(storage_backend="memory", memory_data_dir=None))
+            target = Target("memory", app, product_ids, 0, args.seed)
+            print(f"✅ memory 已植入 {args.products} 個產品（{time.perf_counter() - start:.1f}s）", file=sys.stderr)
+            results.extend(await run_target(target, args))
+            continue
+
+        seed_client = AsyncIOMotorClient(args.mongodb_url)
+        try:
+            product_ids = await seed_mongo(seed_client, args.products, args.users, args.seed, args.batch)
+            print(f"✅ mongo 已植入 {args.products} 個產品、{args.users} 個用戶（{time.perf_counter() - start:.1f}s）", file=sys.stderr)
+            app = create_app(Settings.from_env(
+                storage_backend="mongo", mongodb_url=args.mongodb_url,
+                database_name=PRODUCTS_DB, users_database_name=USERS_DB
+            ))
+            results.extend(await run_target(Target("mongo", app, product_ids, args.users, args.seed), args))
+        finally:
+            if not args.keep:
+                await seed_client.drop_database(PRODUCTS_DB)
+                await seed_client.drop_database(USERS_DB)
+            seed_client.close()
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✅ 報告已寫入 {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.baseline:
+        compare(results, args.baseline)
+
+if __name__ == "__main__":
+    asyncio.run(main())
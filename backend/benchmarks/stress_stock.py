@@ -0,0 +1,131 @@
+"""
+庫存預留併發壓力測試：驗證條件式 $inc 不會超賣
+
+需要本機 mongod，使用獨立的 inventory_bench 資料庫，結束時會刪除。
+同時以舊版讀取-修改-儲存（Product.get + save）流程對照，顯示遺失更新。
+MongoDB 為副本集時批量預留走交易，單機時走補償式回滾，兩者皆會檢查。
+
+    cd backend
+    python -m benchmarks.stress_stock --stock 1000 --workers 200 --requests 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+from models.product import Product
+from services.stock import InsufficientStockError, reserve_batch, reserve_stock
+
+async def create_products(count: int, stock: int):
+    products = [
+        Product(name=f"壓測商品 {i}", category="壓測", price=100.0, stock=stock, min_stock=0, supplier="壓測")
+        for i in range(count)
+    ]
+    await Product.insert_many(products)
+    return [str(p.id) for p in await Product.find(Product.category == "壓測").to_list()]
+
+async def legacy_reserve(product_id: str, quantity: int) -> bool:
+    """舊版流程：讀取、在 Python 檢查並扣減、再整筆儲存"""
+    product = await Product.get(product_id)
+    if product.stock < quantity:
+        return False
+    await asyncio.sleep(0)
+    product.stock -= quantity
+    await product.save()
+    return True
+
+async def atomic_reserve(collection, product_id: str, quantity: int) -> bool:
+    try:
+        await reserve_stock(collection, product_id, quantity)
+        return True
+    except InsufficientStockError:
+        return False
+
+async def run_single(name, reserve, product_id, initial, workers, requests, rng):
+    """多個 worker 同時預留同一產品，比對成功數量與剩餘庫存"""
+    granted = 0
+
+    async def worker():
+        nonlocal granted
+        for _ in range(requests):
+            quantity = rng.randint(1, 5)
+            if await reserve(product_id, quantity):
+                granted += quantity
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    elapsed = time.perf_counter() - start
+    remaining = (await Product.get(product_id)).stock
+    consistent = granted + remaining == initial and remaining >= 0
+    print(f"{name:<10} 成功預留 {granted:>6}  剩餘 {remaining:>6}  "
+          f"{'✅ 一致' if consistent else '❌ 超賣/遺失更新'}  ({workers * requests / elapsed:,.0f} 次/秒)")
+    return consistent
+
+async def run_batch(collection, product_ids, initial, workers, requests, rng):
+    """多產品批量預留：每個產品的扣減總量必須等於成功批次的需求總量"""
+    granted = {product_id: 0 for product_id in product_ids}
+
+    async def worker():
+        for _ in range(requests):
+            items = [
+                {"product_id": product_id, "quantity": rng.randint(1, 5)}
+                for product_id in rng.sample(product_ids, rng.randint(2, len(product_ids)))
+            ]
+            try:
+                await reserve_batch(collection, items)
+            except InsufficientStockError:
+                continue
+            for item in items:
+                granted[item["product_id"]] += item["quantity"]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    elapsed = time.perf_counter() - start
+    consistent = True
+    for product_id in product_ids:
+        remaining = (await Product.get(product_id)).stock
+        consistent &= granted[product_id] + remaining == initial and remaining >= 0
+    print(f"{'批量預留':<10} {len(product_ids)} 個產品  "
+          f"{'✅ 一致' if consistent else '❌ 超賣/部分扣減'}  ({workers * requests / elapsed:,.0f} 批/秒)")
+    return consistent
+
+async def main():
+    parser = argparse.ArgumentParser(description="庫存預留併發壓力測試")
+    parser.add_argument("--stock", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20, help="每個 worker 的請求數")
+    parser.add_argument("--batch-products", type=int, default=5)
+    parser.add_argument("--mongodb-url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(args.mongodb_url, maxPoolSize=args.workers)
+    db = client["inventory_bench"]
+    await init_beanie(database=db, document_models=[Product])
+    collection = Product.get_motor_collection()
+    rng = random.Random(42)
+
+    try:
+        await collection.delete_many({})
+        legacy_id, atomic_id = await create_products(2, args.stock)
+        await run_single("舊版", legacy_reserve, legacy_id, args.stock, args.workers, args.requests, rng)
+        ok = await run_single(
+            "條件更新", lambda pid, qty: atomic_reserve(collection, pid, qty),
+            atomic_id, args.stock, args.workers, args.requests, rng
+        )
+
+        await collection.delete_many({})
+        batch_ids = await create_products(args.batch_products, args.stock)
+        ok &= await run_batch(collection, batch_ids, args.stock, args.workers, args.requests, rng)
+    finally:
+        await client.drop_database("inventory_bench")
+        client.close()
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,36 @@
+import asyncio
+from typing import Any, Dict
+from motor.motor_asyncio import AsyncIOMotorClient
+from services.metrics import mongo_listeners
+from settings import Settings
+
+def motor_client_options(settings: Settings) -> Dict[str, Any]:
+    """由設定組出 AsyncIOMotorClient 的連線池與逾時參數（未設定的不傳入，沿用驅動預設）"""
+    options: Dict[str, Any] = {
+        "maxPoolSize": settings.max_pool_size,
+        "minPoolSize": settings.min_pool_size,
+        "serverSelectionTimeoutMS": settings.server_selection_timeout_ms,
+        "connectTimeoutMS": settings.connect_timeout_ms,
+    }
+    if settings.max_idle_time_ms is not None:
+        options["maxIdleTimeMS"] = settings.max_idle_time_ms
+    if settings.wait_queue_timeout_ms is not None:
+        options["waitQueueTimeoutMS"] = settings.wait_queue_timeout_ms
+    if settings.socket_timeout_ms is not None:
+        options["socketTimeoutMS"] = settings.socket_timeout_ms
+    if settings.compressors:
+        options["compressors"] = ",".join(settings.compressors)
+    if settings.metrics_enabled:
+        options["event_listeners"] = mongo_listeners()
+    return options
+
+async def prewarm_pool(client: AsyncIOMotorClient, connections: int) -> int:
+    """同時送出多個 ping，讓連線池先建立 connections 條連線（第一批請求不必等待握手）"""
+    if connections <= 0:
+        return 0
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(connections)))
+    return connections
+
+def create_motor_client(settings: Settings) -> AsyncIOMotorClient:
+    """建立整個應用程式共用的 Motor 客戶端（產品與用戶共用同一個連線池）"""
+    return AsyncIOMotorClient(settings.mongodb_url, **motor_client_options(settings))
@@ -1,24 +1,57 @@
-import os
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
 from beanie import init_beanie
-from models.product import Product
+from models.product import NATURAL_KEY_INDEX, PRODUCT_INDEXES, Product
+from services.stock_ledger import ensure_ledger_indexes
 
-# MongoDB 配置
-MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
-DATABASE_NAME = os.getenv("DATABASE_NAME", "inventory_db")
+# 由應用程式工廠注入的共用客戶端（不在匯入時建立連線）
+client: Optional[AsyncIOMotorClient] = None
+db: Optional[AsyncIOMotorDatabase] = None
 
-# MongoDB 客戶端
-client = AsyncIOMotorClient(MONGODB_URL)
-db = client[DATABASE_NAME]
-
-async def init_database():
-    """初始化資料庫連接"""
+async def init_database(shared_client: AsyncIOMotorClient, database_name: str):
+    """以共用客戶端初始化產品資料庫（Beanie）；索引另由 ensure_product_indexes 建立"""
+    global client, db
+    client = shared_client
+    db = shared_client[database_name]
     await init_beanie(database=db, document_models=[Product])
     print("資料庫連接成功！")
 
+async def _replace_legacy_natural_key(products: AsyncIOMotorCollection) -> bool:
+    """舊版的 name_supplier 不是唯一索引，選項不同無法直接覆蓋；沒有重複資料時先刪除
+
+    回傳是否可以建立唯一的 name_supplier；有重複的自然鍵時保留舊索引並列出範例，需人工合併。
+    """
+    legacy = (await products.index_information()).get(NATURAL_KEY_INDEX)
+    if legacy is None or legacy.get("unique"):
+        return True
+    duplicates = await products.aggregate([
+        {"$group": {"_id": {"name": "$name", "supplier": "$supplier"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": 5},
+    ], allowDiskUse=True).to_list(None)
+    if duplicates:
+        print(f"❌ 產品有重複的 name + supplier，無法建立唯一索引: {[d['_id'] for d in duplicates]}")
+        return False
+    await products.drop_index(NATURAL_KEY_INDEX)
+    return True
+
+async def ensure_product_indexes(database: AsyncIOMotorDatabase):
+    """建立產品、庫存異動與彙總的索引（重複呼叫不會重建）"""
+    products = database[Product.Settings.collection]
+    indexes = PRODUCT_INDEXES
+    if not await _replace_legacy_natural_key(products):
+        indexes = [index for index in PRODUCT_INDEXES if index.document["name"] != NATURAL_KEY_INDEX]
+    await asyncio.gather(
+        products.create_indexes(indexes),
+        ensure_ledger_indexes(database),
+    )
+
 async def close_database():
-    """關閉資料庫連接"""
-    client.close()
+    """釋放參照；客戶端由應用程式工廠統一關閉"""
+    global client, db
+    client = None
+    db = None
     print("資料庫連接已關閉")
 
 async def get_database():
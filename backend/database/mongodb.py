@@ -1,6 +1,6 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from typing import Optional
-import os
+from models.user import USER_INDEXES
 
 class Database:
     client: AsyncIOMotorClient = None
@@ -11,35 +11,28 @@ db = Database()
 async def get_database():
     return db.database
 
-async def connect_to_mongo():
-    """連接到 MongoDB"""
-    # MongoDB 連接字符串
-    mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
-    database_name = os.getenv("DATABASE_NAME", "user_management")
-    
-    print(f"正在連接到 MongoDB: {mongodb_url}")
+async def ensure_user_indexes(database: AsyncIOMotorDatabase):
+    """email 唯一索引、不分大小寫的正規化郵箱唯一索引與姓名搜尋索引"""
+    await database.users.create_index("email", unique=True)
+    await database.users.create_indexes(USER_INDEXES)
+
+async def connect_to_mongo(client: AsyncIOMotorClient, database_name: str):
+    """以共用客戶端連接用戶資料庫（索引另由 ensure_user_indexes 建立）"""
+    print(f"正在連接到 MongoDB 資料庫: {database_name}")
     
     try:
-        # 創建客戶端
-        db.client = AsyncIOMotorClient(mongodb_url)
-        
         # 測試連接
-        await db.client.admin.command('ping')
+        await client.admin.command('ping')
         print("✅ MongoDB 連接成功!")
         
-        # 設置資料庫
-        db.database = db.client[database_name]
-        
-        # 創建索引（確保 email 唯一）
-        await db.database.users.create_index("email", unique=True)
-        print("✅ 資料庫索引創建完成!")
+        db.client = client
+        db.database = client[database_name]
         
     except Exception as e:
         print(f"❌ MongoDB 連接失敗: {e}")
         raise e
 
 async def close_mongo_connection():
-    """關閉 MongoDB 連接"""
-    if db.client:
-        db.client.close()
-        print("✅ MongoDB 連接已關閉")
+    """釋放參照；客戶端由應用程式工廠統一關閉"""
+    db.client = None
+    db.database = None
@@ -0,0 +1,39 @@
+"""
+替既有用戶補上 name_normalized / email_normalized 並建立不分大小寫的郵箱唯一索引
+
+可重複執行：只處理缺少欄位的文件；只差在大小寫的重複郵箱會列出，需人工合併後再執行一次。
+
+    cd backend
+    python migrate_users.py --batch 5000
+"""
+import argparse
+import asyncio
+import time
+from settings import Settings
+from database.client import create_motor_client
+from database.mongodb import ensure_user_indexes
+from services.seed_data import DEFAULT_BATCH_SIZE
+from services.user_service import backfill_search_fields
+
+async def main():
+    parser = argparse.ArgumentParser(description="用戶搜尋欄位遷移")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH_SIZE, help="每批更新筆數")
+    args = parser.parse_args()
+
+    settings = Settings.from_env(metrics_enabled=False)
+    client = create_motor_client(settings)
+    try:
+        collection = client[settings.users_database_name]["users"]
+        # 先建索引：部分索引只約束已遷移的文件，回填時重複郵箱會以唯一鍵錯誤回報
+        await ensure_user_indexes(collection.database)
+        start = time.perf_counter()
+        result = await backfill_search_fields(collection, args.batch)
+        elapsed = time.perf_counter() - start
+        print(f"✅ 已檢查 {result['scanned']} 筆、更新 {result['updated']} 筆：{elapsed:.1f}s")
+        for conflict in result["conflicts"]:
+            print(f"⚠️ {conflict['id']} {conflict['email']}: {conflict['error']}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,7 +1,38 @@
 from beanie import Document
-from pydantic import Field
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+
+def reorder_gap(stock: int, min_stock: int) -> int:
+    """min_stock - stock；>= 0 表示需要補貨"""
+    return min_stock - stock
+
+NATURAL_KEY_INDEX = "name_supplier"
+
+# 支援分頁、篩選與排序的複合索引（皆以 _id 結尾以配合 keyset 分頁）
+PRODUCT_INDEXES = [
+    IndexModel([("updated_at", DESCENDING), ("_id", DESCENDING)], name="updated_at_id"),
+    IndexModel([("category", ASCENDING), ("_id", ASCENDING)], name="category_id"),
+    IndexModel([("supplier", ASCENDING), ("_id", ASCENDING)], name="supplier_id"),
+    IndexModel([("category", ASCENDING), ("price", ASCENDING), ("_id", ASCENDING)], name="category_price_id"),
+    IndexModel([("price", ASCENDING), ("_id", ASCENDING)], name="price_id"),
+    # 批量匯入以 name + supplier 作為自然鍵 upsert；唯一索引避免並行匯入插入重複的自然鍵
+    IndexModel([("name", ASCENDING), ("supplier", ASCENDING)], name=NATURAL_KEY_INDEX, unique=True),
+    # 補貨規劃：只索引需要補貨的產品，依供應商分組、缺口大的在前
+    IndexModel(
+        [("supplier", ASCENDING), ("reorder_gap", DESCENDING)],
+        name="replenishment",
+        partialFilterExpression={"reorder_gap": {"$gte": 0}},
+    ),
+    # 全文搜尋（不套用語言詞幹，避免影響中文與型號）
+    IndexModel(
+        [("name", TEXT), ("description", TEXT), ("category", TEXT), ("supplier", TEXT)],
+        name="product_text",
+        default_language="none",
+        weights={"name": 10, "category": 3, "supplier": 3, "description": 1},
+    ),
+]
 
 class Product(Document):
     name: str = Field(..., min_length=1, max_length=100)
@@ -13,9 +44,17 @@ class Product(Document):
     supplier: str = Field(..., min_length=1, max_length=100)
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
+    # 由 stock 與 min_stock 推導並隨每次寫入維護，讓「庫存不足」可以走索引而不是 $expr 全表掃描
+    reorder_gap: int = 0
+
+    @model_validator(mode="after")
+    def compute_reorder_gap(self):
+        self.reorder_gap = reorder_gap(self.stock, self.min_stock)
+        return self
     
     class Settings:
         collection = "products"
+        # 索引定義在 PRODUCT_INDEXES，啟動時於背景建立（不讓 init_beanie 的索引建置阻塞啟動）
         
     class Config:
         json_schema_extra = {
@@ -29,3 +68,51 @@ class Product(Document):
                 "supplier": "Apple Taiwan"
             }
         }
+
+class ProductRow(BaseModel):
+    """匯入列驗證（欄位與限制同 Product）；不依賴 Beanie 初始化，可在工作行程中使用"""
+    name: str = Field(..., min_length=1, max_length=100)
+    description: Optional[str] = Field(None, max_length=500)
+    category: str = Field(..., min_length=1, max_length=50)
+    price: float = Field(..., gt=0)
+    stock: int = Field(..., ge=0)
+    min_stock: int = Field(..., ge=0)
+    supplier: str = Field(..., min_length=1, max_length=100)
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+    reorder_gap: int = 0
+
+    @model_validator(mode="after")
+    def compute_reorder_gap(self):
+        self.reorder_gap = reorder_gap(self.stock, self.min_stock)
+        return self
+
+class ProductUpdate(BaseModel):
+    """部分更新：只驗證有提供的欄位（限制與 Product 相同）"""
+    name: Optional[str] = Field(None, min_length=1, max_length=100)
+    description: Optional[str] = Field(None, max_length=500)
+    category: Optional[str] = Field(None, min_length=1, max_length=50)
+    price: Optional[float] = Field(None, gt=0)
+    stock: Optional[int] = Field(None, ge=0)
+    min_stock: Optional[int] = Field(None, ge=0)
+    supplier: Optional[str] = Field(None, min_length=1, max_length=100)
+
+    @model_validator(mode="after")
+    def check_required_not_null(self):
+        # 只有 description 可以清成 null
+        for field in self.model_fields_set - {"description"}:
+            if getattr(self, field) is None:
+                raise ValueError(f"{field} 不可為 null")
+        return self
+
+class StockAdjust(BaseModel):
+    delta: int = Field(..., description="庫存變動量，正數入庫、負數出庫")
+
+class StockReserve(BaseModel):
+    quantity: int = Field(..., gt=0)
+
+class StockReserveItem(StockReserve):
+    product_id: str
+
+class StockReserveBatch(BaseModel):
+    items: List[StockReserveItem] = Field(..., min_length=1, max_length=1000)
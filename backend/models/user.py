@@ -1,12 +1,49 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from bson import ObjectId
 from pydantic import ConfigDict
+from pydantic_core import core_schema
+from pymongo import ASCENDING, IndexModel
+from pymongo.collation import Collation
+import unicodedata
+
+# 郵箱比對不分大小寫：唯一索引與查詢都要指定相同的定序，查詢才能使用索引
+EMAIL_COLLATION = Collation(locale="en", strength=2)
+
+USER_INDEXES = [
+    # 部分索引：尚未遷移（沒有 email_normalized）的舊文件不受唯一限制
+    IndexModel(
+        [("email_normalized", ASCENDING)],
+        name="email_normalized_ci",
+        unique=True,
+        collation=EMAIL_COLLATION,
+        partialFilterExpression={"email_normalized": {"$exists": True}},
+    ),
+    # 姓名前綴搜尋（範圍查詢 + 依姓名排序）
+    IndexModel([("name_normalized", ASCENDING), ("_id", ASCENDING)], name="name_normalized_id"),
+]
+
+def normalize_email(email: str) -> str:
+    """去除前後空白並轉小寫"""
+    return email.strip().lower()
+
+def normalize_name(name: str) -> str:
+    """NFKC 正規化（全形轉半形）、casefold 並合併空白"""
+    return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
+
+def search_fields(name: Optional[str] = None, email: Optional[str] = None) -> Dict[str, Any]:
+    """寫入用戶時一併保存的正規化欄位（只包含有提供的欄位）"""
+    fields: Dict[str, Any] = {}
+    if name is not None:
+        fields["name_normalized"] = normalize_name(name)
+    if email is not None:
+        fields["email_normalized"] = normalize_email(email)
+    return fields
 
 class PyObjectId(ObjectId):
     @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
+    def __get_pydantic_core_schema__(cls, source_type, handler):
+        return core_schema.no_info_plain_validator_function(cls.validate)
 
     @classmethod
     def validate(cls, v):
@@ -15,8 +52,8 @@ class PyObjectId(ObjectId):
         return ObjectId(v)
 
     @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
+    def __get_pydantic_json_schema__(cls, schema, handler):
+        return {"type": "string"}
 
 class UserBase(BaseModel):
     """用戶基礎模型"""
@@ -56,3 +93,25 @@ class UserResponse(BaseModel):
     phone: Optional[str] = Field(None, description="電話號碼")
     
     model_config = ConfigDict(from_attributes=True)
+
+class UserBulkUpdateItem(UserUpdate):
+    """批量更新時的單筆資料（需帶 ID）"""
+    id: str = Field(..., description="用戶 ID")
+
+class UserBulkDelete(BaseModel):
+    """批量刪除請求"""
+    ids: List[str] = Field(..., description="要刪除的用戶 ID 列表")
+
+class BulkUserResult(BaseModel):
+    """批量操作的單筆結果"""
+    index: int = Field(..., description="對應請求中的位置")
+    status: str = Field(..., description="created / updated / deleted / conflict / not_found / invalid")
+    id: Optional[str] = Field(None, description="用戶 ID")
+    user: Optional[UserResponse] = Field(None, description="操作後的用戶資料")
+    error: Optional[str] = Field(None, description="錯誤原因")
+
+class BulkUserResponse(BaseModel):
+    """批量操作回應"""
+    succeeded: int = Field(..., description="成功筆數")
+    failed: int = Field(..., description="失敗筆數")
+    results: List[BulkUserResult] = Field(..., description="逐筆結果")
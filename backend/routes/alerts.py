@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from services.low_stock_watcher import low_stock_watcher
+
+router = APIRouter(prefix="/products/alerts", tags=["alerts"])
+
+@router.get("/low-stock")
+async def get_low_stock_watch_status():
+    """低庫存監看狀態"""
+    return {
+        "running": low_stock_watcher.running,
+        "lowStockCount": len(low_stock_watcher.low_ids),
+        "eventsSeen": low_stock_watcher.events_seen,
+        "subscribers": len(low_stock_watcher.broadcaster),
+    }
+
+@router.get("/low-stock/stream")
+async def stream_low_stock_alerts():
+    """以 SSE 推播低庫存轉換（low / recovered / removed；跟不上時送 resync）"""
+    return StreamingResponse(
+        low_stock_watcher.broadcaster.stream(
+            initial=low_stock_watcher.snapshot_event,
+            resync=low_stock_watcher.snapshot_event
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from models.product import Product
+from services.analytics import analytics_engine, numpy_available
+from typing import List, Optional
+
+router = APIRouter(prefix="/products/analytics", tags=["analytics"])
+
+DEFAULT_PERCENTILES = [5, 25, 50, 75, 95]
+
+async def _columns():
+    if not numpy_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="分析功能需要安裝 numpy"
+        )
+    return await analytics_engine.get(Product.get_motor_collection())
+
+@router.get("/value-matrix")
+async def get_value_matrix():
+    """類別 × 供應商的庫存價值矩陣"""
+    try:
+        return (await _columns()).value_matrix()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"獲取價值矩陣失敗: {str(e)}"
+        )
+
+@router.get("/stockout-risk")
+async def get_stockout_risk():
+    """缺貨風險分布（缺貨、嚴重、偏低、正常、過量）"""
+    try:
+        return (await _columns()).stockout_risk()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"獲取缺貨風險失敗: {str(e)}"
+        )
+
+@router.get("/price-percentiles")
+async def get_price_percentiles(
+    p: Optional[List[float]] = Query(None, description="百分位數（0-100），可重複指定")
+):
+    """價格百分位數"""
+    percentiles = p or DEFAULT_PERCENTILES
+    if any(value < 0 or value > 100 for value in percentiles):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="百分位數必須介於 0 到 100"
+        )
+    try:
+        return (await _columns()).price_percentiles(percentiles)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"獲取價格百分位數失敗: {str(e)}"
+        )
+
+@router.get("/reorder")
+async def get_reorder_quantities(
+    limit: int = Query(100, ge=1, le=1000, description="列出的產品數量上限"),
+    category: Optional[str] = Query(None, description="只看指定類別")
+):
+    """補貨建議量（min_stock - stock），依缺口由大到小排序"""
+    try:
+        return (await _columns()).reorder_quantities(limit=limit, category=category)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"獲取補貨建議失敗: {str(e)}"
+        )
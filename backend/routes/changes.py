@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+from services.change_feed import change_feed
+from typing import Optional
+
+router = APIRouter(prefix="/products/changes", tags=["changes"])
+
+@router.get("")
+async def get_product_changes(
+    since: Optional[str] = Query(None, description="上次取得的游標；未提供時只回傳目前游標"),
+    limit: int = Query(500, ge=1, le=5000, description="每次最多回傳的變更筆數")
+):
+    """取得游標之後的產品變更；reset 為 true 時需重新載入完整列表"""
+    changes, cursor, reset = change_feed.since(since, limit)
+    return {
+        "changes": changes,
+        "cursor": cursor,
+        "reset": reset,
+        "hasMore": not reset and cursor != change_feed.cursor(),
+    }
+
+@router.get("/stream")
+async def stream_product_changes(
+    since: Optional[str] = Query(None, description="從此游標之後開始推送"),
+    last_event_id: Optional[str] = Header(None)
+):
+    """以 SSE 推送產品變更（斷線重連時依 Last-Event-ID 補送）"""
+    cursor = last_event_id or since
+    return StreamingResponse(
+        change_feed.broadcaster.stream(
+            initial=lambda: change_feed.catch_up_events(cursor),
+            resync=lambda: change_feed.catch_up_events(None)
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
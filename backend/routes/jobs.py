@@ -0,0 +1,210 @@
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from bson.raw_bson import RawBSONDocument
+from collections import deque
+from datetime import datetime
+from models.product import Product
+from routes.analytics import DEFAULT_PERCENTILES
+from routes.products import product_cache
+from services import product_events
+from services.analytics import analytics_engine, inventory_report, numpy_available
+from services.inventory_summary import incremental_enabled, rebuild_summary
+from services.jobs import Job, JobQueueFullError, job_runner
+from services.product_io import bulk_upsert_products, iter_csv_rows, iter_ndjson_rows, validate_rows
+from services.seed_data import (
+    CHUNK_SIZE, DEFAULT_BATCH_SIZE, MAX_SEED_COUNT, chunk_count, encode_product_chunks, random_seed
+)
+from typing import List, Optional
+import asyncio
+import os
+import tempfile
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+# 種子工作預先送到行程池的批次數（產生與寫入重疊）
+SEED_PREFETCH = 4
+# 匯入工作每次從暫存檔讀取的位元組數
+IMPORT_READ_SIZE = 1 << 20
+
+def _submit(kind: str, body, params: dict, cleanup=None) -> dict:
+    try:
+        return job_runner.submit(kind, body, params, cleanup).to_dict()
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=f"工作排隊已滿，請稍後再試: {str(e)}")
+
+async def _after_bulk_write(collection, updated: bool):
+    """大量寫入後：清除快取、重算摘要並通知訂閱者重新載入"""
+    if updated:
+        await product_cache.clear()
+    if incremental_enabled():
+        await rebuild_summary(collection)
+    await product_events.publish("reset")
+
+async def _insert_raw(collection, documents: List[bytes]) -> int:
+    await collection.insert_many([RawBSONDocument(document) for document in documents], ordered=False)
+    return len(documents)
+
+async def _seed_products(job: Job, count: int, seed: int, batch: int) -> dict:
+    """在行程池中產生並編碼產品批次，主行程只負責寫入
+
+    取消時已寫入的批次不會回復（集合中會留下部分資料）。
+    """
+    collection = Product.get_motor_collection()
+    job.progress(0, count)
+    now = datetime.now()
+    chunks = chunk_count(count)
+    per_task = max(1, batch // CHUNK_SIZE)
+    pending = deque()
+    inserted = 0
+    try:
+        await collection.delete_many({})
+        for first in range(0, chunks, per_task):
+            last = min(first + per_task, chunks)
+            pending.append(asyncio.ensure_future(job.run_cpu(encode_product_chunks, count, seed, first, last, now)))
+            if len(pending) > SEED_PREFETCH:
+                inserted += await _insert_raw(collection, await pending.popleft())
+                job.progress(inserted)
+        while pending:
+            inserted += await _insert_raw(collection, await pending.popleft())
+            job.progress(inserted)
+    finally:
+        for future in pending:
+            future.cancel()
+        await _after_bulk_write(collection, True)
+    return {"count": inserted, "seed": seed}
+
+async def _read_file(job: Job, path: str):
+    """以執行緒讀取暫存檔，進度以已讀取的位元組數表示"""
+    total = os.path.getsize(path)
+    done = 0
+    job.progress(0, total)
+    with open(path, "rb") as file:
+        while True:
+            chunk = await asyncio.to_thread(file.read, IMPORT_READ_SIZE)
+            if not chunk:
+                break
+            done += len(chunk)
+            job.progress(done)
+            yield chunk
+
+async def _import_products(job: Job, path: str, format: str, chunk_size: int) -> dict:
+    """逐行解析暫存檔，驗證交給行程池，寫入方式與 /products/bulk 相同（暫存檔由工作的 cleanup 刪除）"""
+    chunks = _read_file(job, path)
+    rows = iter_csv_rows(chunks) if format == "csv" else iter_ndjson_rows(chunks)
+    collection = Product.get_motor_collection()
+    result = await bulk_upsert_products(
+        collection, rows, chunk_size=chunk_size,
+        validate=lambda chunk: job.run_cpu(validate_rows, chunk)
+    )
+    if result.inserted or result.updated:
+        await _after_bulk_write(collection, bool(result.updated))
+    return result.to_dict()
+
+def _remove_spool(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+async def _inventory_report(job: Job, percentiles: List[float], reorder_limit: int) -> dict:
+    """從分析欄位資料取快照，在行程池中計算完整報表"""
+    columns = await analytics_engine.get(Product.get_motor_collection())
+    job.progress(0, columns.size)
+    report = await job.run_cpu(inventory_report, columns.snapshot(), percentiles, reorder_limit)
+    job.progress(columns.size)
+    return report
+
+@router.post("/products/seed", status_code=status.HTTP_202_ACCEPTED)
+async def submit_seed_products(
+    count: int = Query(100, ge=1, le=MAX_SEED_COUNT, description="產品數"),
+    seed: Optional[int] = Query(None, description="亂數種子；未指定時隨機並記錄在工作參數中"),
+    batch: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=100000, description=f"每批寫入筆數（以 {CHUNK_SIZE} 筆區塊為單位）"),
+):
+    """以背景工作清空並重新生成測試產品（立即回傳工作，以 GET /jobs/{id} 查詢進度）"""
+    seed = random_seed() if seed is None else seed
+    return _submit(
+        "seed",
+        lambda job: _seed_products(job, count, seed, batch),
+        {"count": count, "seed": seed, "batch": batch}
+    )
+
+@router.post("/products/import", status_code=status.HTTP_202_ACCEPTED)
+async def submit_import_products(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="ndjson 或 csv，未指定時依 Content-Type 判斷"),
+    chunk_size: int = Query(1000, ge=1, le=10000, description="每批驗證與寫入的筆數"),
+):
+    """以背景工作批量匯入產品：請求本文先寫入暫存檔，回應後才開始解析與寫入"""
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson"
+    try:
+        job_runner.check_capacity("import")
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=f"工作排隊已滿，請稍後再試: {str(e)}")
+
+    spool = tempfile.NamedTemporaryFile(prefix="product-import-", suffix=f".{format}", delete=False)
+    try:
+        with spool:
+            # 寫檔交給執行緒，磁碟較慢時不阻塞事件迴圈
+            async for chunk in request.stream():
+                await asyncio.to_thread(spool.write, chunk)
+        return _submit(
+            "import",
+            lambda job: _import_products(job, spool.name, format, chunk_size),
+            {"format": format, "chunkSize": chunk_size, "bytes": os.path.getsize(spool.name)},
+            cleanup=lambda: _remove_spool(spool.name)
+        )
+    except BaseException:
+        # 上傳中斷（ClientDisconnect、取消）或無法送出工作時刪除暫存檔；送出後由工作結束（含取消）時的 cleanup 刪除
+        os.remove(spool.name)
+        raise
+
+@router.post("/reports/inventory", status_code=status.HTTP_202_ACCEPTED)
+async def submit_inventory_report(
+    p: Optional[List[float]] = Query(None, description="價格百分位數（0-100），可重複指定"),
+    reorder_limit: int = Query(1000, ge=1, le=100000, description="補貨建議列出的產品數量上限"),
+):
+    """以背景工作產生完整庫存報表（價值矩陣、缺貨風險、價格百分位數、補貨建議）"""
+    if not numpy_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="分析功能需要安裝 numpy"
+        )
+    percentiles = p or DEFAULT_PERCENTILES
+    if any(value < 0 or value > 100 for value in percentiles):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="百分位數必須介於 0 到 100"
+        )
+    return _submit(
+        "report",
+        lambda job: _inventory_report(job, percentiles, reorder_limit),
+        {"percentiles": percentiles, "reorderLimit": reorder_limit}
+    )
+
+@router.get("")
+async def list_jobs(
+    type: Optional[str] = Query(None, pattern="^(seed|import|report)$"),
+    status_filter: Optional[str] = Query(None, alias="status", pattern="^(queued|running|succeeded|failed|cancelled)$"),
+):
+    """列出背景工作（新到舊，不含工作結果）"""
+    return [
+        {**job.to_dict(), "result": None}
+        for job in job_runner.list(kind=type, status=status_filter)
+    ]
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """查詢工作狀態、進度與結果"""
+    job = job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="工作不存在")
+    return job.to_dict()
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """取消排隊中或執行中的工作（已寫入的資料不會回復）"""
+    job = job_runner.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="工作不存在")
+    return job.to_dict()
@@ -0,0 +1,87 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from typing import Any, Dict, Optional
+from services.json_response import FastJSONResponse
+from services.http_cache import cache_headers, etag_matches, not_modified
+from services.memory_store import ProductStore
+from services.seed_data import MAX_SYNC_SEED_COUNT, iter_products, random_seed
+
+# 記憶體後端的產品路由（STORAGE_BACKEND=memory）
+router = APIRouter(prefix="/products", tags=["products"])
+
+# 記憶體資料庫（主索引、次索引、統計與搜尋索引皆由 ProductStore 維護）
+store = ProductStore()
+
+@router.get("/")
+async def get_all_products(
+    category: Optional[str] = None,
+    supplier: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    """獲取所有產品（可依類別/供應商篩選；未變更時回傳 304）"""
+    etag = store.etag()
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return FastJSONResponse(store.list(category=category, supplier=supplier), headers=cache_headers(etag))
+
+@router.get("/search")
+async def search_products(q: str, limit: int = 20, prefix: bool = True):
+    """搜尋產品（倒排索引，支援中文二元組與前綴比對）"""
+    return FastJSONResponse(store.search(q, limit=limit, prefix=prefix))
+
+@router.get("/{product_id}")
+async def get_product(product_id: str):
+    """根據 ID 獲取產品"""
+    product = store.get(product_id)
+    if product is None:
+        raise HTTPException(status_code=404, detail="產品不存在")
+    return product
+
+@router.post("/")
+async def create_product(product_data: Dict[str, Any]):
+    """創建新產品"""
+    return store.create(product_data)
+
+@router.put("/{product_id}")
+async def update_product(product_id: str, product_data: Dict[str, Any]):
+    """更新產品"""
+    product = store.update(product_id, product_data)
+    if product is None:
+        raise HTTPException(status_code=404, detail="產品不存在")
+    return product
+
+@router.delete("/{product_id}")
+async def delete_product(product_id: str):
+    """刪除產品"""
+    if not store.delete(product_id):
+        raise HTTPException(status_code=404, detail="產品不存在")
+    return {"message": "產品刪除成功"}
+
+@router.get("/stats/inventory")
+async def get_inventory_stats(if_none_match: Optional[str] = Header(None)):
+    """獲取庫存統計（讀取遞增維護的計數器；未變更時回傳 304）"""
+    etag = store.etag()
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return FastJSONResponse(store.stats(), headers=cache_headers(etag))
+
+@router.post("/seed")
+async def seed_products(
+    count: int = Query(100, ge=1, le=MAX_SYNC_SEED_COUNT, description="產品數"),
+    seed: Optional[int] = Query(None, description="亂數種子，相同種子產生相同資料；未指定時隨機並回傳"),
+):
+    """生成測試產品數據"""
+    seed = random_seed() if seed is None else seed
+    store.clear()  # 清空現有數據
+    
+    for product in iter_products(count, seed):
+        store.create({
+            "name": product["name"],
+            "description": product["description"],
+            "category": product["category"],
+            "price": product["price"],
+            "stock": product["stock"],
+            "minStock": product["min_stock"],
+            "supplier": product["supplier"]
+        })
+    
+    return {"message": f"成功生成 {len(store)} 個產品數據", "count": len(store), "seed": seed}
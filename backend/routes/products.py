@@ -1,33 +1,213 @@
-from fastapi import APIRouter, HTTPException, status
-from models.product import Product
-from typing import List, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from models.product import Product, ProductUpdate, StockAdjust, StockReserve, StockReserveBatch
+from services.cache import create_cache
+from services import product_events
+from services.change_feed import change_feed
+from services.inventory_stats import compute_inventory_stats
+from services.inventory_summary import (
+    apply_product_change, incremental_enabled, read_summary, rebuild_summary
+)
+from services.stock_ledger import (
+    DEFAULT_SPANS, GRANULARITIES, MAX_HISTORY_BUCKETS, bucket_count, category_movements, product_history, record_stock_change
+)
+from services.stock import InsufficientStockError, adjust_stock, reserve_batch, reserve_stock
+from services.product_update import PreconditionFailedError, parse_if_match, product_etag, update_product_fields
+from services.json_response import FastJSONResponse, stream_json_array
+from services.http_cache import bump_version, cache_headers, collection_etag, etag_matches, not_modified
+from services.product_io import bulk_upsert_products, iter_csv_rows, iter_ndjson_rows, stream_csv, stream_ndjson
+from services.seed_data import DEFAULT_BATCH_SIZE, MAX_SYNC_SEED_COUNT, random_seed, seed_products as seed_product_data
+from services.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, combine_filters, encode_cursor,
+    keyset_filter, parse_fields, parse_sort, sort_spec
+)
+from bson import ObjectId
 from datetime import datetime
-import random
+from pymongo import DESCENDING
+from pymongo.errors import DuplicateKeyError
+from typing import Any, Dict, List, Optional
+import re
+import time
 
 router = APIRouter(prefix="/products", tags=["products"])
 
-@router.get("/", response_model=List[Product])
-async def get_all_products():
-    """獲取所有產品"""
+# 依 ID 查詢產品的讀穿快取
+product_cache = create_cache(
+    "products",
+    encode=lambda product: product.model_dump(mode="json"),
+    decode=lambda data: Product.model_validate(data)
+)
+
+async def prime_product_cache(limit: int) -> int:
+    """預先載入最近更新的產品（走 updated_at_id 索引），回傳載入筆數"""
+    products = await Product.find_all().sort(sort_spec("updated_at", DESCENDING)).limit(limit).to_list()
+    return await product_cache.prime({str(product.id): product for product in products})
+
+async def _bump_products_version(op: str, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+    """任何產品變更後遞增集合版本，讓列表與統計的 ETag 失效"""
+    await bump_version(Product.get_motor_collection())
+
+product_events.subscribe(_bump_products_version)
+
+async def _invalidate_from_feed(op: str, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+    """change stream 或版本輪詢帶來的其他 worker 寫入：讓本行程的快取失效（共用的 Redis 已由寫入端處理）"""
+    if not product_cache.process_local:
+        return
+    if op == "reset":
+        await product_cache.clear()
+        return
+    document = after if after is not None else before
+    await product_cache.invalidate(str(document["_id"]))
+
+change_feed.subscribe(_invalidate_from_feed)
+
+# 可排序與可投影的欄位
+PRODUCT_SORT_FIELDS = ["_id", "updated_at", "created_at", "price", "stock", "name"]
+PRODUCT_FIELDS = [
+    "name", "description", "category", "price", "stock",
+    "min_stock", "supplier", "created_at", "updated_at"
+]
+
+def build_product_filter(
+    category: Optional[str] = None,
+    supplier: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    low_stock: bool = False,
+) -> Dict[str, Any]:
+    """組合產品查詢條件"""
+    query: Dict[str, Any] = {}
+    if category:
+        query["category"] = category
+    if supplier:
+        query["supplier"] = supplier
+    if min_price is not None or max_price is not None:
+        query["price"] = {}
+        if min_price is not None:
+            query["price"]["$gte"] = min_price
+        if max_price is not None:
+            query["price"]["$lte"] = max_price
+    if low_stock:
+        query["$expr"] = {"$lte": ["$stock", "$min_stock"]}
+    return query
+
+@router.get("/", response_model=List[Dict[str, Any]])
+async def get_all_products(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="每頁筆數"),
+    cursor: Optional[str] = Query(None, description="上一頁回傳的 X-Next-Cursor"),
+    category: Optional[str] = Query(None, description="依類別篩選"),
+    supplier: Optional[str] = Query(None, description="依供應商篩選"),
+    min_price: Optional[float] = Query(None, ge=0, description="最低價格"),
+    max_price: Optional[float] = Query(None, ge=0, description="最高價格"),
+    low_stock: bool = Query(False, description="僅顯示庫存不足的產品"),
+    sort: str = Query("_id", description="排序欄位，前綴 - 表示遞減，例如 -updated_at"),
+    fields: Optional[str] = Query(None, description="以逗號分隔的回傳欄位，例如 name,price,stock"),
+    if_none_match: Optional[str] = Header(None),
+):
+    """分頁獲取產品（keyset 游標分頁，下一頁游標放在 X-Next-Cursor 標頭；產品未變更時回傳 304）"""
+    try:
+        sort_field, direction = parse_sort(sort, PRODUCT_SORT_FIELDS)
+        projection = parse_fields(fields, PRODUCT_FIELDS)
+        query = combine_filters(
+            build_product_filter(category, supplier, min_price, max_price, low_stock),
+            keyset_filter(cursor, sort_field, direction),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
     try:
-        products = await Product.find_all().to_list()
-        return products
+        if projection is not None:
+            # 游標需要排序欄位的值
+            projection[sort_field] = 1
+        collection = Product.get_motor_collection()
+        etag = await collection_etag(collection)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        documents = await collection.find(query, projection) \
+            .sort(sort_spec(sort_field, direction)) \
+            .limit(limit + 1) \
+            .to_list(length=limit + 1)
+
+        headers = cache_headers(etag)
+        if len(documents) > limit:
+            documents = documents[:limit]
+            headers["X-Next-Cursor"] = encode_cursor(documents[-1], sort_field)
+
+        # 直接序列化驅動回傳的文件（_id 由 dumps 轉為字串），略過 response_model 驗證
+        return FastJSONResponse(documents, headers=headers)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"獲取產品列表失敗: {str(e)}"
         )
 
+@router.get("/search", response_model=List[Dict[str, Any]])
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=100, description="搜尋關鍵字"),
+    limit: int = Query(20, ge=1, le=100, description="回傳筆數"),
+    prefix: bool = Query(False, description="以產品名稱前綴比對（typeahead）"),
+):
+    """搜尋產品：全文索引依 textScore 排序，或以名稱前綴比對"""
+    try:
+        collection = Product.get_motor_collection()
+        if prefix:
+            # 錨定開頭且區分大小寫的 regex 可使用 name 索引
+            cursor = collection.find({"name": {"$regex": f"^{re.escape(q)}"}}).sort("name", 1)
+        else:
+            cursor = collection.find(
+                {"$text": {"$search": q}},
+                {"score": {"$meta": "textScore"}}
+            ).sort([("score", {"$meta": "textScore"})])
+        documents = await cursor.limit(limit).to_list(length=limit)
+        return FastJSONResponse(documents)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"搜尋產品失敗: {str(e)}"
+        )
+
+@router.get("/export")
+async def export_products(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|json)$", description="匯出格式：ndjson、csv 或 json（陣列）"),
+    category: Optional[str] = Query(None, description="依類別篩選"),
+    supplier: Optional[str] = Query(None, description="依供應商篩選"),
+    low_stock: bool = Query(False, description="僅匯出庫存不足的產品"),
+):
+    """以串流方式匯出產品，不在記憶體中緩衝整個目錄"""
+    query = build_product_filter(category, supplier, low_stock=low_stock)
+    cursor = Product.get_motor_collection().find(query).sort("_id", 1).batch_size(1000)
+    if format == "csv":
+        return StreamingResponse(
+            stream_csv(cursor),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": "attachment; filename=products.csv"}
+        )
+    if format == "json":
+        return StreamingResponse(
+            stream_json_array(cursor),
+            media_type="application/json",
+            headers={"Content-Disposition": "attachment; filename=products.json"}
+        )
+    return StreamingResponse(
+        stream_ndjson(cursor),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=products.ndjson"}
+    )
+
 @router.get("/{product_id}", response_model=Product)
-async def get_product(product_id: str):
-    """根據 ID 獲取產品"""
+async def get_product(product_id: str, response: Response):
+    """根據 ID 獲取產品（ETag 可作為更新時的 If-Match）"""
     try:
-        product = await Product.get(product_id)
+        product = await product_cache.get_or_load(product_id, lambda: Product.get(product_id))
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="產品不存在"
             )
+        response.headers["ETag"] = product_etag(product.updated_at)
         return product
     except Exception as e:
         if "產品不存在" in str(e):
@@ -43,42 +223,105 @@ async def create_product(product_data: dict):
     try:
         product = Product(**product_data)
         await product.insert()
+        await apply_product_change(Product.get_motor_collection(), None, product)
+        await record_stock_change(Product.get_motor_collection(), None, product, "create")
+        await product_events.publish("create", None, product)
         return product
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="同一供應商已有相同名稱的產品"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"創建產品失敗: {str(e)}"
         )
 
-@router.put("/{product_id}", response_model=Product)
-async def update_product(product_id: str, product_data: dict):
-    """更新產品"""
+@router.post("/bulk")
+async def bulk_import_products(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="ndjson 或 csv，未指定時依 Content-Type 判斷"),
+    chunk_size: int = Query(1000, ge=1, le=10000, description="每批驗證與寫入的筆數"),
+):
+    """批量匯入產品（串流 NDJSON/CSV，依 name + supplier upsert，逐列回報錯誤）"""
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson"
+    rows = iter_csv_rows(request.stream()) if format == "csv" else iter_ndjson_rows(request.stream())
+    
     try:
-        product = await Product.get(product_id)
-        if not product:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="產品不存在"
-            )
-        
-        # 更新時間
-        product_data["updated_at"] = datetime.now()
-        
-        # 更新產品資料
-        for key, value in product_data.items():
-            if hasattr(product, key):
-                setattr(product, key, value)
-        
-        await product.save()
+        collection = Product.get_motor_collection()
+        result = await bulk_upsert_products(collection, rows, chunk_size=chunk_size)
+        if result.updated:
+            await product_cache.clear()
+        # upsert 無法得知變更前狀態，直接重算摘要
+        if incremental_enabled() and (result.inserted or result.updated):
+            await rebuild_summary(collection)
+        if result.inserted or result.updated:
+            await product_events.publish("reset")
+        return result.to_dict()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"批量匯入失敗: {str(e)}"
+        )
+
+async def _update_product(product_id: str, update: ProductUpdate, response: Response, if_match: Optional[str]):
+    """只 $set 有提供的欄位；帶 If-Match 時以 updated_at 做樂觀鎖"""
+    try:
+        fields = update.model_dump(exclude_unset=True)
+        before, after = await update_product_fields(
+            Product.get_motor_collection(), product_id, fields, parse_if_match(if_match)
+        )
+        product = Product.model_validate(after)
+        await product_cache.invalidate(product_id)
+        await apply_product_change(Product.get_motor_collection(), before, after)
+        await record_stock_change(Product.get_motor_collection(), before, after, "update")
+        await product_events.publish("update", before, after)
+        response.headers["ETag"] = product_etag(product.updated_at)
         return product
+    except PreconditionFailedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=str(e)
+        )
+    except LookupError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="產品不存在"
+        )
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="同一供應商已有相同名稱的產品"
+        )
     except Exception as e:
-        if "產品不存在" in str(e):
-            raise e
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"更新產品失敗: {str(e)}"
         )
 
+@router.put("/{product_id}", response_model=Product)
+async def update_product(
+    product_id: str,
+    product_data: ProductUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None)
+):
+    """更新產品（與 PATCH 相同，只更新有提供的欄位）"""
+    return await _update_product(product_id, product_data, response, if_match)
+
+@router.patch("/{product_id}", response_model=Product)
+async def patch_product(
+    product_id: str,
+    product_data: ProductUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None)
+):
+    """部分更新產品；帶 If-Match 時版本不符回傳 412"""
+    return await _update_product(product_id, product_data, response, if_match)
+
 @router.delete("/{product_id}")
 async def delete_product(product_id: str):
     """刪除產品"""
@@ -91,6 +334,10 @@ async def delete_product(product_id: str):
             )
         
         await product.delete()
+        await product_cache.invalidate(product_id)
+        await apply_product_change(Product.get_motor_collection(), product, None)
+        await record_stock_change(Product.get_motor_collection(), product, None, "delete")
+        await product_events.publish("delete", product, None)
         return {"message": "產品刪除成功"}
     except Exception as e:
         if "產品不存在" in str(e):
@@ -100,99 +347,180 @@ async def delete_product(product_id: str):
             detail=f"刪除產品失敗: {str(e)}"
         )
 
+async def _apply_stock_changes(changes, reason: str):
+    """庫存異動後同步快取、統計摘要、異動紀錄與變更事件"""
+    collection = Product.get_motor_collection()
+    for before, after in changes:
+        await product_cache.invalidate(str(after["_id"]))
+        await apply_product_change(collection, before, after)
+        await record_stock_change(collection, before, after, reason)
+        await product_events.publish("update", before, after)
+
+async def _apply_compensated_changes(changes):
+    """補償式回滾後：庫存淨變動為 0（不記錄異動），但文件已改寫，仍需讓快取與 ETag 失效並通知訂閱者"""
+    collection = Product.get_motor_collection()
+    for before, after in changes:
+        await product_cache.invalidate(str(after["_id"]))
+        await apply_product_change(collection, before, after)
+        await product_events.publish("update", before, after)
+
+def _stock_error(e: Exception) -> HTTPException:
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, InsufficientStockError):
+        return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    if isinstance(e, LookupError):
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="產品不存在")
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"庫存異動失敗: {str(e)}"
+    )
+
+@router.post("/stock/reserve")
+async def reserve_product_stock_batch(request: StockReserveBatch):
+    """一次預留多個產品的庫存（全部成功或全部不變）"""
+    try:
+        changes = await reserve_batch(
+            Product.get_motor_collection(),
+            [item.model_dump() for item in request.items],
+            on_compensated=_apply_compensated_changes
+        )
+        await _apply_stock_changes(changes, "reserve")
+        return {"items": [{"product_id": str(after["_id"]), "stock": after["stock"]} for _, after in changes]}
+    except Exception as e:
+        raise _stock_error(e)
+
+@router.post("/{product_id}/stock/adjust", response_model=Product)
+async def adjust_product_stock(product_id: str, request: StockAdjust):
+    """原子地調整庫存（出庫時庫存不足回傳 409）"""
+    try:
+        before, after = await adjust_stock(Product.get_motor_collection(), product_id, request.delta)
+        await _apply_stock_changes([(before, after)], "adjust")
+        return Product.model_validate(after)
+    except Exception as e:
+        raise _stock_error(e)
+
+@router.post("/{product_id}/stock/reserve", response_model=Product)
+async def reserve_product_stock(product_id: str, request: StockReserve):
+    """原子地預留庫存（stock >= quantity 時才扣減）"""
+    try:
+        before, after = await reserve_stock(Product.get_motor_collection(), product_id, request.quantity)
+        await _apply_stock_changes([(before, after)], "reserve")
+        return Product.model_validate(after)
+    except Exception as e:
+        raise _stock_error(e)
+
 @router.get("/stats/inventory")
-async def get_inventory_stats():
-    """獲取庫存統計"""
+async def get_inventory_stats(if_none_match: Optional[str] = Header(None)):
+    """獲取庫存統計（預設由聚合管線計算，遞增模式下直接讀取摘要文件；產品未變更時回傳 304）"""
     try:
-        products = await Product.find_all().to_list()
-        
-        total_products = len(products)
-        total_value = sum(p.price * p.stock for p in products)
-        low_stock_count = sum(1 for p in products if p.stock <= p.min_stock)
-        categories = list(set(p.category for p in products))
-        
-        return {
-            "totalProducts": total_products,
-            "totalValue": total_value,
-            "lowStockCount": low_stock_count,
-            "categories": categories
-        }
+        collection = Product.get_motor_collection()
+        etag = await collection_etag(collection)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        if incremental_enabled():
+            stats = await read_summary(collection)
+        else:
+            stats = await compute_inventory_stats(collection)
+        return FastJSONResponse(stats, headers=cache_headers(etag))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"獲取統計數據失敗: {str(e)}"
         )
 
+@router.post("/stats/inventory/reconcile")
+async def reconcile_inventory_stats():
+    """立即重算庫存摘要並回報偏差"""
+    try:
+        drift = await rebuild_summary(Product.get_motor_collection())
+        return {"drift": drift}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"對帳失敗: {str(e)}"
+        )
+
+def _history_range(granularity: str, start: Optional[datetime], end: Optional[datetime]):
+    """補上預設範圍（帶時區的時間轉為本地時間，與寫入時的 datetime.now() 一致）並限制桶數"""
+    end = end or datetime.now()
+    if end.tzinfo is not None:
+        end = end.astimezone().replace(tzinfo=None)
+    start = start or end - DEFAULT_SPANS[granularity]
+    if start.tzinfo is not None:
+        start = start.astimezone().replace(tzinfo=None)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="from 不可晚於 to")
+    if bucket_count(start, end, granularity) > MAX_HISTORY_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"時間範圍過大：最多 {MAX_HISTORY_BUCKETS} 個 {granularity} 區間"
+        )
+    return start, end
+
+@router.get("/stats/movements")
+async def get_stock_movements(
+    granularity: str = Query("day", pattern=f"^({'|'.join(GRANULARITIES)})$"),
+    start: Optional[datetime] = Query(None, alias="from", description="起始時間（ISO 8601），預設依粒度往前 48 小時/30 天/一年"),
+    end: Optional[datetime] = Query(None, alias="to", description="結束時間（ISO 8601），預設為現在"),
+    category: Optional[str] = Query(None, description="只看指定類別")
+):
+    """各類別每小時/每日/每月的進出貨量（讀取預先彙總的桶）"""
+    start, end = _history_range(granularity, start, end)
+    try:
+        return await category_movements(Product.get_motor_collection(), granularity, start, end, category)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"獲取庫存異動失敗: {str(e)}"
+        )
+
+@router.get("/{product_id}/history")
+async def get_product_history(
+    product_id: str,
+    granularity: str = Query("day", pattern=f"^({'|'.join(GRANULARITIES)})$"),
+    start: Optional[datetime] = Query(None, alias="from", description="起始時間（ISO 8601），預設依粒度往前 48 小時/30 天/一年"),
+    end: Optional[datetime] = Query(None, alias="to", description="結束時間（ISO 8601），預設為現在"),
+):
+    """單一產品的庫存異動歷史（每個區間的進貨、出貨、淨變動與期末庫存）"""
+    if not ObjectId.is_valid(product_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="產品不存在")
+    start, end = _history_range(granularity, start, end)
+    try:
+        history = await product_history(Product.get_motor_collection(), product_id, granularity, start, end)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"獲取庫存歷史失敗: {str(e)}"
+        )
+    # 已刪除的產品仍保留歷史；從未有過紀錄時才視為不存在
+    if not history["exists"] and not history["buckets"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="產品不存在")
+    return history
+
 @router.post("/seed")
-async def seed_products():
-    """生成100個測試產品數據"""
+async def seed_products(
+    count: int = Query(100, ge=1, le=MAX_SYNC_SEED_COUNT, description="產品數（更多請改用 POST /api/jobs/products/seed）"),
+    seed: Optional[int] = Query(None, description="亂數種子，相同種子產生相同資料；未指定時隨機並回傳"),
+    batch: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=100000, description="每批寫入筆數"),
+):
+    """生成少量測試產品數據；大量資料請改用背景工作 POST /api/jobs/products/seed"""
+    seed = random_seed() if seed is None else seed
     try:
-        # 清空現有產品
-        await Product.find_all().delete()
+        collection = Product.get_motor_collection()
+        start = time.perf_counter()
+        inserted = await seed_product_data(collection, count, seed, batch_size=batch)
+        await product_cache.clear()
+        if incremental_enabled():
+            await rebuild_summary(collection)
+        await product_events.publish("reset")
         
-        # 產品類別和供應商
-        categories = ["手機", "筆記型電腦", "平板電腦", "耳機", "充電器", "保護套", "螢幕", "鍵盤", "滑鼠", "攝影機"]
-        suppliers = ["Apple Taiwan", "Samsung", "華碩", "宏碁", "微星", "技嘉", "聯想", "戴爾", "HP", "小米"]
-        
-        # 生成產品名稱模板
-        product_names = {
-            "手機": ["iPhone 15", "Galaxy S24", "Pixel 8", "小米 14", "OPPO Find X7"],
-            "筆記型電腦": ["MacBook Air", "ThinkPad X1", "ZenBook", "Aspire 5", "Legion"],
-            "平板電腦": ["iPad Pro", "Galaxy Tab", "Surface Pro", "MatePad", "小米平板"],
-            "耳機": ["AirPods", "Galaxy Buds", "WH-1000XM5", "FreeBuds", "小米耳機"],
-            "充電器": ["MagSafe", "無線充電器", "快充頭", "行動電源", "車充"],
-            "保護套": ["手機殼", "筆電包", "平板套", "螢幕保護貼", "鍵盤膜"],
-            "螢幕": ["4K 顯示器", "曲面螢幕", "電競螢幕", "便攜螢幕", "觸控螢幕"],
-            "鍵盤": ["機械鍵盤", "無線鍵盤", "藍牙鍵盤", "電競鍵盤", "薄膜鍵盤"],
-            "滑鼠": ["電競滑鼠", "無線滑鼠", "藍牙滑鼠", "軌跡球", "觸控板"],
-            "攝影機": ["網路攝影機", "行車記錄器", "運動攝影機", "監控鏡頭", "直播攝影機"]
+        return {
+            "message": f"成功生成 {inserted} 個產品數據",
+            "count": inserted,
+            "seed": seed,
+            "seconds": round(time.perf_counter() - start, 3)
         }
-        
-        products = []
-        for i in range(100):
-            category = random.choice(categories)
-            supplier = random.choice(suppliers)
-            base_name = random.choice(product_names[category])
-            
-            # 添加版本或型號
-            versions = ["Pro", "Max", "Plus", "Ultra", "Mini", "Lite", "SE", ""]
-            version = random.choice(versions)
-            name = f"{base_name} {version}".strip()
-            
-            # 根據類別設定價格範圍
-            price_ranges = {
-                "手機": (8000, 50000),
-                "筆記型電腦": (15000, 80000),
-                "平板電腦": (8000, 35000),
-                "耳機": (500, 15000),
-                "充電器": (200, 3000),
-                "保護套": (100, 2000),
-                "螢幕": (5000, 40000),
-                "鍵盤": (500, 8000),
-                "滑鼠": (300, 5000),
-                "攝影機": (1000, 20000)
-            }
-            
-            min_price, max_price = price_ranges.get(category, (500, 10000))
-            price = random.randint(min_price, max_price)
-            stock = random.randint(0, 100)
-            min_stock = random.randint(5, 20)
-            
-            product = Product(
-                name=name,
-                description=f"高品質的{category}產品，適合各種使用場景",
-                category=category,
-                price=float(price),
-                stock=stock,
-                min_stock=min_stock,
-                supplier=supplier
-            )
-            products.append(product)
-        
-        # 批量插入產品
-        await Product.insert_many(products)
-        
-        return {"message": f"成功生成 {len(products)} 個產品數據"}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from models.product import Product
+from services.replenishment import REPLENISH_TARGET_MULTIPLIER, plan_orders, save_draft_orders, stream_plan
+from typing import Optional
+
+router = APIRouter(prefix="/replenishment", tags=["replenishment"])
+
+def _policy(multiplier: float, minimum: int, category: Optional[str], supplier: Optional[str]) -> dict:
+    return {"targetMultiplier": multiplier, "minimumQuantity": minimum, "category": category, "supplier": supplier}
+
+@router.get("/plan")
+async def get_replenishment_plan(
+    multiplier: float = Query(REPLENISH_TARGET_MULTIPLIER, ge=1, le=100, description="補到 min_stock × 倍數"),
+    minimum: int = Query(1, ge=1, le=100000, description="每項最少訂購數量"),
+    category: Optional[str] = Query(None, description="只規劃指定類別"),
+    supplier: Optional[str] = Query(None, description="只規劃指定供應商"),
+):
+    """依供應商分組的採購單草稿（串流 JSON，只讀取庫存不足的產品）"""
+    orders = plan_orders(Product.get_motor_collection(), multiplier, minimum, category, supplier)
+    return StreamingResponse(
+        stream_plan(orders, _policy(multiplier, minimum, category, supplier)),
+        media_type="application/json"
+    )
+
+@router.post("/plan")
+async def create_replenishment_plan(
+    multiplier: float = Query(REPLENISH_TARGET_MULTIPLIER, ge=1, le=100, description="補到 min_stock × 倍數"),
+    minimum: int = Query(1, ge=1, le=100000, description="每項最少訂購數量"),
+    category: Optional[str] = Query(None, description="只規劃指定類別"),
+    supplier: Optional[str] = Query(None, description="只規劃指定供應商"),
+):
+    """產生採購單草稿並寫入 purchase_orders，回傳 plan_id 與各供應商合計"""
+    try:
+        collection = Product.get_motor_collection()
+        orders = plan_orders(collection, multiplier, minimum, category, supplier)
+        return await save_draft_orders(collection, orders, _policy(multiplier, minimum, category, supplier))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"產生採購單失敗: {str(e)}"
+        )
@@ -1,10 +1,29 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
-from models.user import UserCreate, UserUpdate, UserResponse
-from services.user_service import user_service
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from models.user import (
+    UserCreate, UserUpdate, UserResponse,
+    UserBulkUpdateItem, UserBulkDelete, BulkUserResponse
+)
+from services.user_service import MAX_SEARCH_LIMIT, user_service
+from services.json_response import FastJSONResponse
+from services.http_cache import cache_headers, etag_matches, not_modified
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from services.seed_data import DEFAULT_BATCH_SIZE, MAX_SYNC_SEED_COUNT, random_seed
+import time
 
 router = APIRouter()
 
+# 單次批量操作的最大筆數
+MAX_BULK_USERS = 10000
+
+def _check_bulk_size(count: int):
+    if count > MAX_BULK_USERS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"單次批量操作最多 {MAX_BULK_USERS} 筆"
+        )
+
 @router.post("/users", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_user(user_data: UserCreate):
     """創建新用戶"""
@@ -22,18 +41,115 @@ async def create_user(user_data: UserCreate):
             detail=f"創建用戶失敗: {str(e)}"
         )
 
+@router.post("/users/bulk", response_model=BulkUserResponse)
+async def create_users_bulk(users: List[UserCreate]):
+    """批量創建用戶"""
+    _check_bulk_size(len(users))
+    try:
+        return await user_service.create_users_bulk(users)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"批量創建用戶失敗: {str(e)}"
+        )
+
+@router.put("/users/bulk", response_model=BulkUserResponse)
+async def update_users_bulk(items: List[UserBulkUpdateItem]):
+    """批量更新用戶"""
+    _check_bulk_size(len(items))
+    try:
+        return await user_service.update_users_bulk(items)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"批量更新用戶失敗: {str(e)}"
+        )
+
+@router.delete("/users/bulk", response_model=BulkUserResponse)
+async def delete_users_bulk(request: UserBulkDelete):
+    """批量刪除用戶"""
+    _check_bulk_size(len(request.ids))
+    try:
+        return await user_service.delete_users_bulk(request.ids)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"批量刪除用戶失敗: {str(e)}"
+        )
+
+@router.post("/users/seed")
+async def seed_users(
+    count: int = Query(100, ge=1, le=MAX_SYNC_SEED_COUNT, description="用戶數（更多請改用 python seed.py users）"),
+    seed: Optional[int] = Query(None, description="亂數種子，相同種子產生相同資料；未指定時隨機並回傳"),
+    batch: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=100000, description="每批寫入筆數"),
+):
+    """清空並生成測試用戶（郵箱為 user00000000@example.com 起的序號）"""
+    seed = random_seed() if seed is None else seed
+    try:
+        start = time.perf_counter()
+        inserted = await user_service.seed_users(count, seed, batch_size=batch)
+        return {
+            "message": f"成功生成 {inserted} 個用戶數據",
+            "count": inserted,
+            "seed": seed,
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"生成測試用戶失敗: {str(e)}"
+        )
+
 @router.get("/users", response_model=List[UserResponse])
-async def get_all_users():
-    """獲取所有用戶"""
+async def get_all_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="每頁筆數"),
+    cursor: Optional[str] = Query(None, description="上一頁回傳的 X-Next-Cursor"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """分頁獲取用戶（下一頁游標放在 X-Next-Cursor 標頭；用戶未變更時回傳 304）"""
     try:
-        users = await user_service.get_all_users()
-        return users
+        etag = await user_service.list_etag()
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        users, next_cursor = await user_service.get_all_users(limit=limit, cursor=cursor)
+        headers = cache_headers(etag)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return FastJSONResponse(users, headers=headers)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"獲取用戶列表失敗: {str(e)}"
         )
 
+@router.get("/users/export", response_model=List[UserResponse])
+async def export_users():
+    """以串流方式輸出所有用戶（JSON 陣列），不在記憶體中緩衝整個結果"""
+    return StreamingResponse(
+        user_service.export_users(),
+        media_type="application/json",
+        headers={"Content-Disposition": "attachment; filename=users.json"}
+    )
+
+@router.get("/users/search", response_model=List[UserResponse])
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=100, description="姓名或郵箱前綴（不分大小寫）"),
+    limit: int = Query(10, ge=1, le=MAX_SEARCH_LIMIT, description="最多回傳筆數"),
+):
+    """依姓名或郵箱前綴搜尋用戶（輸入提示用，姓名符合者在前）"""
+    try:
+        return FastJSONResponse(await user_service.search_users(q, limit))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"搜尋用戶失敗: {str(e)}"
+        )
+
 @router.get("/users/{user_id}", response_model=UserResponse)
 async def get_user(user_id: str):
     """根據 ID 獲取用戶"""
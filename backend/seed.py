@@ -0,0 +1,50 @@
+"""
+生成大量測試資料（產品/用戶）到 MongoDB，連線設定沿用 settings.py 的環境變數
+
+    cd backend
+    python seed.py products --count 1000000 --seed 42
+    python seed.py users --count 1000000 --seed 42 --batch 20000 --concurrency 8
+"""
+import argparse
+import asyncio
+import time
+from settings import Settings
+from database.client import create_motor_client
+from database.mongodb import ensure_user_indexes
+from services.http_cache import bump_version
+from services.inventory_summary import incremental_enabled, rebuild_summary
+from services.seed_data import DEFAULT_BATCH_SIZE, DEFAULT_CONCURRENCY, MAX_SEED_COUNT, seed_products, seed_users
+
+async def main():
+    parser = argparse.ArgumentParser(description="生成測試資料")
+    parser.add_argument("kind", choices=["products", "users"])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH_SIZE, help="每批寫入筆數")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="同時進行的批次寫入數")
+    args = parser.parse_args()
+    if not 1 <= args.count <= MAX_SEED_COUNT:
+        parser.error(f"--count 需介於 1 到 {MAX_SEED_COUNT}")
+
+    settings = Settings.from_env(metrics_enabled=False)
+    client = create_motor_client(settings)
+    try:
+        start = time.perf_counter()
+        if args.kind == "products":
+            collection = client[settings.database_name]["products"]
+            inserted = await seed_products(collection, args.count, args.seed, args.batch, args.concurrency)
+            if incremental_enabled():
+                await rebuild_summary(collection)
+        else:
+            collection = client[settings.users_database_name]["users"]
+            await ensure_user_indexes(collection.database)
+            inserted = await seed_users(collection, args.count, args.seed, args.batch, args.concurrency)
+        # 讓執行中應用程式先前發出的列表 ETag 失效
+        await bump_version(collection)
+        elapsed = time.perf_counter() - start
+        print(f"✅ 已寫入 {inserted} 筆 {args.kind}（seed={args.seed}）：{elapsed:.1f}s，{inserted / elapsed:,.0f} 筆/秒")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
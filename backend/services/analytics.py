@@ -0,0 +1,330 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+from services.change_feed import change_feed
+from services.lazy_import import optional_module
+
+# numpy 為選用相依套件，且匯入約需 0.1 秒：延遲到第一次使用時才載入
+np = optional_module("numpy")
+
+# 欄位資料最長保留秒數；不經由 API 的寫入（例如直接操作資料庫）要靠重新載入才看得到
+ANALYTICS_MAX_AGE = float(os.getenv("ANALYTICS_MAX_AGE", "300"))
+LOAD_BATCH_SIZE = 50000
+_PROJECTION = {"price": 1, "stock": 1, "min_stock": 1, "category": 1, "supplier": 1}
+
+# 缺貨風險分級：以 stock / min_stock 比例區分
+RISK_LEVELS = ["outOfStock", "critical", "low", "healthy", "overstocked"]
+
+def numpy_available() -> bool:
+    return np is not None
+
+class _Dictionary:
+    """字串 <-> 整數代碼，讓分組欄位可以直接用 bincount"""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def encode(self, name: Any) -> int:
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+class InventoryColumns:
+    """以 NumPy 欄位陣列保存產品數值欄位，所有報表皆為向量化運算"""
+
+    def __init__(self, capacity: int = 1024):
+        if np is None:
+            raise RuntimeError("分析功能需要安裝 numpy")
+        self.size = 0
+        self.price = np.zeros(capacity, dtype=np.float64)
+        self.stock = np.zeros(capacity, dtype=np.int64)
+        self.min_stock = np.zeros(capacity, dtype=np.int64)
+        self.category = np.zeros(capacity, dtype=np.int32)
+        self.supplier = np.zeros(capacity, dtype=np.int32)
+        self.ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.categories = _Dictionary()
+        self.suppliers = _Dictionary()
+
+    # ---- 維護 ----
+
+    def _columns(self):
+        return ("price", "stock", "min_stock", "category", "supplier")
+
+    def _ensure_capacity(self, needed: int):
+        capacity = len(self.price)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in self._columns():
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def append_batch(self, documents: List[Dict[str, Any]]):
+        """批次附加文件（載入時使用），一次寫入整段陣列"""
+        count = len(documents)
+        if not count:
+            return
+        self._ensure_capacity(self.size + count)
+        start, end = self.size, self.size + count
+        self.price[start:end] = [d.get("price") or 0 for d in documents]
+        self.stock[start:end] = [d.get("stock") or 0 for d in documents]
+        self.min_stock[start:end] = [d.get("min_stock") or 0 for d in documents]
+        self.category[start:end] = [self.categories.encode(d.get("category")) for d in documents]
+        self.supplier[start:end] = [self.suppliers.encode(d.get("supplier")) for d in documents]
+        for offset, document in enumerate(documents):
+            product_id = str(document["_id"])
+            self.row_of[product_id] = start + offset
+            self.ids.append(product_id)
+        self.size = end
+
+    def upsert(self, document: Dict[str, Any]):
+        """新增或更新單一產品"""
+        product_id = str(document["_id"])
+        row = self.row_of.get(product_id)
+        if row is None:
+            self.append_batch([document])
+            return
+        self.price[row] = document.get("price") or 0
+        self.stock[row] = document.get("stock") or 0
+        self.min_stock[row] = document.get("min_stock") or 0
+        self.category[row] = self.categories.encode(document.get("category"))
+        self.supplier[row] = self.suppliers.encode(document.get("supplier"))
+
+    def remove(self, product_id: str):
+        """刪除產品：以最後一列補位，維持陣列連續"""
+        row = self.row_of.pop(str(product_id), None)
+        if row is None:
+            return
+        last = self.size - 1
+        if row != last:
+            for name in self._columns():
+                column = getattr(self, name)
+                column[row] = column[last]
+            moved_id = self.ids[last]
+            self.ids[row] = moved_id
+            self.row_of[moved_id] = row
+        self.ids.pop()
+        self.size = last
+
+    def view(self, name: str):
+        return getattr(self, name)[:self.size]
+
+    def snapshot(self) -> "InventoryColumns":
+        """只含有效列的獨立複本（不含 row_of），送到其他行程計算報表時使用"""
+        snapshot = InventoryColumns(capacity=1)
+        snapshot.size = self.size
+        for name in self._columns():
+            setattr(snapshot, name, self.view(name).copy())
+        snapshot.ids = list(self.ids)
+        snapshot.categories.names = list(self.categories.names)
+        snapshot.categories.codes = dict(self.categories.codes)
+        snapshot.suppliers.names = list(self.suppliers.names)
+        snapshot.suppliers.codes = dict(self.suppliers.codes)
+        return snapshot
+
+    # ---- 報表 ----
+
+    def value_matrix(self) -> Dict[str, Any]:
+        """類別 × 供應商的庫存價值與數量"""
+        n_categories = len(self.categories.names)
+        n_suppliers = len(self.suppliers.names)
+        # 空集合時 reshape(0, -1) 無法推算欄數
+        if not self.size or not n_categories:
+            return {"categories": [], "suppliers": [], "value": [], "count": [], "totalValue": 0.0}
+        cells = self.view("category").astype(np.int64) * max(n_suppliers, 1) + self.view("supplier")
+        value = self.view("price") * self.view("stock")
+        length = n_categories * max(n_suppliers, 1)
+        values = np.bincount(cells, weights=value, minlength=length).reshape(n_categories, -1)
+        counts = np.bincount(cells, minlength=length).reshape(n_categories, -1)
+
+        # 只保留目前仍有產品的類別/供應商
+        category_rows = np.nonzero(counts.sum(axis=1))[0]
+        supplier_cols = np.nonzero(counts.sum(axis=0))[0]
+        return {
+            "categories": [self.categories.names[i] for i in category_rows],
+            "suppliers": [self.suppliers.names[j] for j in supplier_cols],
+            "value": values[np.ix_(category_rows, supplier_cols)].tolist(),
+            "count": counts[np.ix_(category_rows, supplier_cols)].tolist(),
+            "totalValue": float(value.sum()),
+        }
+
+    def _risk_levels(self):
+        stock = self.view("stock")
+        min_stock = self.view("min_stock")
+        levels = np.full(self.size, 3, dtype=np.int8)
+        levels[stock > 2 * min_stock] = 4
+        levels[stock <= min_stock] = 2
+        levels[2 * stock <= min_stock] = 1
+        levels[stock <= 0] = 0
+        return levels
+
+    def stockout_risk(self) -> Dict[str, Any]:
+        """缺貨風險分布（整體與各類別）"""
+        levels = self._risk_levels()
+        total = np.bincount(levels, minlength=len(RISK_LEVELS))
+        n_categories = len(self.categories.names)
+        per_category = np.bincount(
+            self.view("category").astype(np.int64) * len(RISK_LEVELS) + levels,
+            minlength=n_categories * len(RISK_LEVELS)
+        ).reshape(n_categories, len(RISK_LEVELS))
+        return {
+            "levels": RISK_LEVELS,
+            "total": dict(zip(RISK_LEVELS, total.tolist())),
+            "byCategory": [
+                {"name": self.categories.names[i], **dict(zip(RISK_LEVELS, row))}
+                for i, row in enumerate(per_category.tolist()) if sum(row)
+            ],
+        }
+
+    def price_percentiles(self, percentiles: List[float]) -> Dict[str, Any]:
+        """價格百分位數（整體與各類別）"""
+        price = self.view("price")
+        if not self.size:
+            return {"percentiles": percentiles, "overall": [], "byCategory": []}
+        category = self.view("category")
+        # 依類別排序一次後切片，避免每個類別都做一次布林遮罩
+        order = np.argsort(category, kind="stable")
+        sorted_category = category[order]
+        sorted_price = price[order]
+        bounds = np.searchsorted(sorted_category, np.arange(len(self.categories.names) + 1))
+        by_category = []
+        for code, name in enumerate(self.categories.names):
+            segment = sorted_price[bounds[code]:bounds[code + 1]]
+            if len(segment):
+                by_category.append({"name": name, "count": int(len(segment)), "values": np.percentile(segment, percentiles).tolist()})
+        return {
+            "percentiles": percentiles,
+            "overall": np.percentile(price, percentiles).tolist(),
+            "byCategory": by_category,
+        }
+
+    def reorder_quantities(self, limit: int = 100, category: Optional[str] = None) -> Dict[str, Any]:
+        """補貨建議量 min_stock - stock（僅列出需要補貨的產品）與各供應商合計"""
+        quantity = self.view("min_stock") - self.view("stock")
+        mask = quantity > 0
+        if category is not None:
+            code = self.categories.codes.get(category)
+            mask &= (self.view("category") == code) if code is not None else False
+        rows = np.nonzero(mask)[0]
+        supplier_totals = np.bincount(
+            self.view("supplier")[rows], weights=quantity[rows], minlength=len(self.suppliers.names)
+        )
+        # 只排序前 limit 筆
+        if len(rows) > limit:
+            top = rows[np.argpartition(-quantity[rows], limit - 1)[:limit]]
+        else:
+            top = rows
+        top = top[np.argsort(-quantity[top], kind="stable")]
+        price = self.view("price")
+        return {
+            "count": int(len(rows)),
+            "totalUnits": int(quantity[rows].sum()),
+            "totalCost": float((quantity[rows] * price[rows]).sum()),
+            "bySupplier": [
+                {"name": self.suppliers.names[i], "units": int(units)}
+                for i, units in enumerate(supplier_totals.tolist()) if units
+            ],
+            "items": [
+                {
+                    "_id": self.ids[row],
+                    "category": self.categories.names[self.category[row]],
+                    "supplier": self.suppliers.names[self.supplier[row]],
+                    "stock": int(self.stock[row]),
+                    "min_stock": int(self.min_stock[row]),
+                    "reorderQuantity": int(quantity[row]),
+                }
+                for row in top.tolist()
+            ],
+        }
+
+def inventory_report(columns: InventoryColumns, percentiles: List[float], reorder_limit: int = 1000) -> Dict[str, Any]:
+    """完整庫存報表（價值矩陣、缺貨風險、價格百分位數、補貨建議），可在工作行程中執行"""
+    return {
+        "products": columns.size,
+        "valueMatrix": columns.value_matrix(),
+        "stockoutRisk": columns.stockout_risk(),
+        "pricePercentiles": columns.price_percentiles(percentiles),
+        "reorder": columns.reorder_quantities(limit=reorder_limit),
+    }
+
+class AnalyticsEngine:
+    """延遲載入欄位資料，之後依產品變更事件遞增更新"""
+
+    def __init__(self, max_age: float = ANALYTICS_MAX_AGE):
+        self.max_age = max_age
+        self.columns: Optional[InventoryColumns] = None
+        self.loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self._loading = False
+        self._pending: List[tuple] = []
+        # 載入期間收到 reset：載入中的資料可能早於重設，需要丟棄並重新載入
+        self._invalidated = False
+
+    async def load(self, collection) -> InventoryColumns:
+        """從 MongoDB 以投影分批載入數值欄位"""
+        columns = InventoryColumns(capacity=max(1024, await collection.estimated_document_count()))
+        batch: List[Dict[str, Any]] = []
+        async for document in collection.find({}, _PROJECTION).batch_size(LOAD_BATCH_SIZE):
+            batch.append(document)
+            if len(batch) >= LOAD_BATCH_SIZE:
+                columns.append_batch(batch)
+                batch = []
+        columns.append_batch(batch)
+        return columns
+
+    async def get(self, collection) -> InventoryColumns:
+        """取得最新的欄位資料，過期或被重設時重新載入"""
+        fresh = self.columns is not None and time.monotonic() - self.loaded_at < self.max_age
+        if fresh:
+            return self.columns
+        async with self._lock:
+            if self.columns is not None and time.monotonic() - self.loaded_at < self.max_age:
+                return self.columns
+            # 載入期間收到的事件先暫存，載入完成後再套用
+            self._loading = True
+            try:
+                while True:
+                    self._pending = []
+                    self._invalidated = False
+                    columns = await self.load(collection)
+                    if not self._invalidated:
+                        break
+                for op, before, after in self._pending:
+                    self._apply(columns, op, before, after)
+                self.columns = columns
+                self.loaded_at = time.monotonic()
+            finally:
+                self._loading = False
+                self._pending = []
+            return self.columns
+
+    @staticmethod
+    def _apply(columns: InventoryColumns, op: str, before, after):
+        if op == "delete" and before is not None:
+            columns.remove(before["_id"])
+        elif after is not None:
+            columns.upsert(after)
+
+    def on_product_event(self, op: str, before, after):
+        """產品變更事件監聽器"""
+        if op == "reset":
+            self.columns = None
+            if self._loading:
+                self._invalidated = True
+            return
+        if self._loading:
+            self._pending.append((op, before, after))
+        elif self.columns is not None:
+            self._apply(self.columns, op, before, after)
+
+analytics_engine = AnalyticsEngine()
+# 經由 change_feed 訂閱：change stream 運作時也會收到其他 worker 的變更
+change_feed.subscribe(analytics_engine.on_product_event)
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# 快取設定：CACHE_BACKEND 可為 memory、redis 或 none
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_TTL = float(os.getenv("CACHE_TTL", "60"))
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+_MISSING = object()
+
+class CacheStats:
+    """快取命中/未命中/淘汰計數"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.coalesced = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "coalesced": self.coalesced,
+        }
+
+class MemoryCache:
+    """行程內 TTL + LRU 快取，超過容量時淘汰最久未使用的項目"""
+
+    def __init__(self, stats: CacheStats, max_size: int = CACHE_MAX_SIZE, ttl: float = CACHE_TTL):
+        self.stats = stats
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    async def get(self, key: str) -> Any:
+        item = self._items.get(key)
+        if item is None:
+            return _MISSING
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._items[key]
+            self.stats.expirations += 1
+            return _MISSING
+        self._items.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any):
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def delete(self, key: str):
+        self._items.pop(key, None)
+
+    async def clear(self):
+        self._items.clear()
+
+    def size(self) -> int:
+        return len(self._items)
+
+class RedisCache:
+    """Redis 相容後端；client 只需提供 async get/set(ex=)/delete，測試時可替換為本機替身"""
+
+    def __init__(
+        self,
+        client: Any,
+        namespace: str,
+        stats: CacheStats,
+        ttl: float = CACHE_TTL,
+        encode: Callable[[Any], Any] = lambda value: value,
+        decode: Callable[[Any], Any] = lambda value: value,
+    ):
+        self.client = client
+        self.prefix = f"cache:{namespace}:"
+        self.stats = stats
+        self.ttl = ttl
+        self.encode = encode
+        self.decode = decode
+
+    async def get(self, key: str) -> Any:
+        raw = await self.client.get(self.prefix + key)
+        if raw is None:
+            return _MISSING
+        return self.decode(json.loads(raw))
+
+    async def set(self, key: str, value: Any):
+        payload = json.dumps(self.encode(value), ensure_ascii=False, default=str)
+        await self.client.set(self.prefix + key, payload, ex=max(1, int(self.ttl)))
+
+    async def delete(self, key: str):
+        await self.client.delete(self.prefix + key)
+
+    async def clear(self):
+        async for key in self.client.scan_iter(match=self.prefix + "*"):
+            await self.client.delete(key)
+
+    def size(self) -> Optional[int]:
+        return None
+
+class ReadThroughCache:
+    """讀穿快取：未命中時呼叫 loader，並合併同一個 key 的並行載入（single-flight）"""
+
+    def __init__(self, name: str, backend: Any, stats: CacheStats):
+        self.name = name
+        self.backend = backend
+        self.stats = stats
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """讀取快取，未命中時載入並寫入（None 不快取）"""
+        value = await self.backend.get(key)
+        if value is not _MISSING:
+            self.stats.hits += 1
+            return value
+        self.stats.misses += 1
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+            # 載入期間若已被失效，就不寫入舊資料
+            if value is not None and self._inflight.get(key) is future:
+                await self.backend.set(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            # 避免沒有其他等待者時出現 "exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def prime(self, items: Dict[str, Any]) -> int:
+        """直接寫入已載入的值（啟動暖機用），回傳寫入筆數"""
+        for key, value in items.items():
+            await self.backend.set(key, value)
+        return len(items)
+
+    async def invalidate(self, *keys: str):
+        """寫入後使快取失效"""
+        for key in keys:
+            self._inflight.pop(key, None)
+            await self.backend.delete(key)
+            self.stats.invalidations += 1
+
+    async def clear(self):
+        self._inflight.clear()
+        await self.backend.clear()
+
+    @property
+    def process_local(self) -> bool:
+        """快取是否只存在本行程（其他 worker 的寫入不會使它失效）"""
+        return isinstance(self.backend, MemoryCache)
+
+    def info(self) -> Dict[str, Any]:
+        info = {"backend": type(self.backend).__name__, "size": self.backend.size()}
+        info.update(self.stats.to_dict())
+        return info
+
+class NullCache:
+    """停用快取時使用，永遠未命中"""
+
+    async def get(self, key: str) -> Any:
+        return _MISSING
+
+    async def set(self, key: str, value: Any):
+        pass
+
+    async def delete(self, key: str):
+        pass
+
+    async def clear(self):
+        pass
+
+    def size(self) -> int:
+        return 0
+
+# 已建立的快取，供統計端點列出
+_caches: Dict[str, ReadThroughCache] = {}
+_redis_client = None
+
+def _get_redis_client():
+    global _redis_client
+    if _redis_client is None:
+        import redis.asyncio as redis
+        _redis_client = redis.from_url(REDIS_URL)
+    return _redis_client
+
+def create_cache(
+    name: str,
+    encode: Callable[[Any], Any] = lambda value: value,
+    decode: Callable[[Any], Any] = lambda value: value,
+    backend: Optional[Any] = None,
+) -> ReadThroughCache:
+    """依 CACHE_BACKEND 建立命名快取；encode/decode 僅 Redis 後端需要"""
+    stats = CacheStats()
+    if backend is None:
+        if CACHE_BACKEND == "none":
+            backend = NullCache()
+        elif CACHE_BACKEND == "redis":
+            try:
+                backend = RedisCache(_get_redis_client(), name, stats, encode=encode, decode=decode)
+            except ImportError:
+                print("⚠️ 未安裝 redis 套件，改用行程內快取")
+                backend = MemoryCache(stats)
+        else:
+            backend = MemoryCache(stats)
+    cache = ReadThroughCache(name, backend, stats)
+    _caches[name] = cache
+    return cache
+
+def cache_stats() -> Dict[str, Any]:
+    """所有快取的命中/未命中/淘汰統計"""
+    return {name: cache.info() for name, cache in _caches.items()}
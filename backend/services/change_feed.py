@@ -0,0 +1,206 @@
+import asyncio
+import os
+import secrets
+from collections import deque
+from datetime import datetime
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from bson import ObjectId, Timestamp
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import OperationFailure, PyMongoError
+from services import product_events
+from services.product_events import ProductListener
+from services.sse import Broadcaster, format_event
+
+# 保留最近的變更筆數；落後超過此範圍的用戶端需重新載入完整列表
+CHANGE_FEED_CAPACITY = int(os.getenv("CHANGE_FEED_CAPACITY", "10000"))
+# auto：副本集可用時改以 change stream 為來源，off：只用本行程的路由事件
+CHANGE_FEED_STREAM = os.getenv("CHANGE_FEED_STREAM", "auto")
+CHANGE_STREAM_UNSUPPORTED = {40573}
+RETRY_DELAY = 5.0
+# change stream 模式的 epoch：序號取自變更的 clusterTime，每個 worker 算出相同的游標
+STREAM_EPOCH = "cs"
+# 同一個 clusterTime 可能有多筆變更（同一筆交易），序號保留低位元依序區分
+_TXN_BITS = 16
+
+def _position(cluster_time: Timestamp, index: int = 0) -> int:
+    """clusterTime（秒 + 遞增值）轉為可比較的整數序號"""
+    return (((cluster_time.time << 32) | cluster_time.inc) << _TXN_BITS) | index
+
+def _plain(document: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """ObjectId 轉字串，讓變更可以直接序列化"""
+    if document is None:
+        return None
+    return {key: str(value) if isinstance(value, ObjectId) else value for key, value in document.items()}
+
+def stream_enabled() -> bool:
+    return CHANGE_FEED_STREAM != "off"
+
+class ChangeFeed:
+    """最近產品變更的環形緩衝區，游標為「epoch-序號」
+
+    只有本行程的事件時，epoch 在每次啟動時重新產生，重啟前的游標會被視為過期，用戶端改為完整重新載入。
+    change stream 運作中時序號取自 clusterTime，所有 worker 的游標互通，用戶端重連到其他 worker 也能繼續。
+    行程內的快取與分析資料以 subscribe 註冊，和緩衝區收到相同的變更（含其他 worker 的寫入）。
+    """
+
+    def __init__(self, capacity: int = CHANGE_FEED_CAPACITY):
+        self.epoch = secrets.token_hex(4)
+        self.sequence = 0
+        # 序號不大於 floor 的變更不一定在緩衝區內（已被擠出或早於訂閱開始），這些游標需要重新載入
+        self.floor = 0
+        self.buffer: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        self.broadcaster = Broadcaster()
+        # change stream 運作中時以它為來源，忽略本行程的事件避免重複
+        self.streaming = False
+        self._listeners: List[ProductListener] = []
+
+    def subscribe(self, listener: ProductListener):
+        """註冊行程內的變更監聽器（參數與 product_events 相同；change stream 的刪除只帶 {"_id"}）"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def cursor(self, sequence: Optional[int] = None) -> str:
+        return f"{self.epoch}-{self.sequence if sequence is None else sequence}"
+
+    def _parse(self, cursor: Optional[str]) -> Optional[int]:
+        """回傳游標序號；格式錯誤或來自其他 epoch 時回傳 None"""
+        if not cursor:
+            return None
+        epoch, _, sequence = cursor.partition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    def _restart(self, epoch: str, floor: int):
+        """切換序號來源：清空緩衝區，之前的游標一律重新載入"""
+        self.epoch = epoch
+        self.sequence = self.floor = floor
+        self.buffer.clear()
+
+    def record(self, op: str, product_id: Optional[str], document: Optional[Dict[str, Any]], sequence: Optional[int] = None):
+        self.sequence = self.sequence + 1 if sequence is None else sequence
+        if len(self.buffer) == self.buffer.maxlen:
+            self.floor = self.buffer[0]["seq"]
+        change = {
+            "seq": self.sequence,
+            "op": op,
+            "_id": product_id,
+            "product": _plain(document),
+            "at": datetime.now(),
+        }
+        self.buffer.append(change)
+        self.broadcaster.publish("change", self._public(change), event_id=self.cursor(change["seq"]))
+
+    async def _apply(self, op: str, product_id: Optional[str], before, after, sequence: Optional[int] = None):
+        """記錄變更並通知行程內的監聽器"""
+        self.record(op, product_id, after, sequence)
+        await product_events.notify(self._listeners, op, before, self.buffer[-1]["product"])
+
+    def _public(self, change: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in change.items() if key != "seq"}
+
+    def _since(self, cursor: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], str, bool]:
+        sequence = self._parse(cursor)
+        if sequence is None or sequence < self.floor:
+            return [], self.cursor(), True
+        if sequence > self.sequence:
+            if self.epoch != STREAM_EPOCH:
+                return [], self.cursor(), True
+            # 游標來自進度稍快的 worker：從本行程的位置繼續，之後可能重送幾筆用戶端已有的變更
+            return [], self.cursor(), False
+        # change stream 的序號不連續，以二分搜尋找出第一筆較新的變更
+        low, high = 0, len(self.buffer)
+        while low < high:
+            middle = (low + high) // 2
+            if self.buffer[middle]["seq"] <= sequence:
+                low = middle + 1
+            else:
+                high = middle
+        changes = list(islice(self.buffer, low, low + limit))
+        next_sequence = changes[-1]["seq"] if changes else sequence
+        return changes, self.cursor(next_sequence), False
+
+    def since(self, cursor: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], str, bool]:
+        """回傳 (變更, 下一個游標, 是否需要完整重新載入)"""
+        changes, next_cursor, reset = self._since(cursor, limit)
+        return [self._public(change) for change in changes], next_cursor, reset
+
+    def catch_up_events(self, cursor: Optional[str]) -> str:
+        """SSE 連線時補送游標之後的變更；無法補送時送 reset"""
+        changes, next_cursor, reset = self._since(cursor, len(self.buffer))
+        if reset:
+            return format_event("reset", {"cursor": next_cursor}, event_id=next_cursor)
+        return "".join(
+            format_event("change", self._public(change), event_id=self.cursor(change["seq"]))
+            for change in changes
+        ) or ": connected\n\n"
+
+    # ---- 來源：產品路由的變更事件 ----
+
+    async def on_product_event(self, op: str, before, after):
+        if self.streaming:
+            return
+        if op == "reset":
+            await self._apply("reset", None, None, None)
+            return
+        document = after if after is not None else before
+        await self._apply(op, document.get("_id"), before, after)
+
+    async def on_foreign_writes(self):
+        """沒有 change stream 時由版本輪詢呼叫：其他行程寫入了不明的產品，通知重新載入"""
+        if not self.streaming:
+            await self._apply("reset", None, None, None)
+
+    # ---- 來源：change stream（多個 worker 時也能看到其他 worker 的變更）----
+
+    async def follow(self, products: AsyncIOMotorCollection):
+        """以 change stream 作為來源；不支援時維持使用本行程事件"""
+        while True:
+            try:
+                # 從目前的 operationTime 開始訂閱，早於它的游標才需要重新載入
+                start = (await products.database.command("ping")).get("operationTime")
+                options: Dict[str, Any] = {"full_document": "updateLookup"}
+                if start is not None:
+                    options["start_at_operation_time"] = start
+                async with products.watch(**options) as stream:
+                    if start is not None:
+                        self._restart(STREAM_EPOCH, _position(start) - 1)
+                    else:
+                        # 無法取得起點時游標不與其他 worker 互通
+                        self._restart(secrets.token_hex(4), 0)
+                    self.streaming = True
+                    # 改用 change stream 之前其他 worker 的變更不在本行程的資料中
+                    await self._apply("reset", None, None, None, sequence=self.floor)
+                    print("✅ 產品變更訂閱已改用 change stream")
+                    last_time, index = None, 0
+                    async for change in stream:
+                        cluster_time = change["clusterTime"]
+                        index = index + 1 if cluster_time == last_time else 0
+                        last_time = cluster_time
+                        sequence = _position(cluster_time, index) if start is not None else None
+                        operation = change["operationType"]
+                        if operation in ("drop", "invalidate", "rename"):
+                            await self._apply("reset", None, None, None, sequence)
+                            continue
+                        product_id = str(change["documentKey"]["_id"])
+                        if operation == "delete":
+                            await self._apply("delete", product_id, {"_id": product_id}, None, sequence)
+                        else:
+                            op = "create" if operation == "insert" else "update"
+                            await self._apply(op, product_id, None, change.get("fullDocument"), sequence)
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAM_UNSUPPORTED:
+                    return
+                print(f"❌ 產品變更訂閱錯誤: {e}")
+            except PyMongoError as e:
+                print(f"❌ 產品變更訂閱連線中斷: {e}")
+            finally:
+                self.streaming = False
+            # 重新連線前的變更無法補回，改回本行程事件並通知用戶端重新載入
+            self._restart(secrets.token_hex(4), 0)
+            await self._apply("reset", None, None, None)
+            await asyncio.sleep(RETRY_DELAY)
+
+change_feed = ChangeFeed()
+product_events.subscribe(change_feed.on_product_event)
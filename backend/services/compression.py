@@ -0,0 +1,133 @@
+import zlib
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli 為選用相依套件
+    brotli = None
+
+# 小於此大小的回應不壓縮（壓縮標頭與 CPU 成本不划算）
+MINIMUM_SIZE = 1024
+GZIP_LEVEL = 6
+# brotli 品質 4 的速度接近 gzip 6，壓縮率較好；更高的品質只適合靜態檔案
+BROTLI_QUALITY = 4
+# SSE 必須逐筆送出，不能被壓縮器緩衝；已壓縮的格式再壓縮沒有效果
+_SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "video/", "audio/", "application/zip", "application/gzip")
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """依 Accept-Encoding 選擇 br 或 gzip（q=0 視為不接受）"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+def etag_with_encoding(etag: str, encoding: str) -> str:
+    """壓縮後的表示法使用不同的強 ETag（在引號內加上 -gzip/-br）"""
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+def strip_encoding(etag: str) -> str:
+    """還原 etag_with_encoding 加上的後綴，比對時使用"""
+    for encoding in ("gzip", "br"):
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+class _Encoder:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        self.encoding = encoding
+
+    def compress(self, data: bytes, more: bool) -> bytes:
+        """壓縮一段資料；串流中途會 flush，讓每個區塊都能立即送出"""
+        if self.encoding == "br":
+            output = self._compressor.process(data)
+            return output + (self._compressor.flush() if more else self._compressor.finish())
+        output = self._compressor.compress(data)
+        return output + self._compressor.flush(zlib.Z_SYNC_FLUSH if more else zlib.Z_FINISH)
+
+class CompressionMiddleware:
+    """ASGI 中介層：依 Accept-Encoding 以 brotli（有安裝時）或 gzip 壓縮回應
+
+    一次送完的回應小於 minimum_size 時不壓縮；串流回應逐區塊壓縮並移除 Content-Length。
+    SSE 與已帶 Content-Encoding 的回應原樣送出。
+    """
+
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder: Optional[_Encoder] = None
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder
+            if message["type"] == "http.response.start":
+                # 等到第一個本文區塊才知道大小與是否為串流
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+
+            if start_message is None:
+                if encoder is not None:
+                    message = {"type": "http.response.body", "body": encoder.compress(body, more), "more_body": more}
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            content_type = headers.get("content-type", "")
+            compressible = "content-encoding" not in headers and not content_type.startswith(_SKIP_CONTENT_TYPES)
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+            if not compressible or (not more and len(body) < self.minimum_size):
+                await send(start_message)
+                start_message = None
+                await send(message)
+                return
+
+            encoder = _Encoder(encoding)
+            data = encoder.compress(body, more)
+            headers["Content-Encoding"] = encoding
+            if "etag" in headers:
+                headers["ETag"] = etag_with_encoding(headers["etag"], encoding)
+            if more:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(data))
+            await send(start_message)
+            start_message = None
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, send_wrapper)
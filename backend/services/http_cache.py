@@ -0,0 +1,98 @@
+import asyncio
+import os
+import secrets
+from typing import Awaitable, Callable, Dict, Optional
+from fastapi import Response
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from services.compression import strip_encoding
+
+# 每個集合一份版本文件：{_id: 集合名稱, epoch, version}，寫入路由在寫入完成後遞增 version
+VERSIONS_COLLECTION = "collection_versions"
+# 用戶端可以保存回應，但每次使用前都要以 If-None-Match 重新驗證
+CACHE_CONTROL = "no-cache"
+# 沒有 change stream 時，以此間隔輪詢版本文件偵測其他行程的寫入
+VERSION_POLL_INTERVAL = float(os.getenv("VERSION_POLL_INTERVAL", "1"))
+
+# 本行程遞增版本的次數（依集合）；資料庫版本增加得比這多，代表有其他行程寫入
+_local_bumps: Dict[str, int] = {}
+
+def new_epoch() -> str:
+    """版本文件建立時的隨機值；文件被刪除重建後 ETag 不會與舊值重複"""
+    return secrets.token_hex(4)
+
+def _versions(collection: AsyncIOMotorCollection) -> AsyncIOMotorCollection:
+    return collection.database[VERSIONS_COLLECTION]
+
+async def collection_etag(collection: AsyncIOMotorCollection) -> str:
+    """以集合版本組成強 ETag（單次以 _id 讀取，不執行實際查詢）
+
+    需在查詢資料之前讀取：查詢期間若有寫入，版本已遞增，下次請求會拿到新資料。
+    """
+    document = await _versions(collection).find_one({"_id": collection.name})
+    if document is None:
+        document = await _versions(collection).find_one_and_update(
+            {"_id": collection.name},
+            {"$setOnInsert": {"epoch": new_epoch(), "version": 0}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    return f'"{collection.name}-{document["epoch"]}-{document["version"]}"'
+
+async def bump_version(collection: AsyncIOMotorCollection):
+    """寫入完成後呼叫，讓先前的 ETag 失效"""
+    await _versions(collection).update_one(
+        {"_id": collection.name},
+        {"$inc": {"version": 1}, "$setOnInsert": {"epoch": new_epoch()}},
+        upsert=True
+    )
+    _local_bumps[collection.name] = _local_bumps.get(collection.name, 0) + 1
+
+async def watch_foreign_writes(
+    collection: AsyncIOMotorCollection,
+    on_foreign: Callable[[], Awaitable[None]],
+    interval: float = VERSION_POLL_INTERVAL
+):
+    """背景工作：定期讀取版本文件，發現其他行程（其他 worker、seed 腳本）寫入時呼叫 on_foreign
+
+    只能得知「有寫入」而不知道是哪幾筆，適合用來清空行程內快取；讀到較舊的版本時不會誤判。
+    """
+    epoch = None
+    foreign = 0
+    while True:
+        try:
+            document = await _versions(collection).find_one({"_id": collection.name})
+            if document is not None:
+                seen = document["version"] - _local_bumps.get(collection.name, 0)
+                if document["epoch"] != epoch:
+                    # 第一次讀取只建立基準；版本文件被重建時一律視為有變更
+                    changed = epoch is not None
+                    epoch, foreign = document["epoch"], seen
+                else:
+                    changed = seen > foreign
+                    foreign = max(foreign, seen)
+                if changed:
+                    await on_foreign()
+        except Exception as e:
+            print(f"❌ 偵測 {collection.name} 的其他行程寫入失敗: {e}")
+        await asyncio.sleep(interval)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 使用弱比較：忽略 W/ 前綴與壓縮後綴"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if strip_encoding(candidate) == etag:
+            return True
+    return False
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
@@ -0,0 +1,96 @@
+from typing import Any, Dict, List, Optional
+
+def _get(product: Any, key: str, default: Any = None) -> Any:
+    """同時支援 dict 與模型物件的欄位讀取"""
+    if isinstance(product, dict):
+        return product.get(key, default)
+    return getattr(product, key, default)
+
+def product_contribution(product: Any, min_stock_key: str = "min_stock") -> Dict[str, Any]:
+    """單一產品對庫存統計的貢獻值"""
+    price = _get(product, "price") or 0
+    stock = _get(product, "stock") or 0
+    low = 1 if stock <= (_get(product, min_stock_key) or 0) else 0
+    entry = {"count": 1, "value": price * stock, "lowStock": low}
+    return {
+        "totalProducts": 1,
+        "totalValue": price * stock,
+        "lowStockCount": low,
+        "byCategory": {_get(product, "category"): dict(entry)},
+        "bySupplier": {_get(product, "supplier"): dict(entry)},
+    }
+
+def _merge(target: Dict[str, Any], source: Dict[str, Any], sign: int):
+    for key in ("totalProducts", "totalValue", "lowStockCount"):
+        target[key] = target.get(key, 0) + sign * source[key]
+    for group in ("byCategory", "bySupplier"):
+        bucket = target.setdefault(group, {})
+        for name, entry in source[group].items():
+            current = bucket.setdefault(name, {"count": 0, "value": 0, "lowStock": 0})
+            for field in ("count", "value", "lowStock"):
+                current[field] += sign * entry[field]
+
+def contribution_delta(
+    before: Optional[Any],
+    after: Optional[Any],
+    min_stock_key: str = "min_stock"
+) -> Dict[str, Any]:
+    """計算產品由 before 變為 after 時統計值的增量（新增時 before 為 None，刪除時 after 為 None）"""
+    delta: Dict[str, Any] = {"totalProducts": 0, "totalValue": 0, "lowStockCount": 0, "byCategory": {}, "bySupplier": {}}
+    if before is not None:
+        _merge(delta, product_contribution(before, min_stock_key), -1)
+    if after is not None:
+        _merge(delta, product_contribution(after, min_stock_key), 1)
+    # 去除沒有變化的分組
+    for group in ("byCategory", "bySupplier"):
+        delta[group] = {
+            name: entry for name, entry in delta[group].items()
+            if any(entry[field] for field in ("count", "value", "lowStock"))
+        }
+    return delta
+
+def summarize(products: List[Any], min_stock_key: str = "min_stock") -> Dict[str, Any]:
+    """一次計算多個產品的統計總和"""
+    total: Dict[str, Any] = {"totalProducts": 0, "totalValue": 0, "lowStockCount": 0, "byCategory": {}, "bySupplier": {}}
+    for product in products:
+        _merge(total, product_contribution(product, min_stock_key), 1)
+    return total
+
+def format_stats(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """將累計值轉為與統計 API 相同的回應格式"""
+    def rows(group: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # 摘要文件以 $inc 建立，值為 0 的欄位可能不存在
+        return [
+            {"name": name, "count": entry.get("count", 0), "value": entry.get("value", 0), "lowStock": entry.get("lowStock", 0)}
+            for name, entry in sorted(group.items(), key=lambda item: str(item[0]))
+            if entry.get("count", 0) > 0
+        ]
+
+    by_category = rows(summary.get("byCategory", {}))
+    return {
+        "totalProducts": summary.get("totalProducts", 0),
+        "totalValue": summary.get("totalValue", 0),
+        "lowStockCount": summary.get("lowStockCount", 0),
+        "categories": [row["name"] for row in by_category],
+        "byCategory": by_category,
+        "bySupplier": rows(summary.get("bySupplier", {})),
+    }
+
+class InventoryCounters:
+    """記憶體內遞增維護的庫存統計"""
+
+    def __init__(self, min_stock_key: str = "min_stock"):
+        self.min_stock_key = min_stock_key
+        self.reset()
+
+    def reset(self, products: Optional[List[Any]] = None):
+        """清空計數器，可選擇以產品列表重建"""
+        self._summary = summarize(products or [], self.min_stock_key)
+
+    def apply(self, before: Optional[Any], after: Optional[Any]):
+        """套用單一產品的變更"""
+        _merge(self._summary, contribution_delta(before, after, self.min_stock_key), 1)
+
+    def stats(self) -> Dict[str, Any]:
+        """O(1) 讀取目前統計（分組數量與類別數成正比）"""
+        return format_stats(self._summary)
@@ -0,0 +1,54 @@
+from typing import Any, Dict, List
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+def _breakdown_stage(key: str) -> List[Dict[str, Any]]:
+    """依指定欄位分組的數量、價值與低庫存統計"""
+    return [
+        {"$group": {
+            "_id": f"${key}",
+            "count": {"$sum": 1},
+            "value": {"$sum": {"$multiply": ["$price", "$stock"]}},
+            "lowStock": {"$sum": {"$cond": [{"$lte": ["$stock", "$min_stock"]}, 1, 0]}},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+def build_inventory_stats_pipeline() -> List[Dict[str, Any]]:
+    """庫存統計聚合管線：一次往返同時計算總計、類別與供應商分組"""
+    return [
+        {"$project": {"_id": 0, "category": 1, "supplier": 1, "price": 1, "stock": 1, "min_stock": 1}},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "totalProducts": {"$sum": 1},
+                    "totalValue": {"$sum": {"$multiply": ["$price", "$stock"]}},
+                    "lowStockCount": {"$sum": {"$cond": [{"$lte": ["$stock", "$min_stock"]}, 1, 0]}},
+                }},
+            ],
+            "byCategory": _breakdown_stage("category"),
+            "bySupplier": _breakdown_stage("supplier"),
+        }},
+    ]
+
+def _format_breakdown(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {"name": row["_id"], "count": row["count"], "value": row["value"], "lowStock": row["lowStock"]}
+        for row in rows
+    ]
+
+async def compute_inventory_stats(collection: AsyncIOMotorCollection) -> Dict[str, Any]:
+    """在資料庫端計算庫存統計"""
+    result = await collection.aggregate(build_inventory_stats_pipeline()).to_list(length=1)
+    facet = result[0] if result else {"totals": [], "byCategory": [], "bySupplier": []}
+    totals = facet["totals"][0] if facet["totals"] else {}
+    by_category = _format_breakdown(facet["byCategory"])
+
+    return {
+        "totalProducts": totals.get("totalProducts", 0),
+        "totalValue": totals.get("totalValue", 0),
+        "lowStockCount": totals.get("lowStockCount", 0),
+        "categories": [row["name"] for row in by_category],
+        "byCategory": by_category,
+        "bySupplier": _format_breakdown(facet["bySupplier"]),
+    }
@@ -0,0 +1,150 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import DuplicateKeyError
+from services.inventory_counters import contribution_delta, format_stats
+from services.inventory_stats import compute_inventory_stats
+from services.leader import LeaderLease
+
+# 統計模式：aggregate（每次聚合）或 incremental（讀取遞增維護的摘要文件）
+STATS_MODE = os.getenv("INVENTORY_STATS_MODE", "aggregate")
+RECONCILE_INTERVAL = float(os.getenv("INVENTORY_RECONCILE_INTERVAL", "300"))
+
+SUMMARY_COLLECTION = "inventory_summary"
+SUMMARY_ID = "products"
+# 重建期間摘要被遞增時放棄覆寫並重試的次數
+MAX_REBUILD_ATTEMPTS = 3
+
+def incremental_enabled() -> bool:
+    return STATS_MODE == "incremental"
+
+def _escape(name: Any) -> str:
+    """分類/供應商名稱作為欄位名稱時需跳脫 . 與開頭的 $"""
+    text = str(name).replace("%", "%25").replace(".", "%2E")
+    if text.startswith("$"):
+        text = "%24" + text[1:]
+    return text
+
+def _unescape(key: str) -> str:
+    return key.replace("%24", "$").replace("%2E", ".").replace("%25", "%")
+
+def _summary_collection(products: AsyncIOMotorCollection) -> AsyncIOMotorCollection:
+    return products.database[SUMMARY_COLLECTION]
+
+def _to_document(summary: Dict[str, Any]) -> Dict[str, Any]:
+    document = {key: summary[key] for key in ("totalProducts", "totalValue", "lowStockCount")}
+    for group in ("byCategory", "bySupplier"):
+        document[group] = {_escape(name): entry for name, entry in summary[group].items()}
+    return document
+
+def _from_document(document: Dict[str, Any]) -> Dict[str, Any]:
+    summary = {key: document.get(key, 0) for key in ("totalProducts", "totalValue", "lowStockCount")}
+    for group in ("byCategory", "bySupplier"):
+        summary[group] = {_unescape(key): entry for key, entry in document.get(group, {}).items()}
+    return summary
+
+async def apply_product_change(
+    products: AsyncIOMotorCollection,
+    before: Optional[Any],
+    after: Optional[Any]
+):
+    """以單一 $inc 原子地將產品變更套用到摘要文件"""
+    if not incremental_enabled():
+        return
+    delta = contribution_delta(before, after)
+    inc: Dict[str, Any] = {}
+    for key in ("totalProducts", "totalValue", "lowStockCount"):
+        if delta[key]:
+            inc[key] = delta[key]
+    for group in ("byCategory", "bySupplier"):
+        for name, entry in delta[group].items():
+            for field, value in entry.items():
+                if value:
+                    inc[f"{group}.{_escape(name)}.{field}"] = value
+    if inc:
+        # version 讓 rebuild_summary 得知聚合期間是否有遞增寫入
+        inc["version"] = 1
+        await _summary_collection(products).update_one({"_id": SUMMARY_ID}, {"$inc": inc}, upsert=True)
+
+def _stats_to_summary(stats: Dict[str, Any]) -> Dict[str, Any]:
+    summary = {key: stats[key] for key in ("totalProducts", "totalValue", "lowStockCount")}
+    for group in ("byCategory", "bySupplier"):
+        summary[group] = {
+            row["name"]: {"count": row["count"], "value": row["value"], "lowStock": row["lowStock"]}
+            for row in stats[group]
+        }
+    return summary
+
+def _diff(expected: Dict[str, Any], actual: Dict[str, Any]) -> Dict[str, Any]:
+    """列出摘要與實際值不一致的項目"""
+    drift: Dict[str, Any] = {}
+    for key in ("totalProducts", "totalValue", "lowStockCount"):
+        difference = actual.get(key, 0) - expected.get(key, 0)
+        if abs(difference) > 1e-6:
+            drift[key] = difference
+    for group in ("byCategory", "bySupplier"):
+        names = set(expected.get(group, {})) | set(actual.get(group, {}))
+        for name in names:
+            empty = {"count": 0, "value": 0, "lowStock": 0}
+            want = expected.get(group, {}).get(name, empty)
+            have = actual.get(group, {}).get(name, empty)
+            for field in ("count", "value", "lowStock"):
+                difference = have[field] - want[field]
+                if abs(difference) > 1e-6:
+                    drift[f"{group}.{name}.{field}"] = difference
+    return drift
+
+async def rebuild_summary(products: AsyncIOMotorCollection) -> Dict[str, Any]:
+    """從頭聚合重算摘要並覆寫，回傳摘要與實際值的偏差
+
+    先讀取摘要的 version 再聚合，覆寫時以 version 為條件：聚合期間有遞增寫入時
+    覆寫會遺失那些遞增，因此放棄並重試；重試用完時保留現有摘要，等下次對帳。
+    """
+    collection = _summary_collection(products)
+    for _ in range(MAX_REBUILD_ATTEMPTS):
+        current = await collection.find_one({"_id": SUMMARY_ID})
+        expected = _stats_to_summary(await compute_inventory_stats(products))
+        drift = _diff(expected, _from_document(current)) if current else {"missing": True}
+
+        document = _to_document(expected)
+        document["reconciledAt"] = datetime.now()
+        document["lastDrift"] = [{"field": key, "difference": value} for key, value in drift.items()]
+        if current is None:
+            try:
+                await collection.insert_one({"_id": SUMMARY_ID, "version": 0, **document})
+                return drift
+            except DuplicateKeyError:
+                continue
+        version = current.get("version")
+        document["version"] = (version or 0) + 1
+        # version 為 None 時也符合沒有 version 欄位的舊摘要
+        result = await collection.replace_one({"_id": SUMMARY_ID, "version": version}, document)
+        if result.matched_count:
+            return drift
+    print(f"⚠️ 庫存摘要重建期間持續有寫入，{MAX_REBUILD_ATTEMPTS} 次皆未覆寫")
+    return {}
+
+async def read_summary(products: AsyncIOMotorCollection) -> Dict[str, Any]:
+    """O(1) 讀取摘要文件；尚未建立時先重建"""
+    document = await _summary_collection(products).find_one({"_id": SUMMARY_ID})
+    if document is None:
+        await rebuild_summary(products)
+        document = await _summary_collection(products).find_one({"_id": SUMMARY_ID})
+    return format_stats(_from_document(document))
+
+async def reconcile_periodically(products: AsyncIOMotorCollection, interval: float = RECONCILE_INTERVAL, lease: Optional[LeaderLease] = None):
+    """背景對帳：定期重算摘要並回報偏差；提供 lease 時只由持有租約的 worker 執行"""
+    while True:
+        await asyncio.sleep(interval)
+        if lease is not None and not lease.is_leader:
+            continue
+        try:
+            drift = await rebuild_summary(products)
+            if drift:
+                print(f"⚠️ 庫存摘要偏差已修正: {drift}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ 庫存摘要對帳失敗: {e}")
@@ -0,0 +1,200 @@
+import asyncio
+import functools
+import multiprocessing
+import secrets
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# 各類工作的 (同時執行數, 排隊上限)；超過排隊上限時拒絕新工作，而不是無限制堆積
+JOB_LIMITS = {
+    "seed": (1, 2),
+    "import": (2, 8),
+    "report": (2, 8),
+}
+# 記憶體中保留的已結束工作數（最舊的先移除）
+MAX_FINISHED_JOBS = 200
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+class JobQueueFullError(Exception):
+    """該類工作排隊已達上限"""
+
+class Job:
+    """背景工作狀態與進度；run_cpu 將 CPU 密集的步驟交給行程池"""
+
+    def __init__(self, runner: "JobRunner", kind: str, params: Dict[str, Any], cleanup: Optional[Callable[[], None]] = None):
+        self.runner = runner
+        self.id = secrets.token_hex(8)
+        self.kind = kind
+        self.params = params
+        self.status = QUEUED
+        self.done = 0
+        self.total: Optional[int] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+        # 工作結束（含排隊中被取消、關閉時尚未開始）時釋放資源，例如上傳的暫存檔
+        self.cleanup = cleanup
+
+    def progress(self, done: int, total: Optional[int] = None):
+        self.done = done
+        if total is not None:
+            self.total = total
+
+    async def run_cpu(self, fn: Callable, *args) -> Any:
+        """在行程池中執行 fn(*args)（fn 與參數必須可 pickle）"""
+        return await self.runner.run_cpu(fn, *args)
+
+    def release(self):
+        """執行 cleanup（只執行一次）；失敗只記錄，不影響工作狀態"""
+        cleanup, self.cleanup = self.cleanup, None
+        if cleanup is None:
+            return
+        try:
+            cleanup()
+        except Exception as e:
+            print(f"⚠️ 背景工作 {self.kind} {self.id} 清理失敗: {e}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "type": self.kind,
+            "status": self.status,
+            "params": self.params,
+            "progress": {
+                "done": self.done,
+                "total": self.total,
+                "percent": round(self.done * 100 / self.total, 1) if self.total else None,
+            },
+            "result": self.result,
+            "error": self.error,
+            "createdAt": self.created_at.isoformat(),
+            "startedAt": self.started_at.isoformat() if self.started_at else None,
+            "finishedAt": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+class JobRunner:
+    """以 asyncio 任務執行背景工作：各類工作有獨立的並行上限與排隊上限
+
+    工作主體在事件迴圈中以非同步 I/O 執行，CPU 密集步驟透過 run_cpu 交給少量的工作行程，
+    管理類工作因此不會佔住處理互動請求的事件迴圈。
+    """
+
+    def __init__(self, limits: Dict[str, tuple] = JOB_LIMITS, workers: int = 2):
+        self.limits = limits
+        self.workers = workers
+        self.jobs: Dict[str, Job] = {}
+        self._slots = {kind: asyncio.Semaphore(concurrency) for kind, (concurrency, _) in limits.items()}
+        self._pool: Optional[Executor] = None
+
+    def configure(self, workers: int):
+        """設定工作行程數（需在第一次使用行程池之前呼叫）"""
+        self.workers = workers
+
+    def _executor(self) -> Optional[Executor]:
+        if self.workers <= 0:
+            return None
+        if self._pool is None:
+            # spawn：不複製含事件迴圈與驅動程式執行緒的主行程狀態
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def run_cpu(self, fn: Callable, *args) -> Any:
+        executor = self._executor()
+        if executor is None:
+            return await asyncio.to_thread(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(fn, *args))
+
+    def _queued(self, kind: str) -> int:
+        return sum(1 for job in self.jobs.values() if job.kind == kind and job.status == QUEUED)
+
+    def check_capacity(self, kind: str):
+        """排隊已滿時拋出 JobQueueFullError；在接收大型請求本文之前先檢查"""
+        if kind not in self.limits:
+            raise ValueError(f"未知的工作類型: {kind}")
+        if self._queued(kind) >= self.limits[kind][1]:
+            raise JobQueueFullError(f"{kind} 工作排隊已達上限 {self.limits[kind][1]}")
+
+    def submit(
+        self,
+        kind: str,
+        body: Callable[[Job], Awaitable[Any]],
+        params: Optional[Dict[str, Any]] = None,
+        cleanup: Optional[Callable[[], None]] = None
+    ) -> Job:
+        """建立工作並排入執行；body(job) 的回傳值成為工作結果，工作結束後一定會呼叫 cleanup()"""
+        self.check_capacity(kind)
+        job = Job(self, kind, params or {}, cleanup)
+        self.jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job, body))
+        self._prune()
+        return job
+
+    async def _run(self, job: Job, body: Callable[[Job], Awaitable[Any]]):
+        try:
+            async with self._slots[job.kind]:
+                job.status = RUNNING
+                job.started_at = datetime.now()
+                job.result = await body(job)
+                job.status = SUCCEEDED
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            print(f"❌ 背景工作 {job.kind} {job.id} 失敗: {e}")
+        finally:
+            job.finished_at = datetime.now()
+            job.release()
+
+    def _prune(self):
+        finished = [job for job in self.jobs.values() if job.status in FINISHED]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job.id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def list(self, kind: Optional[str] = None, status: Optional[str] = None) -> List[Job]:
+        """依建立時間由新到舊"""
+        jobs = [
+            job for job in self.jobs.values()
+            if (kind is None or job.kind == kind) and (status is None or job.status == status)
+        ]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """取消排隊中或執行中的工作；已送到行程池的步驟會執行完，但結果不再使用"""
+        job = self.jobs.get(job_id)
+        if job is not None and job.status not in FINISHED and job.task is not None:
+            job.task.cancel()
+            # 尚未開始執行的任務被取消時不會進入 _run，直接標記
+            if job.status == QUEUED:
+                job.status = CANCELLED
+                job.finished_at = datetime.now()
+                job.release()
+        return job
+
+    async def shutdown(self):
+        """取消所有未結束的工作並關閉行程池"""
+        tasks = [job.task for job in self.jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # 尚未開始就被取消的任務不會進入 _run
+        for job in self.jobs.values():
+            job.release()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+job_runner = JobRunner()
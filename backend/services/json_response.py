@@ -0,0 +1,53 @@
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 為選用相依套件
+    orjson = None
+
+# 串流輸出時每個區塊包含的筆數
+ROWS_PER_CHUNK = 500
+
+def _default(value: Any) -> Any:
+    """ObjectId、Decimal128 等 BSON 型別轉為字串"""
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+def dumps(content: Any) -> bytes:
+    """序列化為 UTF-8 JSON；有 orjson 時使用 orjson（datetime 格式與 isoformat 相同）"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """以 dumps 輸出的 JSON 回應
+
+    路由直接回傳此回應時會略過 response_model 的驗證與 jsonable_encoder，
+    適合內容已經是驅動回傳的原始文件、只讀的列表端點。
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+async def stream_json_array(
+    cursor,
+    transform: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    rows_per_chunk: int = ROWS_PER_CHUNK
+) -> AsyncIterator[bytes]:
+    """從 Motor 游標逐批輸出 JSON 陣列，不在記憶體中緩衝整個結果"""
+    parts: List[bytes] = [b"["]
+    count = 0
+    separator = b""
+    async for document in cursor:
+        parts.append(separator)
+        separator = b","
+        parts.append(dumps(transform(document) if transform else document))
+        count += 1
+        if count >= rows_per_chunk:
+            yield b"".join(parts)
+            parts = []
+            count = 0
+    parts.append(b"]")
+    yield b"".join(parts)
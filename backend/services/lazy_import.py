@@ -0,0 +1,25 @@
+import importlib
+import importlib.util
+from typing import Any, Optional
+
+class LazyModule:
+    """第一次存取屬性時才匯入的模組代理，讓啟動不必等待大型選用套件載入"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute: str) -> Any:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+def optional_module(name: str) -> Optional[LazyModule]:
+    """已安裝時回傳延遲匯入的代理，未安裝時回傳 None（與 try/except ImportError 的用法相同）"""
+    if importlib.util.find_spec(name) is None:
+        return None
+    return LazyModule(name)
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import secrets
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+# 租約有效秒數；leader 每 LEADER_LEASE_TTL / 3 秒續約，停止續約後其他行程最多等這麼久接手
+LEADER_LEASE_TTL = float(os.getenv("LEADER_LEASE_TTL", "15"))
+
+# 與低庫存監看的續傳點放在同一個集合
+LEASE_COLLECTION = "watcher_state"
+LEASE_ID = "leader"
+
+class LeaderLease:
+    """以 watcher_state 中的租約文件在多個 worker 之間選出一個 leader
+
+    只應由單一行程執行的背景工作（續傳點寫回、摘要對帳）在執行前檢查 is_leader；
+    租約過期前未續約就由其他行程取得，無法確認續約結果時立即視為失去租約。
+    """
+
+    def __init__(self, ttl: float = LEADER_LEASE_TTL):
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{secrets.token_hex(3)}"
+        self.is_leader = False
+        self.state: Optional[AsyncIOMotorCollection] = None
+
+    async def try_acquire(self) -> bool:
+        """取得或續約租約：文件不存在、已過期或本來就屬於自己時成功"""
+        now = datetime.now(timezone.utc)
+        try:
+            await self.state.update_one(
+                {"_id": LEASE_ID, "$or": [{"owner": self.owner}, {"expiresAt": {"$lte": now}}]},
+                {"$set": {"owner": self.owner, "expiresAt": now + timedelta(seconds=self.ttl), "renewedAt": now}},
+                upsert=True
+            )
+            leader = True
+        except DuplicateKeyError:
+            # 文件存在但屬於其他行程且尚未過期：upsert 嘗試插入同一個 _id
+            leader = False
+        if leader != self.is_leader:
+            print(f"✅ 已取得背景工作租約（{self.owner}）" if leader else f"⚠️ 背景工作租約已由其他 worker 持有（{self.owner}）")
+        self.is_leader = leader
+        return leader
+
+    async def release(self):
+        if self.is_leader:
+            self.is_leader = False
+            await self.state.delete_one({"_id": LEASE_ID, "owner": self.owner})
+
+    async def run(self, state: AsyncIOMotorCollection):
+        """背景工作：定期取得或續約，結束時釋放租約讓其他行程立即接手"""
+        self.state = state
+        try:
+            while True:
+                try:
+                    await self.try_acquire()
+                except PyMongoError as e:
+                    if self.is_leader:
+                        print(f"⚠️ 無法續約背景工作租約，暫停 leader 工作: {e}")
+                    self.is_leader = False
+                await asyncio.sleep(self.ttl / 3)
+        finally:
+            try:
+                await self.release()
+            except Exception:
+                pass
+
+leader_lease = LeaderLease()
@@ -0,0 +1,230 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure, PyMongoError
+from services.leader import LeaderLease
+from services.sse import Broadcaster, format_event
+
+# auto：可用時啟動（需副本集），off：停用
+WATCH_MODE = os.getenv("LOW_STOCK_WATCH", "auto")
+# 續傳點（resume token）寫回資料庫的最短間隔
+CHECKPOINT_INTERVAL = float(os.getenv("LOW_STOCK_CHECKPOINT_INTERVAL", "1"))
+RETRY_DELAY = 5.0
+
+STATE_COLLECTION = "watcher_state"
+STATE_ID = "low_stock"
+
+# 非副本集不支援 change stream；續傳點過期或無效時需重新開始
+CHANGE_STREAM_UNSUPPORTED = {40573}
+RESUME_FAILED = {260, 280, 286}
+
+_LOW_STOCK_QUERY = {"$expr": {"$lte": ["$stock", "$min_stock"]}}
+
+# 只關心新增、刪除、整筆取代，以及動到 stock / min_stock 的更新
+WATCH_PIPELINE = [
+    {"$match": {"$or": [
+        {"operationType": {"$in": ["insert", "replace", "delete"]}},
+        {"updateDescription.updatedFields.stock": {"$exists": True}},
+        {"updateDescription.updatedFields.min_stock": {"$exists": True}},
+    ]}},
+    {"$project": {
+        "operationType": 1,
+        "documentKey": 1,
+        "fullDocument._id": 1,
+        "fullDocument.name": 1,
+        "fullDocument.category": 1,
+        "fullDocument.supplier": 1,
+        "fullDocument.stock": 1,
+        "fullDocument.min_stock": 1,
+    }},
+]
+
+def watch_enabled() -> bool:
+    return WATCH_MODE != "off"
+
+class LowStockWatcher:
+    """追蹤 products 的 change stream，偵測 stock <= min_stock 的轉換並推播
+
+    目前低庫存的產品 ID 集合與續傳點一起存入 watcher_state；集合只寫入上次檢查點之後的增減，
+    重啟後從續傳點重播，停機期間發生的轉換仍會以 low/recovered 送出。
+    多個 worker 時每個 worker 都監看（推播給各自的 SSE 連線），只有持有租約的 leader 寫回 watcher_state。
+    """
+
+    def __init__(self, checkpoint_interval: float = CHECKPOINT_INTERVAL):
+        self.products: Optional[AsyncIOMotorCollection] = None
+        self.state: Optional[AsyncIOMotorCollection] = None
+        self.lease: Optional[LeaderLease] = None
+        self.checkpoint_interval = checkpoint_interval
+        self.broadcaster = Broadcaster()
+        self.low_ids: Set[str] = set()
+        self.running = False
+        self.events_seen = 0
+        self._resume_token: Optional[Dict[str, Any]] = None
+        # low_ids 是否與 _resume_token 對應（從 watcher_state 載入或已重建）
+        self._synced = False
+        # 上次檢查點之後的增減；重建後需整份寫入
+        self._added: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._replace_all = False
+        self._dirty = False
+        self._last_checkpoint = 0.0
+
+    # ---- 狀態 ----
+
+    async def _load_state(self) -> bool:
+        """讀取上次的續傳點與低庫存集合；沒有時從目前資料建立"""
+        state = await self.state.find_one({"_id": STATE_ID})
+        if state and state.get("resumeToken") is not None:
+            self._resume_token = state["resumeToken"]
+            # 只有續傳點、沒有集合的舊狀態文件：開啟 change stream 後重建
+            self._synced = "lowIds" in state
+            self.low_ids = set(state.get("lowIds", []))
+            return True
+        return False
+
+    async def _rebuild(self):
+        self.low_ids = {str(doc["_id"]) async for doc in self.products.find(_LOW_STOCK_QUERY, {"_id": 1})}
+        self._added.clear()
+        self._removed.clear()
+        self._replace_all = True
+        self._dirty = True
+
+    def _mark(self, product_id: str, low: bool):
+        self._dirty = True
+        if low:
+            self.low_ids.add(product_id)
+            self._added.add(product_id)
+            self._removed.discard(product_id)
+        else:
+            self.low_ids.discard(product_id)
+            self._removed.add(product_id)
+            self._added.discard(product_id)
+
+    async def _checkpoint(self, force: bool = False):
+        if self.lease is not None and not self.lease.is_leader:
+            # 不是 leader 時不寫回；增減不再累積，取得租約後整份寫入
+            self._added.clear()
+            self._removed.clear()
+            self._replace_all = True
+            return
+        if not self._dirty or self._resume_token is None:
+            return
+        if not force and time.monotonic() - self._last_checkpoint < self.checkpoint_interval:
+            return
+        state = {"resumeToken": self._resume_token, "updatedAt": datetime.now()}
+        if self._replace_all:
+            await self.state.replace_one({"_id": STATE_ID}, {**state, "lowIds": list(self.low_ids)}, upsert=True)
+        else:
+            # 只送出增減，避免每秒改寫整個集合；先移除再加入並更新續傳點（同一次往返、依序執行）
+            await self.state.bulk_write([
+                UpdateOne({"_id": STATE_ID}, {"$pull": {"lowIds": {"$in": list(self._removed)}}}, upsert=True),
+                UpdateOne({"_id": STATE_ID}, {"$addToSet": {"lowIds": {"$each": list(self._added)}}, "$set": state}, upsert=True),
+            ], ordered=True)
+        self._added.clear()
+        self._removed.clear()
+        self._replace_all = False
+        self._dirty = False
+        self._last_checkpoint = time.monotonic()
+
+    # ---- 事件處理 ----
+
+    def _handle(self, change: Dict[str, Any]):
+        product_id = str(change["documentKey"]["_id"])
+        document = change.get("fullDocument")
+        was_low = product_id in self.low_ids
+        if change["operationType"] == "delete" or document is None:
+            # 已刪除（或 updateLookup 時已被刪除）的產品不再列為低庫存
+            if was_low:
+                self._mark(product_id, False)
+                self._publish("removed", {"_id": product_id})
+            return
+        is_low = (document.get("stock") or 0) <= (document.get("min_stock") or 0)
+        if is_low == was_low:
+            return
+        payload = {
+            "_id": product_id,
+            "name": document.get("name"),
+            "category": document.get("category"),
+            "supplier": document.get("supplier"),
+            "stock": document.get("stock"),
+            "min_stock": document.get("min_stock"),
+        }
+        self._mark(product_id, is_low)
+        self._publish("low" if is_low else "recovered", payload)
+
+    def _publish(self, event: str, data: Dict[str, Any]):
+        data["lowStockCount"] = len(self.low_ids)
+        self.broadcaster.publish(event, data)
+
+    def snapshot_event(self) -> str:
+        return format_event("snapshot", {"lowStockCount": len(self.low_ids), "running": self.running})
+
+    # ---- 主迴圈 ----
+
+    async def _watch(self):
+        options: Dict[str, Any] = {"full_document": "updateLookup"}
+        if self._resume_token is not None:
+            options["resume_after"] = self._resume_token
+        async with self.products.watch(WATCH_PIPELINE, **options) as stream:
+            # 從續傳點繼續且已載入集合時不重建：重播的事件與存檔時的集合比較，停機期間的轉換照常推播
+            if self._resume_token is None or not self._synced:
+                # 先開啟 change stream 再讀取目前狀態，兩者之間的變更不會遺漏
+                await self._rebuild()
+                if self._resume_token is None:
+                    self._resume_token = stream.resume_token
+                self._synced = True
+                self.broadcaster.publish("resync", {"lowStockCount": len(self.low_ids)})
+            self.running = True
+            print("✅ 低庫存監看已啟動（change stream）")
+            while True:
+                change = await stream.try_next()
+                if change is not None:
+                    self._handle(change)
+                    self.events_seen += 1
+                # 沒有事件時也會推進 postBatchResumeToken，避免續傳點過期
+                token = stream.resume_token
+                if token is not None and token != self._resume_token:
+                    self._resume_token = token
+                    self._dirty = True
+                await self._checkpoint()
+                if change is None:
+                    await asyncio.sleep(0.1)
+
+    async def run(self, products: AsyncIOMotorCollection, lease: Optional[LeaderLease] = None):
+        """背景工作：中斷時自動重連，從續傳點繼續；提供 lease 時只在持有租約期間寫回續傳點"""
+        self.products = products
+        self.state = products.database[STATE_COLLECTION]
+        self.lease = lease
+        resumed = await self._load_state()
+        if resumed:
+            print(f"✅ 低庫存監看從續傳點繼續（上次 {len(self.low_ids)} 項低庫存）")
+        try:
+            while True:
+                try:
+                    await self._watch()
+                except OperationFailure as e:
+                    if e.code in CHANGE_STREAM_UNSUPPORTED:
+                        print("⚠️ MongoDB 不是副本集，低庫存監看停用")
+                        return
+                    if e.code in RESUME_FAILED:
+                        print(f"⚠️ 續傳點已失效，重新建立低庫存集合: {e}")
+                        self._resume_token = None
+                        self._synced = False
+                        continue
+                    print(f"❌ 低庫存監看錯誤: {e}")
+                except PyMongoError as e:
+                    print(f"❌ 低庫存監看連線中斷: {e}")
+                self.running = False
+                await asyncio.sleep(RETRY_DELAY)
+        finally:
+            self.running = False
+            try:
+                await self._checkpoint(force=True)
+            except Exception:
+                pass
+
+low_stock_watcher = LowStockWatcher()
@@ -0,0 +1,306 @@
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from services.memory_store import ProductRecord, ProductStore
+
+try:
+    import fcntl
+except ImportError:  # Windows 沒有 flock，不檢查資料目錄是否被其他行程使用
+    fcntl = None
+
+# 持久化設定：未設定 SIMPLE_API_DATA_DIR 時維持純記憶體模式
+DATA_DIR = os.getenv("SIMPLE_API_DATA_DIR")
+FSYNC_INTERVAL = float(os.getenv("SIMPLE_API_FSYNC_INTERVAL", "0.05"))
+COMPACT_BYTES = int(os.getenv("SIMPLE_API_COMPACT_BYTES", str(64 * 1024 * 1024)))
+
+SNAPSHOT_FILE = "snapshot.bin"
+# 持有此檔案的排他鎖代表資料目錄正在使用中（多個 worker 會各自寫入同一份日誌）
+LOCK_FILE = ".lock"
+# 快照：魔術字串 + 1 位元組版本，之後與日誌相同的紀錄格式（第一筆為標頭，其餘每筆一個產品的欄位值）
+# 版本 1 為 pickle 格式，讀取時會執行檔案內容指定的程式碼，已不再支援
+SNAPSHOT_MAGIC = b"PSNAP"
+SNAPSHOT_VERSION = b"2"
+# 日誌紀錄：4 bytes 長度 + 4 bytes CRC32 + JSON
+_HEADER = struct.Struct("<II")
+_ROTATE = object()
+_STOP = object()
+
+def _log_name(sequence: int) -> str:
+    return f"log.{sequence:08d}"
+
+def _encode(entry: Any) -> bytes:
+    payload = json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+def _iter_frames(data: bytes, offset: int = 0) -> Iterator[Tuple[Any, int]]:
+    """逐筆解碼紀錄，回傳 (內容, 結束位置)；遇到不完整或 CRC 不符的紀錄時停止"""
+    while offset + _HEADER.size <= len(data):
+        length, checksum = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return
+        offset = start + length
+        yield json.loads(payload), offset
+
+def read_log(path: str) -> Tuple[List[Dict[str, Any]], int]:
+    """讀取日誌，遇到不完整或損毀的尾端時停止，回傳 (紀錄, 有效長度)"""
+    entries = []
+    valid = 0
+    with open(path, "rb") as f:
+        data = f.read()
+    for entry, valid in _iter_frames(data):
+        entries.append(entry)
+    return entries, valid
+
+def read_snapshot(path: str) -> Dict[str, Any]:
+    """讀取快照，回傳標頭（log_sequence、next_id、fields）與 records；格式或內容不符時拋出 ValueError
+
+    快照以暫存檔寫完後才取代，不應有損毀的尾端，因此任何一筆紀錄無效都視為錯誤。
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    prefix = len(SNAPSHOT_MAGIC)
+    if data[:prefix] != SNAPSHOT_MAGIC:
+        raise ValueError("快照檔案格式錯誤")
+    version = data[prefix:prefix + 1]
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"不支援的快照版本: {version.decode('ascii', 'replace')}（版本 1 的 pickle 快照不再讀取：請以先前版本匯出產品後清空資料目錄）")
+    frames = _iter_frames(data, prefix + 1)
+    first = next(frames, None)
+    if first is None or not isinstance(first[0], dict):
+        raise ValueError("快照標頭損毀")
+    snapshot, end = first
+    records = []
+    for values, end in frames:
+        records.append(values)
+    if len(records) != snapshot.get("count") or end != len(data):
+        raise ValueError(f"快照內容損毀（預期 {snapshot.get('count')} 筆，讀到 {len(records)} 筆）")
+    snapshot["records"] = records
+    return snapshot
+
+def _record_to_product(fields: List[str], values: List[Any]) -> Dict[str, Any]:
+    """將快照中的紀錄欄位轉回 API 格式"""
+    data = dict(zip(fields, values))
+    extra = data.pop("extra", None) or {}
+    data["minStock"] = data.pop("min_stock", None)
+    data.update(extra)
+    return data
+
+class StorePersistence:
+    """ProductStore 的 append-only 變更日誌與定期快照
+
+    寫入先放進佇列，由寫入執行緒批次寫檔並每 fsync_interval 秒 fsync 一次，
+    因此請求不會等待磁碟；當機時最多遺失最後一個批次。日誌超過 compact_bytes
+    時切換到新的日誌段，並由背景執行緒寫出快照後刪除舊日誌段。
+    """
+
+    def __init__(
+        self,
+        store: ProductStore,
+        data_dir: str,
+        fsync_interval: float = FSYNC_INTERVAL,
+        compact_bytes: int = COMPACT_BYTES,
+    ):
+        self.store = store
+        self.data_dir = data_dir
+        self.fsync_interval = fsync_interval
+        self.compact_bytes = compact_bytes
+        self._queue: "queue.Queue" = queue.Queue()
+        self._sequence = 0
+        self._log_bytes = 0
+        self._compacting = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._lock_file = None
+
+    def _acquire_lock(self):
+        """鎖定資料目錄；uvicorn --workers 或 gunicorn -w 啟動多個行程時，第二個行程在此失敗"""
+        if fcntl is None or self._lock_file is not None:
+            return
+        lock_file = open(os.path.join(self.data_dir, LOCK_FILE), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(f"資料目錄 {self.data_dir} 已被另一個行程使用：記憶體後端的資料只存在單一行程內，只能以單一 worker 執行")
+        self._lock_file = lock_file
+
+    # ---- 啟動：從快照與日誌尾端還原 ----
+
+    def load(self) -> Dict[str, int]:
+        """讀取最新快照並重播其後的日誌段"""
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._acquire_lock()
+        restored = 0
+        snapshot_path = os.path.join(self.data_dir, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            snapshot = read_snapshot(snapshot_path)
+            self._sequence = snapshot["log_sequence"]
+            for values in snapshot["records"]:
+                self.store.restore(_record_to_product(snapshot["fields"], values))
+            self.store.next_id = snapshot["next_id"]
+            restored = len(snapshot["records"])
+
+        replayed = 0
+        for sequence in self._log_sequences():
+            if sequence < self._sequence:
+                continue
+            path = os.path.join(self.data_dir, _log_name(sequence))
+            entries, valid = read_log(path)
+            for entry in entries:
+                self._apply(entry)
+            replayed += len(entries)
+            # 截掉損毀的尾端，之後從有效位置繼續寫
+            if valid < os.path.getsize(path):
+                with open(path, "r+b") as f:
+                    f.truncate(valid)
+            self._sequence = sequence
+            self._log_bytes = valid
+        return {"snapshotRecords": restored, "replayedEntries": replayed}
+
+    def _log_sequences(self) -> List[int]:
+        sequences = []
+        for name in os.listdir(self.data_dir):
+            if name.startswith("log.") and name[4:].isdigit():
+                sequences.append(int(name[4:]))
+        return sorted(sequences)
+
+    def _apply(self, entry: Dict[str, Any]):
+        op = entry["op"]
+        if op == "put":
+            self.store.restore(entry["product"])
+        elif op == "del":
+            self.store.delete(entry["id"])
+        elif op == "clear":
+            self.store.clear()
+
+    # ---- 執行期：記錄變更 ----
+
+    def start(self):
+        """開始記錄變更並啟動寫入執行緒（需在 load 之後呼叫）"""
+        self.store.journal = self
+        self._writer = threading.Thread(
+            target=self._write_loop, args=(self._sequence,), name="store-log-writer", daemon=True
+        )
+        self._writer.start()
+
+    def put(self, product: Dict[str, Any]):
+        self._append({"op": "put", "product": product})
+
+    def delete(self, product_id: str):
+        self._append({"op": "del", "id": product_id})
+
+    def clear(self):
+        self._append({"op": "clear"})
+
+    def _append(self, entry: Dict[str, Any]):
+        record = _encode(entry)
+        self._queue.put(record)
+        self._log_bytes += len(record)
+        if self._log_bytes >= self.compact_bytes and not self._compacting.locked():
+            self._start_compaction()
+
+    def _start_compaction(self):
+        """切換日誌段並在背景寫出快照；只在事件迴圈執行緒複製紀錄清單"""
+        self._compacting.acquire()
+        self._sequence += 1
+        self._log_bytes = 0
+        self._queue.put(_ROTATE)
+        records = list(self.store.records())
+        threading.Thread(
+            target=self._compact,
+            args=(records, self.store.next_id, self._sequence),
+            name="store-compactor",
+            daemon=True
+        ).start()
+
+    def _compact(self, records: List[ProductRecord], next_id: int, sequence: int):
+        """寫出快照（覆蓋 sequence 之前的所有日誌段）後刪除舊日誌段
+
+        複製清單後仍被修改的紀錄，其變更已寫在新的日誌段，重播時會覆蓋快照內容。
+        """
+        try:
+            fields = list(ProductRecord.__slots__)
+            header = {"log_sequence": sequence, "next_id": next_id, "fields": fields, "count": len(records)}
+            path = os.path.join(self.data_dir, SNAPSHOT_FILE)
+            temp_path = path + ".tmp"
+            with open(temp_path, "wb") as f:
+                f.write(SNAPSHOT_MAGIC + SNAPSHOT_VERSION)
+                f.write(_encode(header))
+                # 逐筆寫出，不在記憶體中組出整份快照
+                for record in records:
+                    f.write(_encode([getattr(record, name) for name in fields]))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+            for old in self._log_sequences():
+                if old < sequence:
+                    os.remove(os.path.join(self.data_dir, _log_name(old)))
+        except Exception as e:
+            print(f"❌ 快照寫入失敗: {e}")
+        finally:
+            self._compacting.release()
+
+    def _write_loop(self, sequence: int):
+        """批次寫入日誌並定期 fsync"""
+        log = open(os.path.join(self.data_dir, _log_name(sequence)), "ab")
+        last_sync = time.monotonic()
+        dirty = False
+        try:
+            while True:
+                timeout = max(0.0, self.fsync_interval - (time.monotonic() - last_sync)) if dirty else None
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                # 一次取出佇列中所有已到達的紀錄
+                batch = [] if item is None else [item]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                stop = False
+                for entry in batch:
+                    if entry is _STOP:
+                        stop = True
+                    elif entry is _ROTATE:
+                        log.flush()
+                        os.fsync(log.fileno())
+                        log.close()
+                        sequence += 1
+                        log = open(os.path.join(self.data_dir, _log_name(sequence)), "ab")
+                    else:
+                        log.write(entry)
+                        dirty = True
+
+                if dirty and (stop or time.monotonic() - last_sync >= self.fsync_interval):
+                    log.flush()
+                    os.fsync(log.fileno())
+                    last_sync = time.monotonic()
+                    dirty = False
+                if stop:
+                    break
+        finally:
+            log.close()
+
+    def close(self):
+        """寫完佇列中剩餘的紀錄並停止寫入執行緒"""
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join()
+            self._writer = None
+        self.store.journal = None
+        # 等待進行中的快照完成
+        with self._compacting:
+            pass
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
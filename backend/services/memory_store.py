@@ -0,0 +1,215 @@
+import secrets
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+from services.inventory_counters import InventoryCounters
+from services.text_index import InvertedIndex
+
+# 固定欄位（API 名稱 -> 紀錄屬性）；其他欄位（如 sku、status）放在 extra
+_FIELDS = {
+    "name": "name",
+    "description": "description",
+    "category": "category",
+    "price": "price",
+    "stock": "stock",
+    "minStock": "min_stock",
+    "supplier": "supplier",
+}
+# 輸入也接受 MongoDB 模型的 snake_case 名稱（與 Product 相同）
+_INPUT_FIELDS = {**_FIELDS, "min_stock": "min_stock"}
+# 由儲存層維護、不接受用戶端覆寫的欄位
+_RESERVED = {"id", "_id", "created_at", "updated_at"}
+SEARCH_FIELDS = ("name", "description", "category", "supplier")
+
+class ProductRecord:
+    """單一產品紀錄，使用 __slots__ 降低大量產品時的記憶體用量"""
+    __slots__ = (
+        "id", "name", "description", "category", "price", "stock",
+        "min_stock", "supplier", "created_at", "updated_at", "extra"
+    )
+
+    def __init__(self, product_id: str, data: Dict[str, Any], now: str):
+        self.id = product_id
+        self.extra: Optional[Dict[str, Any]] = None
+        for attr in _FIELDS.values():
+            setattr(self, attr, None)
+        self.created_at = now
+        self.updated_at = now
+        self.apply(data)
+
+    def apply(self, data: Dict[str, Any]):
+        for key, value in data.items():
+            if key in _RESERVED:
+                continue
+            attr = _INPUT_FIELDS.get(key)
+            if attr is not None:
+                setattr(self, attr, value)
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {"id": self.id, "_id": self.id}
+        for key, attr in _FIELDS.items():
+            result[key] = getattr(self, attr)
+        if self.extra:
+            result.update(self.extra)
+        result["created_at"] = self.created_at
+        result["updated_at"] = self.updated_at
+        return result
+
+class ProductStore:
+    """記憶體產品儲存：dict 主索引、類別/供應商次索引、單調遞增 ID，並同步維護統計與搜尋索引"""
+
+    def __init__(self):
+        self._records: Dict[str, ProductRecord] = {}
+        self._by_category: Dict[Any, Set[str]] = {}
+        self._by_supplier: Dict[Any, Set[str]] = {}
+        self._next_id = 1
+        self.counters = InventoryCounters(min_stock_key="minStock")
+        self.search_index = InvertedIndex()
+        # 變更日誌（持久化時設定，需提供 put/delete/clear）
+        self.journal = None
+        # 每次變更遞增的版本，供列表與統計的 ETag 使用；epoch 區分不同行程
+        self.epoch = secrets.token_hex(4)
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._records
+
+    def etag(self) -> str:
+        return f'"products-{self.epoch}-{self.version}"'
+
+    def allocate_id(self) -> str:
+        """單調遞增的 ID，刪除後也不會重複"""
+        product_id = str(self._next_id)
+        self._next_id += 1
+        return product_id
+
+    @staticmethod
+    def _add_to(index: Dict[Any, Set[str]], key: Any, product_id: str):
+        index.setdefault(key, set()).add(product_id)
+
+    @staticmethod
+    def _remove_from(index: Dict[Any, Set[str]], key: Any, product_id: str):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(product_id)
+            if not ids:
+                del index[key]
+
+    def _index(self, record: ProductRecord):
+        self._add_to(self._by_category, record.category, record.id)
+        self._add_to(self._by_supplier, record.supplier, record.id)
+        self.search_index.add(record.id, (str(getattr(record, f) or "") for f in SEARCH_FIELDS))
+
+    def _unindex(self, record: ProductRecord):
+        self._remove_from(self._by_category, record.category, record.id)
+        self._remove_from(self._by_supplier, record.supplier, record.id)
+        self.search_index.remove(record.id)
+
+    def create(self, data: Dict[str, Any], product_id: Optional[str] = None) -> Dict[str, Any]:
+        """新增產品並回傳完整資料"""
+        record = ProductRecord(product_id or self.allocate_id(), data, datetime.now().isoformat())
+        self._records[record.id] = record
+        self._index(record)
+        product = record.to_dict()
+        self.counters.apply(None, product)
+        self.version += 1
+        if self.journal:
+            self.journal.put(product)
+        return product
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        record = self._records.get(product_id)
+        return record.to_dict() if record else None
+
+    def update(self, product_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """部分更新產品，不存在時回傳 None"""
+        record = self._records.get(product_id)
+        if record is None:
+            return None
+        before = record.to_dict()
+        self._unindex(record)
+        record.apply(data)
+        record.updated_at = datetime.now().isoformat()
+        self._index(record)
+        product = record.to_dict()
+        self.counters.apply(before, product)
+        self.version += 1
+        if self.journal:
+            self.journal.put(product)
+        return product
+
+    def delete(self, product_id: str) -> bool:
+        record = self._records.pop(product_id, None)
+        if record is None:
+            return False
+        self._unindex(record)
+        self.counters.apply(record.to_dict(), None)
+        self.version += 1
+        if self.journal:
+            self.journal.delete(product_id)
+        return True
+
+    def clear(self):
+        """清空所有產品（ID 分配器不重設）"""
+        self._records.clear()
+        self._by_category.clear()
+        self._by_supplier.clear()
+        self.search_index.clear()
+        self.counters.reset()
+        self.version += 1
+        if self.journal:
+            self.journal.clear()
+
+    def restore(self, product: Dict[str, Any]):
+        """以完整資料（含 ID 與時間戳）放回產品，用於從快照/日誌還原"""
+        product_id = str(product["id"])
+        existing = self._records.get(product_id)
+        before = existing.to_dict() if existing else None
+        if existing:
+            self._unindex(existing)
+        record = ProductRecord(product_id, product, product.get("created_at"))
+        record.updated_at = product.get("updated_at")
+        self._records[product_id] = record
+        self._index(record)
+        self.counters.apply(before, record.to_dict())
+        self.version += 1
+        if product_id.isdigit():
+            self._next_id = max(self._next_id, int(product_id) + 1)
+
+    @property
+    def next_id(self) -> int:
+        return self._next_id
+
+    @next_id.setter
+    def next_id(self, value: int):
+        self._next_id = max(self._next_id, value)
+
+    def list(self, category: Optional[str] = None, supplier: Optional[str] = None) -> List[Dict[str, Any]]:
+        """列出產品，類別/供應商篩選走次索引而非全表掃描"""
+        if category is None and supplier is None:
+            return [record.to_dict() for record in self._records.values()]
+        candidates: Optional[Set[str]] = None
+        for index, key in ((self._by_category, category), (self._by_supplier, supplier)):
+            if key is None:
+                continue
+            ids = index.get(key, set())
+            candidates = ids if candidates is None else candidates & ids
+        return [self._records[i].to_dict() for i in sorted(candidates, key=_id_order)]
+
+    def search(self, query: str, limit: int = 20, prefix: bool = True) -> List[Dict[str, Any]]:
+        return [self._records[i].to_dict() for i in self.search_index.search(query, limit=limit, prefix=prefix)]
+
+    def stats(self) -> Dict[str, Any]:
+        return self.counters.stats()
+
+    def records(self) -> Iterable[ProductRecord]:
+        return self._records.values()
+
+def _id_order(product_id: str):
+    return (len(product_id), product_id)
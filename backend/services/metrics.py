@@ -0,0 +1,283 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from pymongo import monitoring
+
+# 延遲分桶（秒）：涵蓋 0.5ms 到 10s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Tuple[Any, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        # PyMongo 監聽器在驅動的執行緒中呼叫，需加鎖
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple[Any, ...], float] = {}
+
+    def inc(self, *labels: Any, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.label_names, key)} {value}" for key, value in items]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: Any, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        # 每組標籤：[各分桶計數..., +Inf 計數, 總和]
+        self._values: Dict[Tuple[Any, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: Any):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0] * (len(self.buckets) + 2)
+            row[index] += 1
+            row[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(row)) for key, row in self._values.items()]
+        lines = self.header()
+        for key, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            cumulative += row[len(self.buckets)]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {row[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus 文字格式（text/plain; version=0.0.4）"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# ---- HTTP ----
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP 請求數", ("method", "route", "status")))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP 請求處理時間", ("method", "route")))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "HTTP 回應大小", ("method", "route"), buckets=SIZE_BUCKETS))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "處理中的 HTTP 請求數"))
+
+class MetricsMiddleware:
+    """ASGI 中介層：記錄各路由的延遲、回應大小與處理中請求數
+
+    路由標籤使用路徑範本（如 /api/products/{product_id}），未匹配的路徑統一記為
+    unmatched，避免標籤數量無限增長。串流回應的時間算到最後一個區塊送出為止。
+    """
+
+    def __init__(self, app, route_of: Callable[[Any], Optional[str]]):
+        self.app = app
+        self.route_of = route_of
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            route = self.route_of(scope.get("endpoint")) or "unmatched"
+            method = scope["method"]
+            http_requests.inc(method, route, status_code)
+            http_latency.observe(time.perf_counter() - start, method, route)
+            http_response_size.observe(size, method, route)
+
+def endpoint_routes(app) -> Callable[[Any], Optional[str]]:
+    """endpoint 函式 -> 路徑範本（第一次查詢時建立對照表）"""
+    mapping: Dict[Any, str] = {}
+
+    def route_of(endpoint) -> Optional[str]:
+        if endpoint is None:
+            return None
+        if not mapping:
+            for route in app.routes:
+                if hasattr(route, "endpoint"):
+                    mapping.setdefault(route.endpoint, route.path)
+        return mapping.get(endpoint)
+
+    return route_of
+
+# ---- MongoDB ----
+
+mongo_latency = registry.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB 指令延遲", ("command", "collection")))
+mongo_failures = registry.register(Counter(
+    "mongodb_command_failures_total", "MongoDB 指令失敗數", ("command", "collection")))
+mongo_documents = registry.register(Counter(
+    "mongodb_documents_returned_total", "MongoDB 回傳的文件數", ("command", "collection")))
+pool_wait = registry.register(Histogram(
+    "mongodb_pool_checkout_wait_seconds", "從連線池取得連線的等待時間", ("address",)))
+pool_checked_out = registry.register(Gauge(
+    "mongodb_pool_connections_checked_out", "目前借出的連線數", ("address",)))
+pool_checkout_failures = registry.register(Counter(
+    "mongodb_pool_checkout_failures_total", "取得連線失敗數", ("address", "reason")))
+
+# 不記錄的內部指令（連線握手與心跳）
+_IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "saslStart", "saslContinue", "ping", "endSessions"}
+
+class CommandMetrics(monitoring.CommandListener):
+    """依指令與集合記錄延遲、失敗數與回傳文件數"""
+
+    def __init__(self):
+        self._pending: Dict[Tuple[Any, int], Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name in _IGNORED_COMMANDS:
+            return
+        command = event.command
+        collection = command.get("collection") if event.command_name == "getMore" else command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = "-"
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (event.command_name, collection)
+
+    def _finish(self, event) -> Optional[Tuple[str, str]]:
+        with self._lock:
+            labels = self._pending.pop((event.connection_id, event.request_id), None)
+        if labels is not None:
+            mongo_latency.observe(event.duration_micros / 1_000_000, *labels)
+        return labels
+
+    def succeeded(self, event):
+        labels = self._finish(event)
+        if labels is None:
+            return
+        cursor = event.reply.get("cursor")
+        if isinstance(cursor, dict):
+            batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+            if batch:
+                mongo_documents.inc(*labels, amount=len(batch))
+        elif "value" in event.reply and event.reply.get("value") is not None:
+            # findAndModify
+            mongo_documents.inc(*labels)
+
+    def failed(self, event):
+        labels = self._finish(event)
+        if labels is not None:
+            mongo_failures.inc(*labels)
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """連線池取得連線的等待時間與借出數量
+
+    check-out 的開始與完成在同一個執行緒中同步發生，以 thread-local 計時。
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _address(self, event) -> str:
+        return "%s:%s" % event.address
+
+    def connection_check_out_started(self, event):
+        self._local.start = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        start = getattr(self._local, "start", None)
+        if start is not None:
+            pool_wait.observe(time.perf_counter() - start, self._address(event))
+            self._local.start = None
+        pool_checked_out.inc(self._address(event))
+
+    def connection_check_out_failed(self, event):
+        self._local.start = None
+        pool_checkout_failures.inc(self._address(event), event.reason)
+
+    def connection_checked_in(self, event):
+        pool_checked_out.dec(self._address(event))
+
+    # 以下事件不需要記錄
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+def mongo_listeners() -> List[Any]:
+    return [CommandMetrics(), PoolMetrics()]
@@ -0,0 +1,99 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+# 每頁預設與最大筆數
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def parse_sort(sort: str, allowed: List[str]) -> Tuple[str, int]:
+    """解析排序參數，例如 "price" 或 "-updated_at" """
+    direction = DESCENDING if sort.startswith("-") else ASCENDING
+    field = sort.lstrip("-+")
+    if field not in allowed:
+        raise ValueError(f"不支援的排序欄位: {field}，可用欄位: {', '.join(allowed)}")
+    return field, direction
+
+def _encode_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, datetime):
+        return {"t": "dt", "v": value.isoformat()}
+    if isinstance(value, ObjectId):
+        return {"t": "oid", "v": str(value)}
+    return {"t": "raw", "v": value}
+
+def _decode_value(data: Dict[str, Any]) -> Any:
+    if data["t"] == "dt":
+        return datetime.fromisoformat(data["v"])
+    if data["t"] == "oid":
+        return ObjectId(data["v"])
+    return data["v"]
+
+def encode_cursor(document: Dict[str, Any], sort_field: str) -> str:
+    """以最後一筆文件的排序值與 _id 產生不透明的游標字串"""
+    payload = {"id": str(document["_id"])}
+    if sort_field != "_id":
+        payload["s"] = _encode_value(document.get(sort_field))
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """解析游標字串，格式錯誤時拋出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        result = {"_id": ObjectId(payload["id"])}
+        if "s" in payload:
+            result["value"] = _decode_value(payload["s"])
+        return result
+    except Exception:
+        raise ValueError("無效的分頁游標")
+
+def keyset_filter(cursor: Optional[str], sort_field: str, direction: int) -> Dict[str, Any]:
+    """依游標產生 keyset 查詢條件（排序值相同時以 _id 決定先後）"""
+    if not cursor:
+        return {}
+    position = decode_cursor(cursor)
+    op = "$gt" if direction == ASCENDING else "$lt"
+    if sort_field == "_id":
+        return {"_id": {op: position["_id"]}}
+    if "value" not in position:
+        raise ValueError("分頁游標與排序欄位不符")
+    value = position["value"]
+    return {
+        "$or": [
+            {sort_field: {op: value}},
+            {sort_field: value, "_id": {op: position["_id"]}},
+        ]
+    }
+
+def sort_spec(sort_field: str, direction: int) -> List[Tuple[str, int]]:
+    """排序條件，永遠以 _id 作為次要排序以保證順序穩定"""
+    if sort_field == "_id":
+        return [("_id", direction)]
+    return [(sort_field, direction), ("_id", direction)]
+
+def parse_fields(fields: Optional[str], allowed: List[str]) -> Optional[Dict[str, int]]:
+    """解析以逗號分隔的欄位投影參數"""
+    if not fields:
+        return None
+    projection = {}
+    for name in fields.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in allowed:
+            raise ValueError(f"不支援的欄位: {name}")
+        projection[name] = 1
+    return projection or None
+
+def combine_filters(*filters: Dict[str, Any]) -> Dict[str, Any]:
+    """合併多個查詢條件"""
+    parts = [f for f in filters if f]
+    if not parts:
+        return {}
+    if len(parts) == 1:
+        return parts[0]
+    return {"$and": parts}
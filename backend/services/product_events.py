@@ -0,0 +1,44 @@
+import inspect
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+# 產品變更事件：create / update / delete 帶單筆文件；reset 代表大量變更（重新生成、批量匯入）
+ProductListener = Callable[[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]], Union[None, Awaitable[None]]]
+
+_listeners: List[ProductListener] = []
+
+def subscribe(listener: ProductListener):
+    """註冊產品變更監聽器"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+def unsubscribe(listener: ProductListener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+def event_document(product: Any) -> Optional[Dict[str, Any]]:
+    """將 Product 或原始文件轉為事件用的 dict（_id 為字串）"""
+    if product is None:
+        return None
+    if isinstance(product, dict):
+        document = dict(product)
+    else:
+        document = product.model_dump(by_alias=True)
+    if "_id" not in document and "id" in document:
+        document["_id"] = document.pop("id")
+    if document.get("_id") is not None:
+        document["_id"] = str(document["_id"])
+    return document
+
+async def publish(op: str, before: Any = None, after: Any = None):
+    """通知所有監聽器；單一監聽器失敗不影響請求"""
+    await notify(_listeners, op, event_document(before), event_document(after))
+
+async def notify(listeners: List[ProductListener], op: str, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+    """依序呼叫監聽器（可為同步或非同步）；單一監聽器失敗只記錄錯誤"""
+    for listener in list(listeners):
+        try:
+            result = listener(op, before, after)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            print(f"❌ 產品事件處理失敗 ({getattr(listener, '__qualname__', listener)}): {e}")
@@ -0,0 +1,235 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from models.product import ProductRow
+from services.json_response import dumps
+
+# 匯出/匯入欄位順序（CSV 標頭）
+EXPORT_FIELDS = [
+    "_id", "name", "description", "category", "price", "stock",
+    "min_stock", "supplier", "created_at", "updated_at"
+]
+# 回應中最多列出的錯誤筆數
+MAX_REPORTED_ERRORS = 1000
+# 重複鍵錯誤碼
+DUPLICATE_KEY_ERROR = 11000
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """將串流位元組切成行，不一次讀入整個請求"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+async def iter_ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """逐行解析 NDJSON，回傳 (行號, dict 或錯誤訊息)"""
+    row_number = 0
+    async for line in _iter_lines(chunks):
+        row_number += 1
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("每行必須是 JSON 物件")
+            yield row_number, row
+        except ValueError as e:
+            yield row_number, f"JSON 格式錯誤: {e}"
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """逐列解析 CSV（第一列為標頭），支援引號內的換行"""
+    header: Optional[List[str]] = None
+    pending = ""
+    row_number = 0
+    async for line in _iter_lines(chunks):
+        pending = f"{pending}\n{line}" if pending else line
+        # 引號數為奇數代表欄位跨行，繼續累積
+        if pending.count('"') % 2 == 1:
+            continue
+        text, pending = pending, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, f"欄位數量不符：預期 {len(header)} 個，實際 {len(values)} 個"
+            continue
+        # 空字串視為未提供
+        yield row_number, {key: value for key, value in zip(header, values) if value != "" and key != "_id"}
+    if pending:
+        yield row_number + 1, "CSV 引號未閉合"
+
+def validate_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """以 ProductRow 模型驗證單列資料，回傳可寫入資料庫的欄位"""
+    row = {key: value for key, value in row.items() if key not in ("_id", "id", "revision_id")}
+    return ProductRow(**row).model_dump()
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
+
+Rows = List[Tuple[int, Dict[str, Any]]]
+Errors = List[Tuple[int, str]]
+
+def validate_rows(rows: Rows) -> Tuple[Rows, Errors]:
+    """驗證一批 (行號, 原始列)，回傳 (通過的列, 錯誤)；只依賴 pydantic，可送到工作行程執行"""
+    valid: Rows = []
+    errors: Errors = []
+    for row_number, row in rows:
+        try:
+            valid.append((row_number, validate_row(row)))
+        except ValidationError as e:
+            errors.append((row_number, _validation_message(e)))
+    return valid, errors
+
+def _upsert_operation(document: Dict[str, Any]) -> UpdateOne:
+    """以 name + supplier 作為自然鍵的 upsert"""
+    created_at = document.pop("created_at")
+    document["updated_at"] = datetime.now()
+    return UpdateOne(
+        {"name": document["name"], "supplier": document["supplier"]},
+        {"$set": document, "$setOnInsert": {"created_at": created_at}},
+        upsert=True
+    )
+
+class BulkImportResult:
+    """批量匯入結果與逐列錯誤"""
+
+    def __init__(self):
+        self.received = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def add_error(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errorsTruncated": self.failed > len(self.errors),
+        }
+
+async def _write_chunk(
+    collection: AsyncIOMotorCollection,
+    chunk: List[Tuple[int, Dict[str, Any]]],
+    result: BulkImportResult
+):
+    # 同一批次內相同自然鍵只保留最後一筆，避免無序寫入時重複插入
+    latest: Dict[Tuple[str, str], Tuple[int, Dict[str, Any]]] = {}
+    for row_number, document in chunk:
+        latest[(document["name"], document["supplier"])] = (row_number, document)
+    result.updated += len(chunk) - len(latest)
+
+    rows = list(latest.values())
+    operations = [_upsert_operation(document) for _, document in rows]
+    try:
+        outcome = await collection.bulk_write(operations, ordered=False)
+        details = outcome.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        for error in details.get("writeErrors", []):
+            if error.get("code") == DUPLICATE_KEY_ERROR:
+                # 另一個並行匯入在 upsert 比對與插入之間插入了相同的自然鍵
+                message = "相同 name + supplier 的產品正被同時寫入，請重新匯入此列"
+            else:
+                message = error.get("errmsg", "寫入失敗")
+            result.add_error(rows[error["index"]][0], message)
+    result.inserted += details.get("nUpserted", 0)
+    result.updated += details.get("nMatched", 0)
+
+async def _validate_inline(rows: Rows) -> Tuple[Rows, Errors]:
+    return validate_rows(rows)
+
+async def bulk_upsert_products(
+    collection: AsyncIOMotorCollection,
+    rows: AsyncIterator[Tuple[int, Any]],
+    chunk_size: int = 1000,
+    validate: Callable[[Rows], Awaitable[Tuple[Rows, Errors]]] = _validate_inline
+) -> BulkImportResult:
+    """分批驗證並以無序 bulk_write upsert 寫入，單列錯誤不會中斷整批
+
+    validate 可替換為在行程池中執行 validate_rows 的版本。
+    """
+    result = BulkImportResult()
+    chunk: Rows = []
+
+    async def flush():
+        valid, errors = await validate(chunk)
+        for row_number, error in errors:
+            result.add_error(row_number, error)
+        if valid:
+            await _write_chunk(collection, valid, result)
+
+    async for row_number, row in rows:
+        result.received += 1
+        if isinstance(row, str):
+            result.add_error(row_number, row)
+            continue
+        chunk.append((row_number, row))
+        if len(chunk) >= chunk_size:
+            await flush()
+            chunk = []
+    if chunk:
+        await flush()
+    return result
+
+def _export_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None:
+        return ""
+    return str(value) if not isinstance(value, (int, float, str)) else value
+
+async def stream_ndjson(cursor, rows_per_chunk: int = 500) -> AsyncIterator[bytes]:
+    """從 Motor 游標逐批輸出 NDJSON"""
+    lines: List[bytes] = []
+    async for document in cursor:
+        lines.append(dumps(document))
+        if len(lines) >= rows_per_chunk:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+async def stream_csv(cursor, rows_per_chunk: int = 500) -> AsyncIterator[bytes]:
+    """從 Motor 游標逐批輸出 CSV（含 BOM 方便 Excel 開啟中文）"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+
+    count = 0
+    async for document in cursor:
+        writer.writerow([_export_value(document.get(field)) for field in EXPORT_FIELDS])
+        count += 1
+        if count >= rows_per_chunk:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    if count:
+        yield buffer.getvalue().encode("utf-8")
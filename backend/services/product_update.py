@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from services.compression import strip_encoding
+
+class PreconditionFailedError(Exception):
+    """If-Match 與目前版本不符"""
+
+def product_etag(updated_at: datetime) -> str:
+    """以 updated_at 作為版本；MongoDB 只保存到毫秒，ETag 也取到毫秒"""
+    return f'"{updated_at.isoformat(timespec="milliseconds")}"'
+
+def parse_if_match(header: Optional[str]) -> Optional[datetime]:
+    """解析 If-Match；未提供或為 * 時回傳 None（不檢查版本）"""
+    if header is None:
+        return None
+    value = header.strip()
+    if value == "*":
+        return None
+    if value.startswith("W/"):
+        value = value[2:]
+    value = strip_encoding(value)
+    try:
+        return datetime.fromisoformat(value.strip('"'))
+    except ValueError:
+        raise PreconditionFailedError("If-Match 格式錯誤")
+
+def _truncate_ms(value: datetime) -> datetime:
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+async def update_product_fields(
+    collection: AsyncIOMotorCollection,
+    product_id: str,
+    fields: Dict[str, Any],
+    expected_updated_at: Optional[datetime] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """以單一 find_one_and_update($set) 更新指定欄位，回傳 (變更前, 變更後) 文件"""
+    if not ObjectId.is_valid(product_id):
+        raise LookupError("產品不存在")
+    query: Dict[str, Any] = {"_id": ObjectId(product_id)}
+    now = _truncate_ms(datetime.now())
+    if expected_updated_at is not None:
+        query["updated_at"] = expected_updated_at
+        # 同一毫秒內連續更新時仍要產生不同的版本
+        if now <= expected_updated_at:
+            now = expected_updated_at + timedelta(milliseconds=1)
+    changes = dict(fields, updated_at=now)
+    update: Any = {"$set": changes}
+    if "stock" in changes or "min_stock" in changes:
+        # 更新管線：以更新後的 stock/min_stock 重算 reorder_gap（值以 $literal 包住，避免字串被當成欄位路徑）
+        update = [
+            {"$set": {key: {"$literal": value} for key, value in changes.items()}},
+            {"$set": {"reorder_gap": {"$subtract": ["$min_stock", "$stock"]}}},
+        ]
+
+    before = await collection.find_one_and_update(
+        query,
+        update,
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        if expected_updated_at is not None and await collection.count_documents({"_id": query["_id"]}, limit=1):
+            raise PreconditionFailedError("產品已被其他請求修改")
+        raise LookupError("產品不存在")
+    after = {**before, **changes}
+    if isinstance(update, list):
+        after["reorder_gap"] = after["min_stock"] - after["stock"]
+    return before, after
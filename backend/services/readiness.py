@@ -0,0 +1,77 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Dict, Optional
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+class Readiness:
+    """啟動步驟的狀態；必要步驟全部完成前 /readyz 回傳 503，不把流量導向尚未暖機的 worker"""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.ready_at: Optional[float] = None
+        self.draining = False
+        self._steps: Dict[str, Dict[str, Any]] = {}
+
+    def _step(self, name: str, required: bool) -> Dict[str, Any]:
+        step = {"status": PENDING, "required": required, "seconds": None, "error": None}
+        self._steps[name] = step
+        return step
+
+    def mark_done(self, name: str, required: bool = True):
+        """記錄已同步完成的步驟"""
+        self._step(name, required).update(status=DONE, seconds=0.0)
+        self._check_ready()
+
+    def track(self, name: str, awaitable: Awaitable[Any], required: bool = True) -> "asyncio.Task":
+        """在背景執行啟動步驟並記錄結果與耗時；非必要步驟失敗不影響就緒"""
+        step = self._step(name, required)
+
+        async def run():
+            start = time.perf_counter()
+            try:
+                result = await awaitable
+                step["status"] = DONE
+                return result
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                step.update(status=FAILED, error=str(e))
+                print(f"❌ 啟動步驟 {name} 失敗: {e}")
+            finally:
+                step["seconds"] = round(time.perf_counter() - start, 3)
+                self._check_ready()
+
+        return asyncio.create_task(run())
+
+    def _check_ready(self):
+        if self.ready_at is None and self.ready:
+            self.ready_at = time.monotonic()
+            print(f"✅ 啟動完成，可接收流量（{self.ready_at - self.started_at:.2f}s）")
+
+    @property
+    def ready(self) -> bool:
+        # 尚未執行 lifespan（沒有任何步驟）時也視為未就緒
+        return bool(self._steps) and not self.draining and all(
+            step["status"] == DONE for step in self._steps.values() if step["required"]
+        )
+
+    @property
+    def failed(self) -> bool:
+        """必要步驟失敗時不會自行恢復，需要重新啟動"""
+        return any(step["status"] == FAILED for step in self._steps.values() if step["required"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.draining:
+            state = "draining"
+        elif self.ready:
+            state = "ready"
+        else:
+            state = "failed" if self.failed else "starting"
+        return {
+            "status": state,
+            "startupSeconds": None if self.ready_at is None else round(self.ready_at - self.started_at, 3),
+            "steps": self._steps,
+        }
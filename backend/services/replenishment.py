@@ -0,0 +1,149 @@
+import math
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, DESCENDING
+from services.json_response import dumps
+
+# 預設補貨目標：補到 min_stock × 倍數
+REPLENISH_TARGET_MULTIPLIER = float(os.getenv("REPLENISH_TARGET_MULTIPLIER", "2"))
+# 單張採購單最多的明細數；同一供應商超過時拆成多張（記憶體只保留目前這一張）
+MAX_LINES_PER_ORDER = 1000
+PLAN_BATCH_SIZE = 5000
+PURCHASE_ORDERS_COLLECTION = "purchase_orders"
+
+# 與 replenishment 部分索引的 partialFilterExpression 相同，查詢才能使用該索引
+LOW_STOCK_QUERY = {"reorder_gap": {"$gte": 0}}
+_PROJECTION = {"name": 1, "category": 1, "supplier": 1, "stock": 1, "min_stock": 1, "price": 1}
+
+async def backfill_reorder_gap(collection: AsyncIOMotorCollection) -> int:
+    """替缺少 reorder_gap 的舊文件補上欄位（以更新管線在伺服器端計算），回傳更新筆數"""
+    result = await collection.update_many(
+        {"reorder_gap": {"$exists": False}},
+        [{"$set": {"reorder_gap": {"$subtract": ["$min_stock", "$stock"]}}}]
+    )
+    return result.modified_count
+
+def order_quantity(stock: int, min_stock: int, multiplier: float, minimum: int) -> int:
+    """補到 ceil(min_stock × multiplier)，至少 minimum 件"""
+    return max(math.ceil(min_stock * multiplier) - stock, minimum)
+
+class PlanTotals:
+    """整份規劃與各供應商的合計（逐張採購單累加）"""
+
+    def __init__(self):
+        self.orders = 0
+        self.lines = 0
+        self.units = 0
+        self.cost = 0.0
+        self.by_supplier: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, order: Dict[str, Any]):
+        self.orders += 1
+        self.lines += order["lineCount"]
+        self.units += order["totalUnits"]
+        self.cost += order["totalCost"]
+        entry = self.by_supplier.setdefault(order["supplier"], {"supplier": order["supplier"], "orders": 0, "lines": 0, "units": 0, "cost": 0.0})
+        entry["orders"] += 1
+        entry["lines"] += order["lineCount"]
+        entry["units"] += order["totalUnits"]
+        entry["cost"] += order["totalCost"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "orders": self.orders,
+            "lines": self.lines,
+            "totalUnits": self.units,
+            "totalCost": self.cost,
+            "bySupplier": list(self.by_supplier.values()),
+        }
+
+def _order(supplier: str, sequence: int, lines: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "supplier": supplier,
+        "sequence": sequence,
+        "lineCount": len(lines),
+        "totalUnits": sum(line["quantity"] for line in lines),
+        "totalCost": sum(line["cost"] for line in lines),
+        "lines": lines,
+    }
+
+async def plan_orders(
+    collection: AsyncIOMotorCollection,
+    multiplier: float = REPLENISH_TARGET_MULTIPLIER,
+    minimum: int = 1,
+    category: Optional[str] = None,
+    supplier: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """單次走訪 replenishment 部分索引（依供應商排序），逐張產生採購單草稿
+
+    只讀取需要補貨的產品；游標已依供應商排序，因此任何時候只需保留一張採購單的明細。
+    """
+    query: Dict[str, Any] = dict(LOW_STOCK_QUERY)
+    if category:
+        query["category"] = category
+    if supplier:
+        query["supplier"] = supplier
+    cursor = collection.find(query, _PROJECTION).sort(
+        [("supplier", ASCENDING), ("reorder_gap", DESCENDING)]
+    ).batch_size(PLAN_BATCH_SIZE)
+
+    current: Optional[str] = None
+    sequence = 0
+    lines: List[Dict[str, Any]] = []
+    async for product in cursor:
+        if product["supplier"] != current or len(lines) >= MAX_LINES_PER_ORDER:
+            if lines:
+                yield _order(current, sequence, lines)
+            sequence = sequence + 1 if product["supplier"] == current else 1
+            current = product["supplier"]
+            lines = []
+        quantity = order_quantity(product["stock"], product["min_stock"], multiplier, minimum)
+        price = product.get("price") or 0
+        lines.append({
+            "_id": str(product["_id"]),
+            "name": product.get("name"),
+            "category": product.get("category"),
+            "stock": product["stock"],
+            "min_stock": product["min_stock"],
+            "price": price,
+            "quantity": quantity,
+            "cost": quantity * price,
+        })
+    if lines:
+        yield _order(current, sequence, lines)
+
+async def stream_plan(orders: AsyncIterator[Dict[str, Any]], policy: Dict[str, Any]) -> AsyncIterator[bytes]:
+    """以 JSON 串流輸出 {policy, orders: [...], summary}，合計在最後才輸出"""
+    totals = PlanTotals()
+    yield b'{"generatedAt":' + dumps(datetime.now()) + b',"policy":' + dumps(policy) + b',"orders":['
+    separator = b""
+    async for order in orders:
+        totals.add(order)
+        yield separator + dumps(order)
+        separator = b","
+    yield b'],"summary":' + dumps(totals.to_dict()) + b"}"
+
+async def save_draft_orders(
+    products: AsyncIOMotorCollection,
+    orders: AsyncIterator[Dict[str, Any]],
+    policy: Dict[str, Any],
+    batch_size: int = 20
+) -> Dict[str, Any]:
+    """將規劃結果寫入 purchase_orders（狀態 draft），同一次規劃共用 plan_id"""
+    collection = products.database[PURCHASE_ORDERS_COLLECTION]
+    plan_id = ObjectId()
+    now = datetime.now()
+    totals = PlanTotals()
+    batch: List[Dict[str, Any]] = []
+    async for order in orders:
+        totals.add(order)
+        batch.append({**order, "plan_id": plan_id, "status": "draft", "policy": policy, "created_at": now})
+        if len(batch) >= batch_size:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+    return {"planId": str(plan_id), **totals.to_dict()}
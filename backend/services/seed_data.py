@@ -0,0 +1,247 @@
+import asyncio
+import random
+from datetime import datetime
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import bson
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from models.user import normalize_email, normalize_name
+from services.lazy_import import optional_module
+
+# numpy 為選用相依套件，且匯入約需 0.1 秒：延遲到第一次使用時才載入
+np = optional_module("numpy")
+
+CATEGORIES = ["手機", "筆記型電腦", "平板電腦", "耳機", "充電器", "保護套", "螢幕", "鍵盤", "滑鼠", "攝影機"]
+SUPPLIERS = ["Apple Taiwan", "Samsung", "華碩", "宏碁", "微星", "技嘉", "聯想", "戴爾", "HP", "小米"]
+PRODUCT_NAMES = {
+    "手機": ["iPhone 15", "Galaxy S24", "Pixel 8", "小米 14", "OPPO Find X7"],
+    "筆記型電腦": ["MacBook Air", "ThinkPad X1", "ZenBook", "Aspire 5", "Legion"],
+    "平板電腦": ["iPad Pro", "Galaxy Tab", "Surface Pro", "MatePad", "小米平板"],
+    "耳機": ["AirPods", "Galaxy Buds", "WH-1000XM5", "FreeBuds", "小米耳機"],
+    "充電器": ["MagSafe", "無線充電器", "快充頭", "行動電源", "車充"],
+    "保護套": ["手機殼", "筆電包", "平板套", "螢幕保護貼", "鍵盤膜"],
+    "螢幕": ["4K 顯示器", "曲面螢幕", "電競螢幕", "便攜螢幕", "觸控螢幕"],
+    "鍵盤": ["機械鍵盤", "無線鍵盤", "藍牙鍵盤", "電競鍵盤", "薄膜鍵盤"],
+    "滑鼠": ["電競滑鼠", "無線滑鼠", "藍牙滑鼠", "軌跡球", "觸控板"],
+    "攝影機": ["網路攝影機", "行車記錄器", "運動攝影機", "監控鏡頭", "直播攝影機"]
+}
+VERSIONS = ["Pro", "Max", "Plus", "Ultra", "Mini", "Lite", "SE", ""]
+PRICE_RANGES = {
+    "手機": (8000, 50000),
+    "筆記型電腦": (15000, 80000),
+    "平板電腦": (8000, 35000),
+    "耳機": (500, 15000),
+    "充電器": (200, 3000),
+    "保護套": (100, 2000),
+    "螢幕": (5000, 40000),
+    "鍵盤": (500, 8000),
+    "滑鼠": (300, 5000),
+    "攝影機": (1000, 20000)
+}
+SURNAMES = ["陳", "林", "黃", "張", "李", "王", "吳", "劉", "蔡", "楊"]
+GIVEN_NAMES = ["志明", "春嬌", "家豪", "怡君", "俊傑", "雅婷", "冠宇", "宜蓁", "承恩", "詩涵"]
+
+DEFAULT_BATCH_SIZE = 10000
+# 同時進行的 insert_many 數；記憶體上限約為 (並行數 + 1) 個批次
+DEFAULT_CONCURRENCY = 4
+MAX_SEED_COUNT = 10_000_000
+# 同步種子 API 的上限：請求期間佔用事件迴圈與連線，更多資料請改用背景工作或 seed.py
+MAX_SYNC_SEED_COUNT = 1000
+# 每個區塊以 (seed, 區塊序號) 各自播種，輸出只由 seed 決定、與批次大小無關
+CHUNK_SIZE = 4096
+
+# 查表用的預先組好的字串，迴圈內只做索引
+_NAMES_PER_CATEGORY = len(VERSIONS) * 5
+_NAMES = [
+    f"{base} {version}".strip()
+    for category in CATEGORIES
+    for base in PRODUCT_NAMES[category]
+    for version in VERSIONS
+]
+_DESCRIPTIONS = [f"高品質的{category}產品，適合各種使用場景" for category in CATEGORIES]
+_PRICE_LOW = [PRICE_RANGES[category][0] for category in CATEGORIES]
+_PRICE_SPAN = [PRICE_RANGES[category][1] - PRICE_RANGES[category][0] + 1 for category in CATEGORIES]
+_USER_NAMES = [surname + given for surname in SURNAMES for given in GIVEN_NAMES]
+_USER_NAMES_NORMALIZED = [normalize_name(name) for name in _USER_NAMES]
+
+Columns = Tuple[List[Any], ...]
+
+def _product_columns_numpy(seed: int, chunk: int, size: int) -> Columns:
+    rng = np.random.default_rng([seed, chunk])
+    category = rng.integers(0, len(CATEGORIES), size)
+    name = category * _NAMES_PER_CATEGORY + rng.integers(0, _NAMES_PER_CATEGORY, size)
+    price = np.asarray(_PRICE_LOW)[category] + rng.integers(0, np.asarray(_PRICE_SPAN)[category])
+    return (
+        category.tolist(),
+        name.tolist(),
+        price.astype(float).tolist(),
+        rng.integers(0, 101, size).tolist(),
+        rng.integers(5, 21, size).tolist(),
+        rng.integers(0, len(SUPPLIERS), size).tolist(),
+    )
+
+def _product_columns_python(seed: int, chunk: int, size: int) -> Columns:
+    rng = random.Random(f"{seed}:{chunk}")
+    category = [rng.randrange(len(CATEGORIES)) for _ in range(size)]
+    return (
+        category,
+        [c * _NAMES_PER_CATEGORY + rng.randrange(_NAMES_PER_CATEGORY) for c in category],
+        [float(_PRICE_LOW[c] + rng.randrange(_PRICE_SPAN[c])) for c in category],
+        [rng.randint(0, 100) for _ in range(size)],
+        [rng.randint(5, 20) for _ in range(size)],
+        [rng.randrange(len(SUPPLIERS)) for _ in range(size)],
+    )
+
+def _user_columns_numpy(seed: int, chunk: int, size: int) -> Columns:
+    rng = np.random.default_rng([seed, chunk])
+    return (
+        rng.integers(0, len(_USER_NAMES), size).tolist(),
+        rng.integers(0, 100_000_000, size).tolist(),
+    )
+
+def _user_columns_python(seed: int, chunk: int, size: int) -> Columns:
+    rng = random.Random(f"{seed}:{chunk}")
+    return (
+        [rng.randrange(len(_USER_NAMES)) for _ in range(size)],
+        [rng.randrange(100_000_000) for _ in range(size)],
+    )
+
+def _chunked(count: int, seed: int, columns: Callable[[int, int, int], Columns]) -> Iterator[Tuple[int, Columns]]:
+    for chunk, start in enumerate(range(0, count, CHUNK_SIZE)):
+        yield start, columns(seed, chunk, min(CHUNK_SIZE, count - start))
+
+def _rebatch(rows: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def chunk_count(count: int) -> int:
+    """count 筆資料的區塊數"""
+    return (count + CHUNK_SIZE - 1) // CHUNK_SIZE
+
+def _product_rows(count: int, seed: int, chunks: Iterable[int], now: datetime) -> Iterator[Dict[str, Any]]:
+    columns = _product_columns_numpy if np is not None else _product_columns_python
+    for chunk in chunks:
+        size = min(CHUNK_SIZE, count - chunk * CHUNK_SIZE)
+        first = chunk * CHUNK_SIZE + 1
+        for offset, (category, name, price, stock, min_stock, supplier) in enumerate(zip(*columns(seed, chunk, size))):
+            yield {
+                # 加上序號讓 name + supplier 自然鍵保持唯一
+                "name": f"{_NAMES[name]} #{first + offset}",
+                "description": _DESCRIPTIONS[category],
+                "category": CATEGORIES[category],
+                "price": price,
+                "stock": stock,
+                "min_stock": min_stock,
+                "supplier": SUPPLIERS[supplier],
+                "created_at": now,
+                "updated_at": now,
+                "reorder_gap": min_stock - stock,
+            }
+
+def generate_products(
+    count: int,
+    seed: int = 42,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    now: Optional[datetime] = None
+) -> Iterator[List[Dict[str, Any]]]:
+    """依序產生產品批次（MongoDB 欄位名稱）；同一個 seed 永遠產生相同的資料
+
+    有 numpy 時以向量化方式抽樣，沒有時退回 random（兩者的輸出不同）。
+    """
+    rows = _product_rows(count, seed, range(chunk_count(count)), now or datetime.now())
+    return _rebatch(rows, batch_size)
+
+def encode_product_chunks(count: int, seed: int, first_chunk: int, last_chunk: int, now: datetime) -> List[bytes]:
+    """產生區塊 [first_chunk, last_chunk) 的產品並編碼為 BSON（在工作行程中執行）
+
+    各區塊獨立播種，分散到多個行程產生的資料與 generate_products 相同；
+    主行程以 RawBSONDocument 直接寫入，不需要再編碼。
+    """
+    return [
+        bson.encode({"_id": ObjectId(), **row})
+        for row in _product_rows(count, seed, range(first_chunk, last_chunk), now)
+    ]
+
+def iter_products(count: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """逐筆產生產品"""
+    return chain.from_iterable(generate_products(count, seed))
+
+def user_email(index: int) -> str:
+    """第 index 個用戶的郵箱（以序號組成，保證唯一）"""
+    return f"user{index:08d}@example.com"
+
+def generate_users(count: int, seed: int = 42, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """依序產生用戶批次；郵箱為 user_email(序號)"""
+    columns = _user_columns_numpy if np is not None else _user_columns_python
+    rows = (
+        {
+            "name": _USER_NAMES[name],
+            "email": email,
+            "phone": "09%08d" % phone,
+            "name_normalized": _USER_NAMES_NORMALIZED[name],
+            "email_normalized": normalize_email(email),
+        }
+        for start, chunk in _chunked(count, seed, columns)
+        for offset, (name, phone) in enumerate(zip(*chunk))
+        for email in (user_email(start + offset),)
+    )
+    return _rebatch(rows, batch_size)
+
+async def _insert(collection: AsyncIOMotorCollection, documents: List[Dict[str, Any]]) -> int:
+    await collection.insert_many(documents, ordered=False)
+    return len(documents)
+
+async def insert_batches(
+    collection: AsyncIOMotorCollection,
+    batches: Iterable[List[Dict[str, Any]]],
+    concurrency: int = DEFAULT_CONCURRENCY
+) -> int:
+    """管線化寫入：最多 concurrency 個 insert_many 同時進行，產生下一批與寫入重疊"""
+    pending = set()
+    inserted = 0
+    try:
+        for documents in batches:
+            if len(pending) >= concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                inserted += sum(task.result() for task in done)
+            pending.add(asyncio.create_task(_insert(collection, documents)))
+        if pending:
+            done, pending = await asyncio.wait(pending)
+            inserted += sum(task.result() for task in done)
+    finally:
+        for task in pending:
+            task.cancel()
+    return inserted
+
+async def seed_products(
+    collection: AsyncIOMotorCollection,
+    count: int,
+    seed: int = 42,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY
+) -> int:
+    """清空產品集合後寫入 count 個產品，回傳寫入筆數"""
+    await collection.delete_many({})
+    return await insert_batches(collection, generate_products(count, seed, batch_size), concurrency)
+
+async def seed_users(
+    collection: AsyncIOMotorCollection,
+    count: int,
+    seed: int = 42,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY
+) -> int:
+    """清空用戶集合後寫入 count 個用戶，回傳寫入筆數"""
+    await collection.delete_many({})
+    return await insert_batches(collection, generate_users(count, seed, batch_size), concurrency)
+
+def random_seed() -> int:
+    """未指定 seed 時使用；會回傳給呼叫端以便重現"""
+    return random.randrange(2 ** 31)
@@ -0,0 +1,80 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Optional, Set
+
+# 每個訂閱者最多暫存的事件數；超過代表用戶端跟不上
+SUBSCRIBER_QUEUE_SIZE = 256
+HEARTBEAT_INTERVAL = 15.0
+
+def _json_default(value: Any) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+def format_event(event: str, data: Any, event_id: Optional[str] = None) -> str:
+    """組成一筆 text/event-stream 訊息"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_json_default))
+    return "\n".join(lines) + "\n\n"
+
+class Subscription:
+    """單一用戶端的有界佇列；滿了就丟棄並標記為落後，由用戶端重新同步"""
+
+    def __init__(self, maxsize: int):
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False
+
+    def offer(self, message: str):
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # 不讓慢速用戶端拖住發佈端：清空佇列，改送一次 resync
+            self.lagged = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+
+class Broadcaster:
+    """將事件廣播給所有 SSE 連線"""
+
+    def __init__(self, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self._subscribers: Set[Subscription] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: str, data: Any, event_id: Optional[str] = None):
+        if not self._subscribers:
+            return
+        message = format_event(event, data, event_id)
+        for subscription in self._subscribers:
+            subscription.offer(message)
+
+    async def stream(
+        self,
+        initial: Optional[Callable[[], str]] = None,
+        resync: Optional[Callable[[], str]] = None,
+        heartbeat: float = HEARTBEAT_INTERVAL
+    ) -> AsyncIterator[str]:
+        """訂閱並產生 SSE 內容；initial/resync 回傳連線時與落後時要送出的訊息"""
+        subscription = Subscription(self.maxsize)
+        self._subscribers.add(subscription)
+        try:
+            if initial:
+                yield initial()
+            while True:
+                if subscription.lagged:
+                    subscription.lagged = False
+                    yield resync() if resync else format_event("resync", {})
+                    continue
+                try:
+                    yield await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # 註解行作為心跳，避免代理伺服器關閉閒置連線
+                    yield ": keep-alive\n\n"
+        finally:
+            self._subscribers.discard(subscription)
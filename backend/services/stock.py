@@ -0,0 +1,156 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
+
+# MongoDB 錯誤碼 20 (IllegalOperation)：單機模式不支援交易
+ILLEGAL_OPERATION = 20
+
+# None 表示尚未偵測；第一次批量預留時決定是否使用交易
+_transactions_supported: Optional[bool] = None
+
+# (變更前, 變更後) 的產品文件
+StockChange = Tuple[Dict[str, Any], Dict[str, Any]]
+# 補償完成後呼叫：參數為 (扣減前, 加回後) 的文件，讓呼叫端同步快取與變更事件
+OnCompensated = Callable[[List[StockChange]], Awaitable[None]]
+
+class InsufficientStockError(ValueError):
+    """庫存不足，附帶不足的產品 ID 與目前庫存"""
+
+    def __init__(self, product_id: str, requested: int, available: Optional[int]):
+        self.product_id = product_id
+        self.requested = requested
+        self.available = available
+        super().__init__(f"產品 {product_id} 庫存不足（需求 {requested}，剩餘 {available}）")
+
+def _object_id(product_id: str) -> ObjectId:
+    if not ObjectId.is_valid(product_id):
+        raise LookupError("產品不存在")
+    return ObjectId(product_id)
+
+def _stock_update(delta: int, updated_at: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """更新管線：調整 stock 後以文件上的 min_stock 重算 reorder_gap（同 update_product_fields）
+
+    不以 $inc 遞增 reorder_gap：背景補齊欄位前的舊文件沒有此欄位，遞增會從 0 起算而得到錯誤的值。
+    """
+    changes: Dict[str, Any] = {"stock": {"$add": ["$stock", delta]}}
+    if updated_at is not None:
+        changes["updated_at"] = updated_at
+    return [
+        {"$set": changes},
+        {"$set": {"reorder_gap": {"$subtract": ["$min_stock", "$stock"]}}},
+    ]
+
+async def _guarded_inc(
+    collection: AsyncIOMotorCollection,
+    product_id: str,
+    delta: int,
+    session=None
+) -> StockChange:
+    """單次 find_one_and_update：扣減時要求 stock >= -delta，庫存不會變成負數"""
+    query: Dict[str, Any] = {"_id": _object_id(product_id)}
+    if delta < 0:
+        query["stock"] = {"$gte": -delta}
+    after = await collection.find_one_and_update(
+        query,
+        _stock_update(delta, datetime.now()),
+        return_document=ReturnDocument.AFTER,
+        session=session
+    )
+    if after is None:
+        # 條件不成立：區分產品不存在與庫存不足（僅在失敗時多一次查詢）
+        current = await collection.find_one({"_id": query["_id"]}, {"stock": 1}, session=session)
+        if current is None:
+            raise LookupError("產品不存在")
+        raise InsufficientStockError(product_id, -delta, current.get("stock"))
+    before = dict(after, stock=after["stock"] - delta, reorder_gap=after["reorder_gap"] + delta)
+    return before, after
+
+async def adjust_stock(collection: AsyncIOMotorCollection, product_id: str, delta: int) -> StockChange:
+    """原子地調整庫存（正數入庫、負數出庫）"""
+    return await _guarded_inc(collection, product_id, delta)
+
+async def reserve_stock(collection: AsyncIOMotorCollection, product_id: str, quantity: int) -> StockChange:
+    """原子地預留（扣減）庫存，庫存不足時不做任何變更"""
+    return await _guarded_inc(collection, product_id, -quantity)
+
+def _merge_items(items: List[Dict[str, Any]]) -> "OrderedDict[str, int]":
+    """合併重複的產品，並依 ID 排序以降低交易之間的寫入衝突"""
+    merged: Dict[str, int] = {}
+    for item in items:
+        merged[item["product_id"]] = merged.get(item["product_id"], 0) + item["quantity"]
+    return OrderedDict(sorted(merged.items()))
+
+async def _reserve_in_transaction(collection: AsyncIOMotorCollection, quantities: Dict[str, int]) -> List[StockChange]:
+    async def reserve_all(session):
+        return [
+            await _guarded_inc(collection, product_id, -quantity, session=session)
+            for product_id, quantity in quantities.items()
+        ]
+
+    async with await collection.database.client.start_session() as session:
+        # with_transaction 會重試暫時性錯誤；任一項失敗時整筆交易回滾
+        return await session.with_transaction(reserve_all)
+
+async def _reserve_with_compensation(
+    collection: AsyncIOMotorCollection,
+    quantities: Dict[str, int],
+    on_compensated: Optional[OnCompensated] = None
+) -> List[StockChange]:
+    """不支援交易時逐筆扣減，失敗則把已扣減的數量加回
+
+    補償完成前，其他請求可能短暫看到較低的庫存，但不會超賣。
+    扣減與加回都會改寫文件（updated_at），已加回的產品交給 on_compensated 同步快取與事件。
+    """
+    changes: List[StockChange] = []
+    try:
+        for product_id, quantity in quantities.items():
+            changes.append(await _guarded_inc(collection, product_id, -quantity))
+    except Exception:
+        compensated: List[StockChange] = []
+        for before, after in reversed(changes):
+            quantity = before["stock"] - after["stock"]
+            try:
+                restored = await collection.find_one_and_update(
+                    {"_id": after["_id"]},
+                    _stock_update(quantity, datetime.now()),
+                    return_document=ReturnDocument.AFTER
+                )
+            except Exception as e:
+                print(f"❌ 庫存補償失敗 ({after['_id']} +{quantity}): {e}")
+                restored = None
+            # 補償失敗時文件仍停在扣減後的狀態，同樣需要通知
+            compensated.append((before, restored or after))
+        if on_compensated and compensated:
+            try:
+                await on_compensated(compensated)
+            except Exception as e:
+                print(f"⚠️ 補償後同步快取與事件失敗: {e}")
+        raise
+    return changes
+
+async def reserve_batch(
+    collection: AsyncIOMotorCollection,
+    items: List[Dict[str, Any]],
+    on_compensated: Optional[OnCompensated] = None
+) -> List[StockChange]:
+    """多個產品的全有或全無預留：優先使用交易，單機 MongoDB 改用補償式回滾
+
+    交易回滾不會改動文件；補償式回滾會，已加回的產品以 on_compensated 通知呼叫端。
+    """
+    global _transactions_supported
+    quantities = _merge_items(items)
+    if _transactions_supported is not False:
+        try:
+            changes = await _reserve_in_transaction(collection, quantities)
+            _transactions_supported = True
+            return changes
+        except OperationFailure as e:
+            if e.code != ILLEGAL_OPERATION:
+                raise
+            _transactions_supported = False
+            print("⚠️ MongoDB 不支援交易，批量預留改用補償式回滾")
+    return await _reserve_with_compensation(collection, quantities, on_compensated)
@@ -0,0 +1,195 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from services.product_events import event_document
+
+# 原始異動以 bucket pattern 保存：每個產品每小時一份文件，異動明細附加在 events 陣列
+MOVEMENTS_COLLECTION = "stock_movements"
+# 預先彙總：{granularity, scope, key, bucket} 一份文件，scope 為 product（key=產品 ID）或 category（key=類別）
+ROLLUPS_COLLECTION = "stock_rollups"
+# 單一桶最多保存的明細數；超過時同一小時另開新桶，避免文件無限制成長
+MAX_BUCKET_EVENTS = 500
+
+GRANULARITIES = ("hour", "day", "month")
+# 未指定起點時預設查詢的範圍
+DEFAULT_SPANS = {"hour": timedelta(hours=48), "day": timedelta(days=30), "month": timedelta(days=365)}
+# 單次查詢最多回傳的桶數
+MAX_HISTORY_BUCKETS = 1000
+_BUCKET_LENGTHS = {"hour": timedelta(hours=1), "day": timedelta(days=1), "month": timedelta(days=28)}
+
+def truncate(moment: datetime, granularity: str) -> datetime:
+    """取得時間點所屬桶的起始時間"""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if granularity in ("day", "month"):
+        moment = moment.replace(hour=0)
+    if granularity == "month":
+        moment = moment.replace(day=1)
+    return moment
+
+def bucket_count(start: datetime, end: datetime, granularity: str) -> int:
+    """範圍內桶數的上限估計（月以 28 天計）"""
+    return int((end - truncate(start, granularity)) / _BUCKET_LENGTHS[granularity]) + 1
+
+def _movements(products: AsyncIOMotorCollection) -> AsyncIOMotorCollection:
+    return products.database[MOVEMENTS_COLLECTION]
+
+def _rollups(products: AsyncIOMotorCollection) -> AsyncIOMotorCollection:
+    return products.database[ROLLUPS_COLLECTION]
+
+async def ensure_ledger_indexes(database: AsyncIOMotorDatabase):
+    """建立原始桶與彙總的索引（重複呼叫不會重建）"""
+    await database[MOVEMENTS_COLLECTION].create_indexes([
+        IndexModel([("product_id", ASCENDING), ("hour", ASCENDING)], name="product_hour"),
+    ])
+    await database[ROLLUPS_COLLECTION].create_indexes([
+        IndexModel(
+            [("scope", ASCENDING), ("key", ASCENDING), ("granularity", ASCENDING), ("bucket", ASCENDING)],
+            name="scope_key_granularity_bucket",
+            unique=True,
+        ),
+    ])
+
+def _rollup_operations(key_by_scope: Dict[str, str], at: datetime, delta: int) -> List[UpdateOne]:
+    inc = {"in": max(delta, 0), "out": max(-delta, 0), "net": delta, "movements": 1}
+    return [
+        UpdateOne(
+            {"scope": scope, "key": key, "granularity": granularity, "bucket": truncate(at, granularity)},
+            {"$inc": inc},
+            upsert=True
+        )
+        for scope, key in key_by_scope.items()
+        for granularity in GRANULARITIES
+    ]
+
+async def record_stock_change(
+    products: AsyncIOMotorCollection,
+    before: Optional[Any],
+    after: Optional[Any],
+    reason: str
+):
+    """庫存有變動時寫入原始桶並遞增各粒度彙總（新增時 before 為 None，刪除時 after 為 None）
+
+    庫存變更已經完成，記錄失敗只回報錯誤，不讓請求失敗。
+    """
+    before = event_document(before)
+    after = event_document(after)
+    stock_before = (before.get("stock") or 0) if before is not None else 0
+    stock_after = (after.get("stock") or 0) if after is not None else 0
+    delta = stock_after - stock_before
+    if not delta:
+        return
+    product = after if after is not None else before
+    product_id = product["_id"]
+    category = product.get("category")
+    at = datetime.now()
+    try:
+        await asyncio.gather(
+            _movements(products).update_one(
+                {"product_id": ObjectId(str(product_id)), "hour": truncate(at, "hour"), "count": {"$lt": MAX_BUCKET_EVENTS}},
+                {
+                    "$push": {"events": {"at": at, "delta": delta, "stock": stock_after, "reason": reason}},
+                    "$inc": {"count": 1, "in": max(delta, 0), "out": max(-delta, 0)},
+                    "$setOnInsert": {"category": category},
+                },
+                upsert=True
+            ),
+            _rollups(products).bulk_write(
+                _rollup_operations({"product": str(product_id), "category": category}, at, delta),
+                ordered=False
+            ),
+        )
+    except Exception as e:
+        print(f"❌ 庫存異動記錄失敗 ({product_id} {delta:+d}): {e}")
+
+def _bucket_row(document: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "bucket": document["bucket"],
+        "in": document.get("in", 0),
+        "out": document.get("out", 0),
+        "net": document.get("net", 0),
+        "movements": document.get("movements", 0),
+    }
+
+async def _read_rollups(
+    products: AsyncIOMotorCollection,
+    scope: str,
+    key: Any,
+    granularity: str,
+    start: datetime,
+    end: datetime
+) -> List[Dict[str, Any]]:
+    """以 scope_key_granularity_bucket 索引讀取範圍內的桶"""
+    query = {
+        "scope": scope,
+        "key": key,
+        "granularity": granularity,
+        "bucket": {"$gte": truncate(start, granularity), "$lte": end},
+    }
+    cursor = _rollups(products).find(query, {"_id": 0, "key": 1, "bucket": 1, "in": 1, "out": 1, "net": 1, "movements": 1})
+    return await cursor.sort("bucket", ASCENDING).to_list(None)
+
+def _totals(rows: List[Dict[str, Any]]) -> Dict[str, int]:
+    return {field: sum(row[field] for row in rows) for field in ("in", "out", "net", "movements")}
+
+async def product_history(
+    products: AsyncIOMotorCollection,
+    product_id: str,
+    granularity: str,
+    start: datetime,
+    end: datetime
+) -> Dict[str, Any]:
+    """單一產品的庫存異動歷史；closing 為每個桶結束時的庫存
+
+    closing 由目前庫存減去之後各桶的淨變動倒推；批量匯入與重新生成不會記錄異動，
+    發生在查詢範圍之後時 closing 不準確。
+    """
+    product = await products.find_one({"_id": ObjectId(product_id)}, {"stock": 1})
+    rows = [_bucket_row(document) for document in await _read_rollups(products, "product", product_id, granularity, start, end)]
+    if product is not None:
+        later = await _rollups(products).aggregate([
+            {"$match": {"scope": "product", "key": product_id, "granularity": granularity, "bucket": {"$gt": end}}},
+            {"$group": {"_id": None, "net": {"$sum": "$net"}}},
+        ]).to_list(None)
+        closing = (product.get("stock") or 0) - (later[0]["net"] if later else 0)
+        for row in reversed(rows):
+            row["closing"] = closing
+            closing -= row["net"]
+    return {
+        "productId": product_id,
+        "exists": product is not None,
+        "granularity": granularity,
+        "from": truncate(start, granularity),
+        "to": end,
+        "buckets": rows,
+        "totals": _totals(rows),
+    }
+
+async def category_movements(
+    products: AsyncIOMotorCollection,
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    category: Optional[str] = None
+) -> Dict[str, Any]:
+    """各類別每個桶的進出貨量（未指定類別時列出範圍內有異動的所有類別）"""
+    if category is not None:
+        documents = await _read_rollups(products, "category", category, granularity, start, end)
+    else:
+        query = {"scope": "category", "granularity": granularity, "bucket": {"$gte": truncate(start, granularity), "$lte": end}}
+        cursor = _rollups(products).find(query, {"_id": 0, "key": 1, "bucket": 1, "in": 1, "out": 1, "net": 1, "movements": 1})
+        documents = await cursor.sort([("key", ASCENDING), ("bucket", ASCENDING)]).to_list(None)
+    by_category: Dict[str, List[Dict[str, Any]]] = {}
+    for document in documents:
+        by_category.setdefault(document["key"], []).append(_bucket_row(document))
+    return {
+        "granularity": granularity,
+        "from": truncate(start, granularity),
+        "to": end,
+        "categories": [
+            {"name": name, "buckets": rows, "totals": _totals(rows)}
+            for name, rows in by_category.items()
+        ],
+    }
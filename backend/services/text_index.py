@@ -0,0 +1,111 @@
+import heapq
+import re
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Set
+
+# 英數字詞與中日韓文字區段
+_TOKEN_PATTERN = re.compile(
+    r"[0-9a-z]+|[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]+"
+)
+
+def _is_cjk(run: str) -> bool:
+    return not run[0].isascii()
+
+def tokenize(text: str, for_query: bool = False) -> List[str]:
+    """斷詞：英數字以單字為單位，中日韓文字切成二元組（bigram）
+
+    建立索引時同時收錄單字與二元組，讓單一中文字也能查詢；
+    查詢時只用二元組（僅一個字時用單字），以減少候選集合。
+    """
+    tokens: List[str] = []
+    for run in _TOKEN_PATTERN.findall(text.lower()):
+        if not _is_cjk(run):
+            tokens.append(run)
+            continue
+        if len(run) == 1:
+            tokens.append(run)
+            continue
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        if not for_query:
+            tokens.extend(run)
+    return tokens
+
+class InvertedIndex:
+    """記憶體內倒排索引，支援最後一個詞的前綴比對（typeahead）"""
+
+    def __init__(self):
+        self._postings: Dict[str, Set[str]] = {}
+        self._doc_tokens: Dict[str, Set[str]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        # 已排序的詞彙表，用二分搜尋找出前綴範圍
+        self._vocabulary: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._doc_tokens)
+
+    def add(self, doc_id: str, texts: Iterable[str]):
+        """加入或取代文件的索引內容"""
+        if doc_id in self._doc_tokens:
+            self.remove(doc_id)
+        text = " ".join(t for t in texts if t)
+        tokens = set(tokenize(text))
+        self._doc_tokens[doc_id] = tokens
+        self._doc_lengths[doc_id] = len(text)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                insort(self._vocabulary, token)
+            postings.add(doc_id)
+
+    def remove(self, doc_id: str):
+        """移除文件"""
+        tokens = self._doc_tokens.pop(doc_id, None)
+        self._doc_lengths.pop(doc_id, None)
+        if not tokens:
+            return
+        for token in tokens:
+            postings = self._postings[token]
+            postings.discard(doc_id)
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def clear(self):
+        self._postings.clear()
+        self._doc_tokens.clear()
+        self._doc_lengths.clear()
+        self._vocabulary.clear()
+
+    def _prefix_postings(self, prefix: str) -> Set[str]:
+        vocabulary = self._vocabulary
+        matched: Set[str] = set()
+        for i in range(bisect_left(vocabulary, prefix), len(vocabulary)):
+            token = vocabulary[i]
+            if not token.startswith(prefix):
+                break
+            matched |= self._postings[token]
+        return matched
+
+    def search(self, query: str, limit: int = 20, prefix: bool = True) -> List[str]:
+        """回傳包含所有查詢詞的文件 ID；prefix 為 True 時最後一個詞以前綴比對"""
+        tokens = tokenize(query, for_query=True)
+        if not tokens:
+            return []
+
+        candidate_sets = []
+        for i, token in enumerate(tokens):
+            if prefix and i == len(tokens) - 1:
+                postings = self._prefix_postings(token)
+            else:
+                postings = self._postings.get(token, set())
+            if not postings:
+                return []
+            candidate_sets.append(postings)
+
+        # 從最小的集合開始取交集
+        candidate_sets.sort(key=len)
+        result = candidate_sets[0].intersection(*candidate_sets[1:])
+
+        # 內容越短代表越貼近查詢，排在前面
+        return heapq.nsmallest(limit, result, key=lambda doc_id: (self._doc_lengths[doc_id], doc_id))
@@ -1,13 +1,69 @@
-from typing import List, Optional
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from bson import ObjectId
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from pymongo.errors import DuplicateKeyError
-from models.user import User, UserCreate, UserUpdate, UserResponse
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ASCENDING, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from models.user import (
+    User, UserCreate, UserUpdate, UserResponse,
+    UserBulkUpdateItem, BulkUserResult, BulkUserResponse,
+    EMAIL_COLLATION, normalize_email, normalize_name, search_fields
+)
 from database.mongodb import get_database
+from services.pagination import DEFAULT_PAGE_SIZE, encode_cursor, keyset_filter
+from services.cache import create_cache
+from services.json_response import stream_json_array
+from services.http_cache import bump_version, collection_etag
+from services.seed_data import DEFAULT_BATCH_SIZE, seed_users
+
+# 重複鍵錯誤碼
+DUPLICATE_KEY_ERROR = 11000
+# 列表與匯出只讀取回應需要的欄位
+USER_PROJECTION = {"name": 1, "email": 1, "phone": 1}
+# 前綴搜尋最多回傳的筆數
+MAX_SEARCH_LIMIT = 50
+# 前綴範圍查詢的上界：U+FFFF 在 ICU 定序與 UTF-8 二進位比較中都排在一般字元之後
+_PREFIX_END = "\uffff"
+
+def _prefix_range(prefix: str) -> Dict[str, str]:
+    """前綴比對改寫為索引範圍查詢（比 $regex 更能穩定使用索引）"""
+    return {"$gte": prefix, "$lt": prefix + _PREFIX_END}
+
+def _to_response(user: dict) -> UserResponse:
+    """將資料庫文件轉為回應模型"""
+    return UserResponse(
+        id=str(user["_id"]),
+        name=user["name"],
+        email=user["email"],
+        phone=user.get("phone")
+    )
+
+def _to_dict(user: dict) -> Dict[str, Any]:
+    """與 _to_response 相同的欄位，但不建立 Pydantic 模型"""
+    return {"id": str(user["_id"]), "name": user["name"], "email": user["email"], "phone": user.get("phone")}
+
+def _bulk_response(results: List[BulkUserResult]) -> BulkUserResponse:
+    succeeded = sum(1 for r in results if r.status in ("created", "updated", "deleted"))
+    return BulkUserResponse(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+def _write_errors(error: BulkWriteError) -> dict:
+    """依操作位置整理 bulk_write 的錯誤"""
+    return {e["index"]: e for e in error.details.get("writeErrors", [])}
 
 class UserService:
     def __init__(self):
         self.collection_name = "users"
+        # 依 ID 與郵箱查詢的讀穿快取
+        self.cache = create_cache(
+            "users",
+            encode=lambda user: user.model_dump(),
+            decode=lambda data: UserResponse(**data)
+        )
+    
+    async def _invalidate(self, user_id: str, *emails: Optional[str]):
+        """寫入後清除該用戶的快取"""
+        keys = [f"id:{user_id}"] + [f"email:{normalize_email(email)}" for email in emails if email]
+        await self.cache.invalidate(*keys)
     
     async def get_collection(self):
         """獲取用戶集合"""
@@ -21,54 +77,67 @@ class UserService:
         try:
             # 轉換為字典
             user_dict = user_data.model_dump()
+            user_dict.update(search_fields(user_dict["name"], user_dict["email"]))
             
-            # 插入資料庫
+            # 插入資料庫，直接以輸入資料組成回應，不再讀回
             result = await collection.insert_one(user_dict)
+            user_dict["_id"] = result.inserted_id
+            await bump_version(collection)
             
-            # 獲取插入的用戶
-            created_user = await collection.find_one({"_id": result.inserted_id})
-            
-            return UserResponse(
-                id=str(created_user["_id"]),
-                name=created_user["name"],
-                email=created_user["email"],
-                phone=created_user.get("phone")
-            )
+            return _to_response(user_dict)
             
         except DuplicateKeyError:
             raise ValueError(f"郵箱 {user_data.email} 已存在")
     
-    async def get_all_users(self) -> List[UserResponse]:
-        """獲取所有用戶"""
+    async def get_all_users(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """分頁獲取用戶，回傳 (用戶列表, 下一頁游標)；列表為與 UserResponse 相同欄位的 dict"""
         collection = await self.get_collection()
+        query = keyset_filter(cursor, "_id", ASCENDING)
+        
+        documents = await collection.find(query, USER_PROJECTION) \
+            .sort("_id", ASCENDING) \
+            .limit(limit + 1) \
+            .to_list(length=limit + 1)
+        
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = encode_cursor(documents[-1], "_id")
         
-        users = []
-        async for user in collection.find():
-            users.append(UserResponse(
-                id=str(user["_id"]),
-                name=user["name"],
-                email=user["email"],
-                phone=user.get("phone")
-            ))
+        # 只讀列表不建立 UserResponse，直接組成回應用的 dict
+        users = [_to_dict(user) for user in documents]
         
-        return users
+        return users, next_cursor
+    
+    async def list_etag(self) -> str:
+        """用戶集合目前版本的 ETag"""
+        return await collection_etag(await self.get_collection())
+    
+    async def export_users(self) -> AsyncIterator[bytes]:
+        """依 _id 順序串流輸出所有用戶（JSON 陣列）"""
+        collection = await self.get_collection()
+        cursor = collection.find({}, USER_PROJECTION).sort("_id", ASCENDING).batch_size(1000)
+        async for chunk in stream_json_array(cursor, _to_dict):
+            yield chunk
     
     async def get_user_by_id(self, user_id: str) -> Optional[UserResponse]:
         """根據 ID 獲取用戶"""
         if not ObjectId.is_valid(user_id):
             return None
+        
+        async def load():
+            collection = await self.get_collection()
+            user = await collection.find_one({"_id": ObjectId(user_id)})
             
-        collection = await self.get_collection()
-        user = await collection.find_one({"_id": ObjectId(user_id)})
+            if user:
+                return _to_response(user)
+            return None
         
-        if user:
-            return UserResponse(
-                id=str(user["_id"]),
-                name=user["name"],
-                email=user["email"],
-                phone=user.get("phone")
-            )
-        return None
+        return await self.cache.get_or_load(f"id:{user_id}", load)
     
     async def update_user(self, user_id: str, user_data: UserUpdate) -> Optional[UserResponse]:
         """更新用戶信息"""
@@ -85,13 +154,17 @@ class UserService:
             return await self.get_user_by_id(user_id)
         
         try:
-            result = await collection.update_one(
+            # 單次往返完成更新；取回更新前的文件以便清除舊郵箱的快取，再套用變更組成回應
+            before = await collection.find_one_and_update(
                 {"_id": ObjectId(user_id)},
-                {"$set": update_data}
+                {"$set": {**update_data, **search_fields(update_data.get("name"), update_data.get("email"))}},
+                return_document=ReturnDocument.BEFORE
             )
             
-            if result.modified_count == 1:
-                return await self.get_user_by_id(user_id)
+            if before:
+                await bump_version(collection)
+                await self._invalidate(user_id, before["email"], update_data.get("email"))
+                return _to_response({**before, **update_data})
             
         except DuplicateKeyError:
             if "email" in update_data:
@@ -105,23 +178,224 @@ class UserService:
             return False
             
         collection = await self.get_collection()
-        result = await collection.delete_one({"_id": ObjectId(user_id)})
+        user = await collection.find_one_and_delete({"_id": ObjectId(user_id)}, projection={"email": 1})
         
-        return result.deleted_count == 1
+        if user:
+            await bump_version(collection)
+            await self._invalidate(user_id, user.get("email"))
+        return user is not None
     
     async def get_user_by_email(self, email: str) -> Optional[UserResponse]:
-        """根據郵箱獲取用戶"""
+        """根據郵箱獲取用戶（不分大小寫）"""
+        normalized = normalize_email(email)
+        
+        async def load():
+            collection = await self.get_collection()
+            user = await collection.find_one({"email_normalized": normalized}, collation=EMAIL_COLLATION)
+            if user is None:
+                # 尚未執行 migrate_users.py 的舊文件只能以原始郵箱精確比對
+                user = await collection.find_one({"email": email.strip(), "email_normalized": {"$exists": False}})
+            
+            if user:
+                return _to_response(user)
+            return None
+        
+        return await self.cache.get_or_load(f"email:{normalized}", load)
+    
+    async def search_users(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """依姓名或郵箱前綴搜尋用戶（姓名符合者在前），兩個索引範圍查詢同時執行"""
         collection = await self.get_collection()
-        user = await collection.find_one({"email": email})
+        limit = min(limit, MAX_SEARCH_LIMIT)
+        name_prefix = normalize_name(query)
+        email_prefix = normalize_email(query)
+        if not name_prefix or not email_prefix:
+            return []
         
-        if user:
-            return UserResponse(
-                id=str(user["_id"]),
-                name=user["name"],
-                email=user["email"],
-                phone=user.get("phone")
+        by_name = collection.find({"name_normalized": _prefix_range(name_prefix)}, USER_PROJECTION) \
+            .sort([("name_normalized", ASCENDING), ("_id", ASCENDING)]) \
+            .limit(limit)
+        by_email = collection.find({"email_normalized": _prefix_range(email_prefix)}, USER_PROJECTION, collation=EMAIL_COLLATION) \
+            .sort("email_normalized", ASCENDING) \
+            .limit(limit)
+        names, emails = await asyncio.gather(
+            by_name.to_list(length=limit),
+            by_email.to_list(length=limit),
+        )
+        
+        users = {}
+        for user in names + emails:
+            users.setdefault(user["_id"], user)
+        return [_to_dict(user) for user in list(users.values())[:limit]]
+    
+    async def create_users_bulk(self, users: List[UserCreate]) -> BulkUserResponse:
+        """批量創建用戶（單次 bulk_write，逐筆回報郵箱衝突）"""
+        collection = await self.get_collection()
+        
+        documents = []
+        for user in users:
+            document = user.model_dump()
+            document.update(search_fields(document["name"], document["email"]))
+            document["_id"] = ObjectId()
+            documents.append(document)
+        
+        errors = {}
+        if documents:
+            try:
+                await collection.bulk_write([InsertOne(d) for d in documents], ordered=False)
+            except BulkWriteError as e:
+                errors = _write_errors(e)
+            # 部分失敗時其餘筆數仍已寫入
+            await bump_version(collection)
+        
+        results = []
+        for index, document in enumerate(documents):
+            error = errors.get(index)
+            if error is None:
+                results.append(BulkUserResult(
+                    index=index, status="created", id=str(document["_id"]), user=_to_response(document)
+                ))
+            elif error.get("code") == DUPLICATE_KEY_ERROR:
+                results.append(BulkUserResult(
+                    index=index, status="conflict", error=f"郵箱 {document['email']} 已存在"
+                ))
+            else:
+                results.append(BulkUserResult(index=index, status="invalid", error=error.get("errmsg")))
+        
+        return _bulk_response(results)
+    
+    async def update_users_bulk(self, items: List[UserBulkUpdateItem]) -> BulkUserResponse:
+        """批量更新用戶（一次 $in 查詢加一次 bulk_write，與筆數無關）"""
+        collection = await self.get_collection()
+        
+        results: dict = {}
+        valid_ids = []
+        for index, item in enumerate(items):
+            if not ObjectId.is_valid(item.id):
+                results[index] = BulkUserResult(index=index, status="invalid", id=item.id, error="無效的用戶 ID")
+            else:
+                valid_ids.append(ObjectId(item.id))
+        
+        # 先取回更新前的文件：判斷是否存在、清除舊郵箱快取，並與輸入合併成回應
+        existing = {}
+        if valid_ids:
+            async for user in collection.find({"_id": {"$in": valid_ids}}):
+                existing[str(user["_id"])] = user
+        
+        operations = []
+        positions = []
+        for index, item in enumerate(items):
+            if index in results:
+                continue
+            if str(ObjectId(item.id)) not in existing:
+                results[index] = BulkUserResult(index=index, status="not_found", id=item.id, error="用戶不存在")
+                continue
+            update_data = item.model_dump(exclude={"id"}, exclude_none=True)
+            if update_data:
+                fields = search_fields(update_data.get("name"), update_data.get("email"))
+                operations.append(UpdateOne({"_id": ObjectId(item.id)}, {"$set": {**update_data, **fields}}))
+                positions.append(index)
+        
+        if operations:
+            try:
+                await collection.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                for op_index, error in _write_errors(e).items():
+                    index = positions[op_index]
+                    if error.get("code") == DUPLICATE_KEY_ERROR:
+                        message = f"郵箱 {items[index].email} 已被其他用戶使用"
+                        results[index] = BulkUserResult(index=index, status="conflict", id=items[index].id, error=message)
+                    else:
+                        results[index] = BulkUserResult(index=index, status="invalid", id=items[index].id, error=error.get("errmsg"))
+            await bump_version(collection)
+        
+        for index, item in enumerate(items):
+            if index in results:
+                continue
+            before = existing[str(ObjectId(item.id))]
+            update_data = item.model_dump(exclude={"id"}, exclude_none=True)
+            await self._invalidate(item.id, before["email"], update_data.get("email"))
+            results[index] = BulkUserResult(
+                index=index, status="updated", id=item.id, user=_to_response({**before, **update_data})
             )
-        return None
+        
+        return _bulk_response([results[i] for i in range(len(items))])
+    
+    async def delete_users_bulk(self, user_ids: List[str]) -> BulkUserResponse:
+        """批量刪除用戶（一次 $in 查詢存在的 ID，再以 delete_many 刪除）"""
+        collection = await self.get_collection()
+        
+        valid_ids = [ObjectId(user_id) for user_id in user_ids if ObjectId.is_valid(user_id)]
+        existing = {}
+        if valid_ids:
+            async for user in collection.find({"_id": {"$in": valid_ids}}, {"_id": 1, "email": 1}):
+                existing[user["_id"]] = user.get("email")
+            if existing:
+                await collection.delete_many({"_id": {"$in": list(existing)}})
+                await bump_version(collection)
+                for user_id, email in existing.items():
+                    await self._invalidate(str(user_id), email)
+        
+        results = []
+        for index, user_id in enumerate(user_ids):
+            if not ObjectId.is_valid(user_id):
+                results.append(BulkUserResult(index=index, status="invalid", id=user_id, error="無效的用戶 ID"))
+            elif ObjectId(user_id) in existing:
+                results.append(BulkUserResult(index=index, status="deleted", id=user_id))
+            else:
+                results.append(BulkUserResult(index=index, status="not_found", id=user_id, error="用戶不存在"))
+        
+        return _bulk_response(results)
+    
+    async def seed_users(self, count: int, seed: int, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """清空用戶集合並生成測試用戶（分批串流寫入）"""
+        collection = await self.get_collection()
+        inserted = await seed_users(collection, count, seed, batch_size=batch_size)
+        await bump_version(collection)
+        await self.cache.clear()
+        return inserted
+
+async def backfill_search_fields(
+    collection: AsyncIOMotorCollection,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Dict[str, Any]:
+    """替缺少正規化欄位的舊文件分批補上 name_normalized / email_normalized
+
+    依 _id 遞增分批讀取，每批一次 bulk_write；只差在大小寫的重複郵箱無法寫入唯一索引，
+    會列在 conflicts 中（該文件維持未遷移，需人工處理），其餘照常更新。
+    """
+    missing = {"$or": [{"name_normalized": {"$exists": False}}, {"email_normalized": {"$exists": False}}]}
+    scanned = updated = 0
+    conflicts: List[Dict[str, Any]] = []
+    last_id = None
+    while True:
+        query = missing if last_id is None else {"$and": [missing, {"_id": {"$gt": last_id}}]}
+        documents = await collection.find(query, {"name": 1, "email": 1}) \
+            .sort("_id", ASCENDING) \
+            .limit(batch_size) \
+            .to_list(length=batch_size)
+        if not documents:
+            break
+        last_id = documents[-1]["_id"]
+        scanned += len(documents)
+        operations = [
+            UpdateOne({"_id": document["_id"]}, {"$set": search_fields(document["name"], document["email"])})
+            for document in documents
+        ]
+        try:
+            result = await collection.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+        except BulkWriteError as e:
+            updated += e.details.get("nModified", 0)
+            for index, error in _write_errors(e).items():
+                document = documents[index]
+                conflicts.append({
+                    "id": str(document["_id"]),
+                    "email": document["email"],
+                    "error": "郵箱與其他用戶只差在大小寫" if error.get("code") == DUPLICATE_KEY_ERROR else error.get("errmsg"),
+                })
+    if updated:
+        await bump_version(collection)
+    return {"scanned": scanned, "updated": updated, "conflicts": conflicts}
 
 # 創建用戶服務實例
 user_service = UserService()
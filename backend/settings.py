@@ -0,0 +1,86 @@
+import os
+from dataclasses import dataclass, field, replace
+from typing import List, Optional
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return int(value)
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.lower() not in ("0", "false", "no")
+
+def _env_list(name: str, default: str) -> List[str]:
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
+
+@dataclass(frozen=True)
+class Settings:
+    """應用程式設定（預設值由環境變數讀取）"""
+
+    # mongo：產品與用戶都存在 MongoDB；memory：產品存在記憶體（ProductStore），不提供用戶 API
+    storage_backend: str = "mongo"
+    mongodb_url: str = "mongodb://localhost:27017"
+    database_name: str = "inventory_db"
+    users_database_name: str = "user_management"
+
+    # 共用 Motor 連線池設定（每個 worker 一個連線池）
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: Optional[int] = None
+    wait_queue_timeout_ms: Optional[int] = None
+    server_selection_timeout_ms: int = 5000
+    connect_timeout_ms: int = 10000
+    socket_timeout_ms: Optional[int] = None
+    # 例如 zstd,snappy,zlib（zstd/snappy 需另外安裝 zstandard/python-snappy）
+    compressors: List[str] = field(default_factory=list)
+
+    # 記憶體後端的持久化目錄（未設定時為純記憶體）
+    memory_data_dir: Optional[str] = None
+
+    # 請求與 MongoDB 指令的效能指標（/metrics）
+    metrics_enabled: bool = True
+
+    # 回應壓縮（br/gzip），小於 compression_min_size 位元組的回應不壓縮
+    compression_enabled: bool = True
+    compression_min_size: int = 1024
+
+    # 背景工作（種子資料、批量匯入、報表）CPU 密集步驟使用的行程數；0 表示改用執行緒
+    job_workers: int = 2
+
+    # 啟動時預先載入快取的產品數（最近更新的產品；0 表示不預載）
+    cache_prime_count: int = 0
+
+    cors_origins: List[str] = field(default_factory=lambda: ["http://localhost:5173", "http://127.0.0.1:5173"])
+
+    @classmethod
+    def from_env(cls, **overrides) -> "Settings":
+        settings = cls(
+            storage_backend=os.getenv("STORAGE_BACKEND", "mongo"),
+            mongodb_url=os.getenv("MONGODB_URL", "mongodb://localhost:27017"),
+            database_name=os.getenv("DATABASE_NAME", "inventory_db"),
+            users_database_name=os.getenv("USERS_DATABASE_NAME", "user_management"),
+            max_pool_size=_env_int("MONGO_MAX_POOL_SIZE", 100),
+            min_pool_size=_env_int("MONGO_MIN_POOL_SIZE", 0),
+            max_idle_time_ms=_env_int("MONGO_MAX_IDLE_TIME_MS", None),
+            wait_queue_timeout_ms=_env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", None),
+            server_selection_timeout_ms=_env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+            connect_timeout_ms=_env_int("MONGO_CONNECT_TIMEOUT_MS", 10000),
+            socket_timeout_ms=_env_int("MONGO_SOCKET_TIMEOUT_MS", None),
+            compressors=_env_list("MONGO_COMPRESSORS", ""),
+            memory_data_dir=os.getenv("SIMPLE_API_DATA_DIR") or None,
+            metrics_enabled=_env_bool("METRICS_ENABLED", True),
+            compression_enabled=_env_bool("COMPRESSION_ENABLED", True),
+            compression_min_size=_env_int("COMPRESSION_MIN_SIZE", 1024),
+            job_workers=_env_int("JOB_WORKERS", 2),
+            cache_prime_count=_env_int("CACHE_PRIME_COUNT", 0),
+            cors_origins=_env_list("CORS_ORIGINS", "http://localhost:5173,http://127.0.0.1:5173"),
+        )
+        return replace(settings, **overrides) if overrides else settings
+
+    @property
+    def uses_mongo(self) -> bool:
+        return self.storage_backend == "mongo"
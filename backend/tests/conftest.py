@@ -0,0 +1,13 @@
+"""
+測試共用設定
+
+    cd backend
+    pip install -r requirements-dev.txt
+    python -m pytest
+"""
+import pytest
+
+@pytest.fixture
+def anyio_backend():
+    # 非同步測試以 @pytest.mark.anyio 標記，只在 asyncio 上執行
+    return "asyncio"
@@ -0,0 +1,145 @@
+import asyncio
+import pytest
+
+pytest.importorskip("numpy")
+
+from services.analytics import AnalyticsEngine, InventoryColumns, RISK_LEVELS
+
+def _product(product_id, category="手機", supplier="甲", price=10.0, stock=5, min_stock=10):
+    return {"_id": product_id, "category": category, "supplier": supplier, "price": price, "stock": stock, "min_stock": min_stock}
+
+@pytest.fixture
+def columns():
+    columns = InventoryColumns(capacity=2)
+    columns.append_batch([
+        _product("a", "手機", "甲", price=100.0, stock=0, min_stock=10),
+        _product("b", "手機", "乙", price=50.0, stock=4, min_stock=10),
+        _product("c", "電腦", "甲", price=300.0, stock=8, min_stock=10),
+        _product("d", "電腦", "甲", price=200.0, stock=30, min_stock=10),
+    ])
+    return columns
+
+def test_value_matrix_groups_by_category_and_supplier(columns):
+    matrix = columns.value_matrix()
+    assert matrix["categories"] == ["手機", "電腦"]
+    assert matrix["suppliers"] == ["甲", "乙"]
+    assert matrix["value"] == [[0.0, 200.0], [8400.0, 0.0]]
+    assert matrix["count"] == [[1, 1], [2, 0]]
+    assert matrix["totalValue"] == 8600.0
+
+def test_value_matrix_empty_collection():
+    assert InventoryColumns().value_matrix() == {
+        "categories": [], "suppliers": [], "value": [], "count": [], "totalValue": 0.0
+    }
+
+def test_value_matrix_after_removing_every_product(columns):
+    for product_id in ["a", "b", "c", "d"]:
+        columns.remove(product_id)
+    matrix = columns.value_matrix()
+    assert matrix["categories"] == [] and matrix["value"] == [] and matrix["totalValue"] == 0.0
+
+def test_stockout_risk_levels(columns):
+    risk = columns.stockout_risk()
+    assert risk["levels"] == RISK_LEVELS
+    assert risk["total"] == {"outOfStock": 1, "critical": 1, "low": 1, "healthy": 0, "overstocked": 1}
+    assert risk["byCategory"] == [
+        {"name": "手機", "outOfStock": 1, "critical": 1, "low": 0, "healthy": 0, "overstocked": 0},
+        {"name": "電腦", "outOfStock": 0, "critical": 0, "low": 1, "healthy": 0, "overstocked": 1},
+    ]
+
+def test_stockout_risk_empty_collection():
+    risk = InventoryColumns().stockout_risk()
+    assert sum(risk["total"].values()) == 0
+    assert risk["byCategory"] == []
+
+def test_price_percentiles(columns):
+    result = columns.price_percentiles([0, 50, 100])
+    assert result["overall"] == [50.0, 150.0, 300.0]
+    assert result["byCategory"] == [
+        {"name": "手機", "count": 2, "values": [50.0, 75.0, 100.0]},
+        {"name": "電腦", "count": 2, "values": [200.0, 250.0, 300.0]},
+    ]
+    assert InventoryColumns().price_percentiles([50])["overall"] == []
+
+def test_reorder_quantities(columns):
+    result = columns.reorder_quantities(limit=2)
+    assert result["count"] == 3
+    assert result["totalUnits"] == 10 + 6 + 2
+    assert result["totalCost"] == 10 * 100.0 + 6 * 50.0 + 2 * 300.0
+    assert result["bySupplier"] == [{"name": "甲", "units": 12}, {"name": "乙", "units": 6}]
+    # 只回傳補貨量最大的 limit 筆，由大到小排序
+    assert [item["_id"] for item in result["items"]] == ["a", "b"]
+    assert result["items"][0]["reorderQuantity"] == 10
+
+def test_reorder_quantities_by_category(columns):
+    result = columns.reorder_quantities(category="電腦")
+    assert [item["_id"] for item in result["items"]] == ["c"]
+    assert columns.reorder_quantities(category="不存在")["count"] == 0
+
+def test_remove_moves_last_row_into_the_gap(columns):
+    columns.remove("a")
+    assert columns.size == 3
+    # 最後一列 d 補到 a 原本的位置
+    assert columns.ids == ["d", "b", "c"]
+    assert columns.row_of == {"d": 0, "b": 1, "c": 2}
+    assert columns.view("price").tolist() == [200.0, 50.0, 300.0]
+    assert columns.view("stock").tolist() == [30, 4, 8]
+
+def test_remove_last_row_and_unknown_id(columns):
+    columns.remove("d")
+    columns.remove("不存在")
+    assert columns.ids == ["a", "b", "c"]
+    assert columns.size == 3
+    assert "d" not in columns.row_of
+
+def test_upsert_after_remove_reuses_capacity(columns):
+    columns.remove("b")
+    columns.upsert(_product("e", "平板", "丙", price=10.0, stock=1, min_stock=2))
+    columns.upsert(_product("c", "電腦", "甲", price=300.0, stock=20, min_stock=10))
+    assert columns.size == 4
+    assert columns.stock[columns.row_of["c"]] == 20
+    assert columns.value_matrix()["categories"] == ["手機", "電腦", "平板"]
+
+class _SlowEngine(AnalyticsEngine):
+    """load 會等待測試放行，並記錄每次載入看到的資料版本"""
+
+    def __init__(self):
+        super().__init__(max_age=60)
+        self.version = 1
+        self.loads = []
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def load(self, collection):
+        version = self.version
+        self.loads.append(version)
+        self.started.set()
+        await self.release.wait()
+        columns = InventoryColumns()
+        columns.append_batch([_product(f"v{version}")])
+        return columns
+
+@pytest.mark.anyio
+async def test_reset_during_load_discards_the_stale_result():
+    engine = _SlowEngine()
+    loading = asyncio.ensure_future(engine.get(None))
+    await engine.started.wait()
+    # 載入進行中資料被整批重設（例如批量匯入）
+    engine.version = 2
+    engine.on_product_event("reset", None, None)
+    engine.release.set()
+    columns = await loading
+    assert engine.loads == [1, 2]
+    assert columns.ids == ["v2"]
+    assert await engine.get(None) is columns
+
+@pytest.mark.anyio
+async def test_events_during_load_are_applied_after_it():
+    engine = _SlowEngine()
+    loading = asyncio.ensure_future(engine.get(None))
+    await engine.started.wait()
+    engine.on_product_event("insert", None, _product("new"))
+    engine.release.set()
+    columns = await loading
+    assert engine.loads == [1]
+    assert columns.ids == ["v1", "new"]
@@ -0,0 +1,107 @@
+import asyncio
+import time
+import httpx
+import pytest
+from app_factory import create_app
+from settings import Settings
+
+@pytest.mark.anyio
+async def test_second_process_cannot_open_the_memory_data_dir(tmp_path):
+    # uvicorn --workers 啟動的每個行程都會執行 lifespan：資料目錄已被鎖定時啟動失敗
+    first = create_app(Settings.from_env(storage_backend="memory", memory_data_dir=str(tmp_path), metrics_enabled=False))
+    second = create_app(Settings.from_env(storage_backend="memory", memory_data_dir=str(tmp_path), metrics_enabled=False))
+    async with first.router.lifespan_context(first):
+        with pytest.raises(RuntimeError, match="單一 worker"):
+            async with second.router.lifespan_context(second):
+                pass
+    # 第一個行程關閉後即可重新開啟
+    async with second.router.lifespan_context(second):
+        assert second.state.readiness.ready
+
+# ---- /livez 與 /readyz ----
+
+def _memory_app():
+    return create_app(Settings.from_env(storage_backend="memory", memory_data_dir=None, metrics_enabled=False))
+
+async def _probe(client):
+    livez = await client.get("/livez")
+    readyz = await client.get("/readyz")
+    return livez.status_code, readyz.status_code, readyz.json()
+
+@pytest.mark.anyio
+async def test_probes_while_a_required_step_is_pending():
+    app = _memory_app()
+    async with app.router.lifespan_context(app):
+        release = asyncio.Event()
+        step = app.state.readiness.track("warmup", release.wait())
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            livez, readyz, body = await _probe(client)
+            assert (livez, readyz) == (200, 503)
+            assert body["status"] == "starting"
+            assert body["steps"]["warmup"]["status"] == "pending"
+            assert body["steps"]["restore"]["status"] == "done"
+            assert (await client.get("/health")).status_code == 503
+
+            release.set()
+            await step
+            livez, readyz, body = await _probe(client)
+            assert (livez, readyz) == (200, 200)
+            assert body["status"] == "ready"
+            assert body["products"] == 0
+
+@pytest.mark.anyio
+async def test_probes_after_a_required_step_failed():
+    app = _memory_app()
+
+    async def broken():
+        raise RuntimeError("連線失敗")
+
+    async with app.router.lifespan_context(app):
+        await app.state.readiness.track("warmup", broken())
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            livez, readyz, body = await _probe(client)
+    assert (livez, readyz) == (200, 503)
+    assert body["status"] == "failed"
+    assert body["steps"]["warmup"] == {"status": "failed", "required": True, "seconds": body["steps"]["warmup"]["seconds"], "error": "連線失敗"}
+
+@pytest.mark.anyio
+async def test_optional_step_failure_does_not_block_readiness():
+    app = _memory_app()
+
+    async def broken():
+        raise RuntimeError("索引建立失敗")
+
+    async with app.router.lifespan_context(app):
+        await app.state.readiness.track("indexes", broken(), required=False)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            livez, readyz, body = await _probe(client)
+    assert (livez, readyz) == (200, 200)
+    assert body["steps"]["indexes"]["status"] == "failed"
+
+@pytest.mark.anyio
+async def test_probes_before_startup_and_while_draining():
+    app = _memory_app()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        # lifespan 尚未執行：沒有任何步驟，不可接收流量
+        livez, readyz, body = await _probe(client)
+        assert (livez, readyz) == (200, 503)
+        assert body["steps"] == {}
+
+        async with app.router.lifespan_context(app):
+            assert (await client.get("/readyz")).status_code == 200
+        livez, readyz, body = await _probe(client)
+        assert (livez, readyz) == (200, 503)
+        assert body["status"] == "draining"
+
+@pytest.mark.anyio
+async def test_memory_backend_starts_quickly():
+    app = _memory_app()
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        serving = time.perf_counter() - start
+        readiness = app.state.readiness
+        assert readiness.ready
+        startup_seconds = readiness.to_dict()["startupSeconds"]
+    # 記憶體後端沒有背景暖機步驟：開始服務時即已就緒
+    assert startup_seconds is not None and startup_seconds <= serving
+    assert serving < 1.0
@@ -0,0 +1,58 @@
+import pytest
+from bson import Timestamp
+from services.change_feed import STREAM_EPOCH, ChangeFeed, _position
+
+pytestmark = pytest.mark.anyio
+
+START = Timestamp(1_700_000_000, 1)
+
+def _streaming(capacity=100):
+    """模擬從 START 開始訂閱 change stream 的 worker"""
+    feed = ChangeFeed(capacity=capacity)
+    feed._restart(STREAM_EPOCH, _position(START) - 1)
+    return feed
+
+async def _replay(feeds, changes):
+    # 每個 worker 從 change stream 收到相同的變更
+    for feed in feeds:
+        for product_id, time, index in changes:
+            await feed._apply("update", product_id, None, {"_id": product_id, "stock": time}, _position(Timestamp(time, 1), index))
+
+async def test_stream_cursors_are_shared_between_workers():
+    first, second = _streaming(), _streaming()
+    await _replay([first, second], [("a", 1_700_000_001, 0), ("b", 1_700_000_002, 0), ("c", 1_700_000_002, 1)])
+
+    changes, cursor, reset = first.since(first.cursor(_position(START) - 1), limit=2)
+    assert ([change["_id"] for change in changes], reset) == (["a", "b"], False)
+
+    # 用戶端重連到另一個 worker 時從同一個游標繼續
+    changes, cursor, reset = second.since(cursor, limit=10)
+    assert ([change["_id"] for change in changes], reset) == (["c"], False)
+    assert cursor == second.cursor() == first.cursor()
+
+async def test_cursor_from_a_worker_ahead_does_not_reset():
+    ahead, behind = _streaming(), _streaming()
+    await _replay([ahead], [("a", 1_700_000_001, 0)])
+    changes, cursor, reset = behind.since(ahead.cursor(), limit=10)
+    assert (changes, cursor, reset) == ([], behind.cursor(), False)
+
+async def test_cursor_older_than_the_buffer_resets():
+    feed = _streaming(capacity=2)
+    await _replay([feed], [("a", 1_700_000_001, 0), ("b", 1_700_000_002, 0), ("c", 1_700_000_003, 0)])
+    oldest = feed.cursor(_position(Timestamp(1_700_000_001, 1)))
+    assert feed.since(oldest, limit=10)[2] is False
+    assert feed.since(feed.cursor(_position(START) - 1), limit=10)[2] is True
+    # 本行程事件的 epoch 不同，切換來源後舊游標需要重新載入
+    assert feed.since("abcd1234-1", limit=10)[2] is True
+
+async def test_listeners_receive_stream_changes_with_the_deleted_id():
+    feed = _streaming()
+    received = []
+    feed.subscribe(lambda op, before, after: received.append((op, before, after)))
+    await feed._apply("delete", "a", {"_id": "a"}, None, _position(Timestamp(1_700_000_001, 1)))
+    await feed.on_foreign_writes()
+    assert received == [("delete", {"_id": "a"}, None), ("reset", None, None)]
+    # change stream 運作中時其他行程的寫入已逐筆收到，不再整批重設
+    feed.streaming = True
+    await feed.on_foreign_writes()
+    assert len(received) == 2
@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from services.http_cache import (
+    VERSIONS_COLLECTION, bump_version, cache_headers, collection_etag, etag_matches, not_modified, watch_foreign_writes
+)
+
+ETAG = '"products-abcd-3"'
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    ("*", True),
+    (ETAG, True),
+    (f"W/{ETAG}", True),
+    ('"products-abcd-3-gzip"', True),
+    ('"products-abcd-3-br"', True),
+    (f'"other", {ETAG}', True),
+    ('"products-abcd-2"', False),
+    ('"products-abcd-3-zstd"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, ETAG) is expected
+
+def test_not_modified_response():
+    response = not_modified(ETAG)
+    assert response.status_code == 304
+    assert response.headers["ETag"] == ETAG
+    assert cache_headers(ETAG) == {"ETag": ETAG, "Cache-Control": "no-cache"}
+
+@pytest.mark.anyio
+async def test_collection_etag_changes_after_bump():
+    products = AsyncMongoMockClient()["inventory_test"]["products"]
+    first = await collection_etag(products)
+    assert first.startswith('"products-') and first.endswith('-0"')
+    assert await collection_etag(products) == first
+
+    await bump_version(products)
+    second = await collection_etag(products)
+    assert second != first and second.endswith('-1"')
+
+    # 版本文件被刪除重建後 epoch 不同，不會與舊 ETag 相同
+    await products.database[VERSIONS_COLLECTION].delete_many({})
+    assert await collection_etag(products) not in (first, second)
+
+@pytest.mark.anyio
+async def test_bump_version_creates_missing_document():
+    products = AsyncMongoMockClient()["inventory_test"]["products"]
+    await bump_version(products)
+    assert (await collection_etag(products)).endswith('-1"')
+
+@pytest.mark.anyio
+async def test_only_writes_from_other_processes_are_reported():
+    products = AsyncMongoMockClient()["inventory_test"]["products"]
+    versions = products.database[VERSIONS_COLLECTION]
+    await collection_etag(products)
+    reported = []
+
+    async def on_foreign():
+        reported.append(True)
+
+    watcher = asyncio.create_task(watch_foreign_writes(products, on_foreign, interval=0.01))
+    try:
+        await asyncio.sleep(0.05)
+        # 本行程的寫入已由寫入端處理，不需要通知
+        await bump_version(products)
+        await asyncio.sleep(0.05)
+        assert reported == []
+
+        # 其他 worker 直接遞增同一份版本文件
+        await versions.update_one({"_id": "products"}, {"$inc": {"version": 1}})
+        await asyncio.sleep(0.05)
+        assert reported == [True]
+    finally:
+        watcher.cancel()
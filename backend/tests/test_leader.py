@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from services.leader import LEASE_COLLECTION, LEASE_ID, LeaderLease
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def state():
+    return AsyncMongoMockClient()["inventory_test"][LEASE_COLLECTION]
+
+def _lease(state, ttl=15):
+    lease = LeaderLease(ttl=ttl)
+    lease.state = state
+    return lease
+
+async def test_only_one_worker_holds_the_lease(state):
+    first, second = _lease(state), _lease(state)
+    assert await first.try_acquire()
+    assert not await second.try_acquire()
+    # 續約仍屬於原本的 leader
+    assert await first.try_acquire()
+    assert (first.is_leader, second.is_leader) == (True, False)
+    assert (await state.find_one({"_id": LEASE_ID}))["owner"] == first.owner
+
+async def test_expired_lease_is_taken_over(state):
+    first, second = _lease(state), _lease(state)
+    await first.try_acquire()
+    # 模擬 leader 停止續約超過 TTL
+    await state.update_one({"_id": LEASE_ID}, {"$set": {"expiresAt": datetime.now(timezone.utc) - timedelta(seconds=1)}})
+    assert await second.try_acquire()
+    assert not await first.try_acquire()
+
+async def test_release_lets_another_worker_take_over_immediately(state):
+    first, second = _lease(state), _lease(state)
+    await first.try_acquire()
+    await first.release()
+    assert not first.is_leader
+    assert await second.try_acquire()
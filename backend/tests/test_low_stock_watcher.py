@@ -0,0 +1,97 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from services.leader import LeaderLease
+from services.low_stock_watcher import LowStockWatcher, STATE_COLLECTION, STATE_ID
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def watcher():
+    database = AsyncMongoMockClient()["inventory_test"]
+    watcher = _attach(LowStockWatcher(checkpoint_interval=0), database["products"])
+    await watcher.products.insert_many([
+        {"_id": "low", "stock": 1, "min_stock": 5},
+        {"_id": "ok", "stock": 10, "min_stock": 5},
+    ])
+    return watcher
+
+def _attach(watcher, products):
+    watcher.products = products
+    watcher.state = products.database[STATE_COLLECTION]
+    return watcher
+
+def _change(product_id, stock, min_stock=5, operation="update"):
+    return {"operationType": operation, "documentKey": {"_id": product_id}, "fullDocument": {"_id": product_id, "stock": stock, "min_stock": min_stock}}
+
+def _record(watcher):
+    events = []
+    watcher._publish = lambda event, data: events.append((event, data["_id"]))
+    return events
+
+async def _state(watcher):
+    return await watcher.state.find_one({"_id": STATE_ID})
+
+async def test_checkpoint_writes_full_set_after_rebuild_then_only_changes(watcher):
+    await watcher._rebuild()
+    watcher._resume_token = {"_data": "token-1"}
+    await watcher._checkpoint()
+    state = await _state(watcher)
+    assert (state["resumeToken"], state["lowIds"]) == ({"_data": "token-1"}, ["low"])
+
+    _record(watcher)
+    watcher._handle(_change("ok", 2))
+    watcher._handle(_change("low", 9))
+    assert (watcher._added, watcher._removed) == ({"ok"}, {"low"})
+    watcher._resume_token = {"_data": "token-2"}
+    await watcher._checkpoint()
+    state = await _state(watcher)
+    assert (state["resumeToken"], state["lowIds"]) == ({"_data": "token-2"}, ["ok"])
+    assert (watcher._added, watcher._removed, watcher._dirty) == (set(), set(), False)
+
+async def test_restart_replays_transitions_missed_while_down(watcher):
+    await watcher.state.insert_one({"_id": STATE_ID, "resumeToken": {"_data": "token-1"}, "lowIds": ["low"]})
+    restarted = _attach(LowStockWatcher(), watcher.products)
+    assert await restarted._load_state()
+    assert restarted._synced and restarted.low_ids == {"low"}
+
+    # 停機期間：low 已補貨、ok 跌破安全庫存；從續傳點重播時以存檔的集合比較
+    events = _record(restarted)
+    restarted._handle(_change("low", 9))
+    restarted._handle(_change("ok", 2))
+    assert events == [("recovered", "low"), ("low", "ok")]
+
+async def test_legacy_state_without_low_ids_needs_rebuild(watcher):
+    await watcher.state.insert_one({"_id": STATE_ID, "resumeToken": {"_data": "token-1"}})
+    restarted = _attach(LowStockWatcher(), watcher.products)
+    assert await restarted._load_state()
+    assert not restarted._synced
+    await restarted._rebuild()
+    assert restarted.low_ids == {"low"} and restarted._replace_all
+
+async def test_handle_publishes_only_transitions(watcher):
+    await watcher._rebuild()
+    events = _record(watcher)
+    watcher._handle(_change("low", 1))
+    watcher._handle(_change("ok", 10))
+    assert events == []
+
+    watcher._handle(_change("ok", 2))
+    watcher._handle({"operationType": "delete", "documentKey": {"_id": "ok"}})
+    assert events == [("low", "ok"), ("removed", "ok")]
+    assert watcher.low_ids == {"low"}
+
+async def test_only_the_lease_holder_writes_the_checkpoint(watcher):
+    watcher.lease = LeaderLease()
+    await watcher._rebuild()
+    watcher._resume_token = {"_data": "token-1"}
+    _record(watcher)
+    watcher._handle(_change("ok", 2))
+    await watcher._checkpoint()
+    assert await _state(watcher) is None
+    # 非 leader 期間不累積增減；取得租約後整份寫入目前的集合
+    assert (watcher._added, watcher._removed, watcher._replace_all) == (set(), set(), True)
+
+    watcher.lease.is_leader = True
+    await watcher._checkpoint()
+    state = await _state(watcher)
+    assert (state["resumeToken"], sorted(state["lowIds"])) == ({"_data": "token-1"}, ["low", "ok"])
@@ -0,0 +1,99 @@
+import os
+import pickle
+import pytest
+from services.memory_persistence import (
+    SNAPSHOT_FILE, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, StorePersistence, _encode, _log_name, read_log, read_snapshot
+)
+from services.memory_store import ProductStore
+
+def _write_log(path, entries, tail=b""):
+    with open(path, "wb") as f:
+        for entry in entries:
+            f.write(_encode(entry))
+        f.write(tail)
+
+def test_read_log_stops_at_truncated_tail(tmp_path):
+    path = tmp_path / "log"
+    entries = [{"op": "put", "product": {"id": "1", "name": "甲"}}, {"op": "del", "id": "1"}]
+    _write_log(path, entries, tail=_encode({"op": "clear"})[:-3])
+    assert read_log(str(path)) == (entries, len(_encode(entries[0])) + len(_encode(entries[1])))
+
+def test_read_log_stops_at_checksum_mismatch(tmp_path):
+    path = tmp_path / "log"
+    first = {"op": "put", "product": {"id": "1"}}
+    corrupted = bytearray(_encode({"op": "put", "product": {"id": "2"}}))
+    corrupted[-2] ^= 0xFF
+    _write_log(path, [first], tail=bytes(corrupted) + _encode({"op": "clear"}))
+    assert read_log(str(path)) == ([first], len(_encode(first)))
+
+def test_read_log_of_empty_or_header_only_file(tmp_path):
+    path = tmp_path / "log"
+    _write_log(path, [], tail=b"\x01\x00")
+    assert read_log(str(path)) == ([], 0)
+
+def test_load_replays_log_and_truncates_corrupted_tail(tmp_path):
+    store = ProductStore()
+    persistence = StorePersistence(store, str(tmp_path), fsync_interval=0)
+    persistence.load()
+    persistence.start()
+    first = store.create({"name": "甲", "stock": 1, "min_stock": 2})
+    second = store.create({"name": "乙", "stock": 5})
+    store.update(first["id"], {"stock": 9})
+    store.delete(second["id"])
+    persistence.close()
+
+    path = os.path.join(str(tmp_path), _log_name(0))
+    valid_size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b"\x10\x00\x00\x00garbage")
+
+    restored = ProductStore()
+    result = StorePersistence(restored, str(tmp_path)).load()
+    assert result == {"snapshotRecords": 0, "replayedEntries": 4}
+    assert os.path.getsize(path) == valid_size
+    assert len(restored) == 1
+    product = restored.get(first["id"])
+    assert (product["name"], product["stock"], product["minStock"]) == ("甲", 9, 2)
+    # 已分配過的 ID 不會重複使用
+    assert restored.next_id > int(second["id"])
+
+def _compacted_store(data_dir):
+    """寫入幾筆產品後切換日誌段並寫出快照"""
+    store = ProductStore()
+    persistence = StorePersistence(store, data_dir, fsync_interval=0)
+    persistence.load()
+    persistence.start()
+    store.create({"name": "甲", "stock": 1, "min_stock": 2, "sku": "A-1"})
+    store.create({"name": "乙", "stock": 5})
+    persistence._start_compaction()
+    store.update("1", {"stock": 7})
+    persistence.close()
+    return store
+
+def test_snapshot_round_trip(tmp_path):
+    _compacted_store(str(tmp_path))
+    with open(tmp_path / SNAPSHOT_FILE, "rb") as f:
+        assert f.read(len(SNAPSHOT_MAGIC) + 1) == SNAPSHOT_MAGIC + SNAPSHOT_VERSION
+    snapshot = read_snapshot(str(tmp_path / SNAPSHOT_FILE))
+    assert (snapshot["log_sequence"], snapshot["count"], len(snapshot["records"])) == (1, 2, 2)
+
+    restored = ProductStore()
+    result = StorePersistence(restored, str(tmp_path)).load()
+    assert result == {"snapshotRecords": 2, "replayedEntries": 1}
+    product = restored.get("1")
+    assert (product["stock"], product["minStock"], product["sku"]) == (7, 2, "A-1")
+    assert restored.get("2")["name"] == "乙"
+
+def test_snapshot_with_bad_record_is_rejected(tmp_path):
+    _compacted_store(str(tmp_path))
+    path = tmp_path / SNAPSHOT_FILE
+    data = bytearray(path.read_bytes())
+    data[-2] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="快照內容損毀"):
+        StorePersistence(ProductStore(), str(tmp_path)).load()
+
+def test_legacy_pickle_snapshot_is_not_loaded(tmp_path):
+    (tmp_path / SNAPSHOT_FILE).write_bytes(b"PSNAP1" + pickle.dumps({"records": []}))
+    with pytest.raises(ValueError, match="不支援的快照版本: 1"):
+        StorePersistence(ProductStore(), str(tmp_path)).load()
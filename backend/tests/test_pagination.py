@@ -0,0 +1,57 @@
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from services.pagination import (
+    combine_filters, decode_cursor, encode_cursor, keyset_filter, parse_fields, parse_sort, sort_spec
+)
+
+OID = ObjectId("65a000000000000000000001")
+
+def test_parse_sort():
+    assert parse_sort("price", ["price"]) == ("price", ASCENDING)
+    assert parse_sort("-updated_at", ["updated_at"]) == ("updated_at", DESCENDING)
+    with pytest.raises(ValueError, match="不支援的排序欄位"):
+        parse_sort("secret", ["price"])
+
+@pytest.mark.parametrize("value", [datetime(2024, 1, 2, 3, 4, 5), ObjectId("65a0000000000000000000ff"), 12.5, "手機", None])
+def test_cursor_round_trip(value):
+    cursor = encode_cursor({"_id": OID, "field": value}, "field")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == {"_id": OID, "value": value}
+
+def test_cursor_on_id_has_no_sort_value():
+    assert decode_cursor(encode_cursor({"_id": OID}, "_id")) == {"_id": OID}
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "e30", encode_cursor({"_id": "bad"}, "_id")])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError, match="無效的分頁游標"):
+        decode_cursor(cursor)
+
+def test_keyset_filter():
+    assert keyset_filter(None, "price", ASCENDING) == {}
+    assert keyset_filter(encode_cursor({"_id": OID}, "_id"), "_id", DESCENDING) == {"_id": {"$lt": OID}}
+    cursor = encode_cursor({"_id": OID, "price": 10}, "price")
+    assert keyset_filter(cursor, "price", ASCENDING) == {
+        "$or": [{"price": {"$gt": 10}}, {"price": 10, "_id": {"$gt": OID}}]
+    }
+
+def test_keyset_filter_rejects_cursor_from_another_sort():
+    with pytest.raises(ValueError, match="分頁游標與排序欄位不符"):
+        keyset_filter(encode_cursor({"_id": OID}, "_id"), "price", ASCENDING)
+
+def test_sort_spec_breaks_ties_by_id():
+    assert sort_spec("_id", ASCENDING) == [("_id", ASCENDING)]
+    assert sort_spec("price", DESCENDING) == [("price", DESCENDING), ("_id", DESCENDING)]
+
+def test_parse_fields():
+    assert parse_fields(None, ["name"]) is None
+    assert parse_fields(" name, ,price ", ["name", "price"]) == {"name": 1, "price": 1}
+    assert parse_fields(",", ["name"]) is None
+    with pytest.raises(ValueError, match="不支援的欄位"):
+        parse_fields("name,secret", ["name"])
+
+def test_combine_filters():
+    assert combine_filters({}, None) == {}
+    assert combine_filters({"a": 1}, {}) == {"a": 1}
+    assert combine_filters({"a": 1}, {"b": 2}) == {"$and": [{"a": 1}, {"b": 2}]}
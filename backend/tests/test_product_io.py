@@ -0,0 +1,89 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import BulkWriteError
+from services.product_io import (
+    DUPLICATE_KEY_ERROR, bulk_upsert_products, iter_csv_rows, iter_ndjson_rows, validate_rows
+)
+
+pytestmark = pytest.mark.anyio
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+async def _collect(rows):
+    return [row async for row in rows]
+
+def _row(name, supplier="甲", stock=5):
+    return {"name": name, "category": "手機", "price": 100, "stock": stock, "min_stock": 3, "supplier": supplier}
+
+async def test_ndjson_rows_split_across_chunks():
+    rows = await _collect(iter_ndjson_rows(_chunks(b'\xef\xbb\xbf{"name": "A"}\r\n{"na', b'me": "B"}\n\n[1]\n{bad\n', b'{"name": "C"}')))
+    assert rows[:2] == [(1, {"name": "A"}), (2, {"name": "B"})]
+    assert rows[2][0] == 4 and "每行必須是 JSON 物件" in rows[2][1]
+    assert rows[3][0] == 5 and rows[3][1].startswith("JSON 格式錯誤")
+    assert rows[4] == (6, {"name": "C"})
+
+async def test_csv_rows_with_quoted_newlines_and_empty_values():
+    data = '﻿name,description,_id,stock\r\n"A","第一行\n第二行",x,5\nB,,y,\n"C,逗號","含""引號""",z,1\n'.encode("utf-8")
+    rows = await _collect(iter_csv_rows(_chunks(data[:20], data[20:])))
+    assert rows == [
+        (1, {"name": "A", "description": "第一行\n第二行", "stock": "5"}),
+        (2, {"name": "B"}),
+        (3, {"name": "C,逗號", "description": '含"引號"', "stock": "1"}),
+    ]
+
+async def test_csv_rows_report_column_mismatch_and_unclosed_quote():
+    rows = await _collect(iter_csv_rows(_chunks(b'name,stock\nA\nB,1\n"C,2\n')))
+    assert rows[0] == (1, "欄位數量不符：預期 2 個，實際 1 個")
+    assert rows[1] == (2, {"name": "B", "stock": "1"})
+    assert rows[2] == (3, "CSV 引號未閉合")
+
+def test_validate_rows():
+    valid, errors = validate_rows([(1, _row("A", stock=1)), (2, {**_row("B"), "price": 0}), (3, {**_row("C"), "_id": "x"})])
+    assert [number for number, _ in valid] == [1, 3]
+    assert valid[0][1]["reorder_gap"] == 2
+    assert errors[0][0] == 2 and errors[0][1].startswith("price:")
+
+async def test_bulk_upsert_inserts_updates_and_reports_errors():
+    products = AsyncMongoMockClient()["inventory_test"]["products"]
+    await products.insert_one({**_row("既有"), "stock": 0})
+
+    async def rows():
+        yield 1, _row("既有", stock=9)
+        yield 2, "JSON 格式錯誤"
+        yield 3, _row("新品")
+        yield 4, {**_row("無效"), "stock": -1}
+        yield 5, _row("新品", stock=7)
+
+    result = (await bulk_upsert_products(products, rows(), chunk_size=2)).to_dict()
+    assert result["received"] == 5
+    assert (result["inserted"], result["updated"], result["failed"]) == (1, 2, 2)
+    assert [error["row"] for error in result["errors"]] == [2, 4]
+    stocks = {document["name"]: document["stock"] async for document in products.find({})}
+    assert stocks == {"既有": 9, "新品": 7}
+
+class _RacingCollection:
+    """bulk_write 時另一個匯入剛插入相同自然鍵（第二筆 upsert 回報 E11000）"""
+
+    async def bulk_write(self, operations, ordered):
+        raise BulkWriteError({
+            "writeErrors": [
+                {"index": 1, "code": DUPLICATE_KEY_ERROR, "errmsg": "E11000 duplicate key error"},
+                {"index": 2, "code": 121, "errmsg": "Document failed validation"},
+            ],
+            "nUpserted": 1,
+            "nMatched": 0,
+        })
+
+async def test_bulk_upsert_reports_duplicate_key_per_row():
+    async def rows():
+        for number, name in enumerate(["A", "B", "C"], start=1):
+            yield number, _row(name)
+
+    result = (await bulk_upsert_products(_RacingCollection(), rows())).to_dict()
+    assert (result["inserted"], result["failed"]) == (1, 2)
+    assert result["errors"] == [
+        {"row": 2, "error": "相同 name + supplier 的產品正被同時寫入，請重新匯入此列"},
+        {"row": 3, "error": "Document failed validation"},
+    ]
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import tempfile
+import httpx
+import pytest
+from fastapi import HTTPException
+from starlette.requests import ClientDisconnect
+from app_factory import create_app
+from routes import jobs as jobs_routes
+from routes.memory_products import store
+from services.jobs import JobRunner
+from services.seed_data import MAX_SYNC_SEED_COUNT
+from settings import Settings
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def client():
+    app = create_app(Settings.from_env(storage_backend="memory", memory_data_dir=None, metrics_enabled=False))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    store.clear()
+
+async def test_sync_seed_is_capped(client):
+    response = await client.post("/api/products/seed", params={"count": MAX_SYNC_SEED_COUNT + 1})
+    assert response.status_code == 422
+    response = await client.post("/api/products/seed", params={"count": 20, "seed": 1})
+    assert response.status_code == 200
+    assert response.json()["count"] == 20
+
+class _UploadRequest:
+    """模擬上傳中途斷線的請求"""
+    headers = {"content-type": "application/x-ndjson"}
+
+    def __init__(self, fail: bool):
+        self.fail = fail
+
+    async def stream(self):
+        yield b'{"name": "A"}\n'
+        if self.fail:
+            raise ClientDisconnect()
+        yield b'{"name": "B"}\n'
+
+@pytest.fixture
+def spool_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.setattr(jobs_routes.job_runner, "check_capacity", lambda kind: None)
+    return tmp_path
+
+async def test_import_spool_removed_when_client_disconnects(spool_dir, monkeypatch):
+    monkeypatch.setattr(jobs_routes, "_submit", lambda *args: pytest.fail("不應送出工作"))
+    with pytest.raises(ClientDisconnect):
+        await jobs_routes.submit_import_products(_UploadRequest(fail=True), format=None, chunk_size=1000)
+    assert os.listdir(spool_dir) == []
+
+async def test_import_spool_removed_when_queue_is_full(spool_dir, monkeypatch):
+    def queue_full(*args, **kwargs):
+        raise HTTPException(status_code=429, detail="工作排隊已滿")
+
+    monkeypatch.setattr(jobs_routes, "_submit", queue_full)
+    with pytest.raises(HTTPException):
+        await jobs_routes.submit_import_products(_UploadRequest(fail=False), format="ndjson", chunk_size=1000)
+    assert os.listdir(spool_dir) == []
+
+async def test_import_spool_kept_for_submitted_job(spool_dir, monkeypatch):
+    submitted = {}
+    monkeypatch.setattr(jobs_routes, "_submit", lambda kind, body, params, cleanup: submitted.update(params) or params)
+    await jobs_routes.submit_import_products(_UploadRequest(fail=False), format=None, chunk_size=1000)
+    [name] = os.listdir(spool_dir)
+    assert name.endswith(".ndjson")
+    assert submitted["bytes"] == os.path.getsize(spool_dir / name) == 28
+
+async def test_import_spool_removed_when_queued_job_is_cancelled(spool_dir, monkeypatch):
+    runner = JobRunner(limits={"import": (1, 8)}, workers=0)
+    monkeypatch.setattr(jobs_routes, "job_runner", runner)
+    release = asyncio.Event()
+
+    async def blocking(job):
+        await release.wait()
+
+    # 佔住唯一的執行名額，讓匯入工作停在排隊中
+    runner.submit("import", blocking)
+    queued = await jobs_routes.submit_import_products(_UploadRequest(fail=False), format="ndjson", chunk_size=1000)
+    assert queued["status"] == "queued"
+    assert len(os.listdir(spool_dir)) == 1
+
+    runner.cancel(queued["id"])
+    assert runner.get(queued["id"]).status == "cancelled"
+    assert os.listdir(spool_dir) == []
+    release.set()
+    await runner.shutdown()
+
+async def test_import_spool_removed_on_shutdown_before_job_starts(spool_dir, monkeypatch):
+    runner = JobRunner(limits={"import": (1, 8)}, workers=0)
+    monkeypatch.setattr(jobs_routes, "job_runner", runner)
+    await jobs_routes.submit_import_products(_UploadRequest(fail=False), format="ndjson", chunk_size=1000)
+    # 任務還沒開始執行就關閉
+    await runner.shutdown()
+    assert os.listdir(spool_dir) == []
@@ -0,0 +1,190 @@
+import asyncio
+from datetime import datetime
+import httpx
+import pytest
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import OperationFailure
+from app_factory import create_app
+from models.product import Product
+from routes.products import product_cache
+from services import stock
+from services.cache import _MISSING
+from services.http_cache import collection_etag
+from settings import Settings
+from services.stock import ILLEGAL_OPERATION, InsufficientStockError, reserve_batch, reserve_stock
+
+pytestmark = pytest.mark.anyio
+
+UPDATED_AT = datetime(2024, 1, 1)
+
+@pytest.fixture
+def products():
+    return AsyncMongoMockClient()["inventory_test"]["products"]
+
+@pytest.fixture
+def standalone(monkeypatch):
+    """模擬單機 MongoDB：開始交易時回傳錯誤碼 20，強制走補償式回滾"""
+    calls = []
+
+    async def no_transactions(collection, quantities):
+        calls.append(dict(quantities))
+        raise OperationFailure("Transaction numbers are only allowed on a replica set member or mongos", code=ILLEGAL_OPERATION)
+
+    monkeypatch.setattr(stock, "_transactions_supported", None)
+    monkeypatch.setattr(stock, "_reserve_in_transaction", no_transactions)
+    return calls
+
+async def _insert(products, stock_count, min_stock=5):
+    result = await products.insert_one({
+        "name": f"測試產品 {stock_count}-{await products.count_documents({})}",
+        "category": "手機",
+        "price": 100.0,
+        "supplier": "甲",
+        "stock": stock_count,
+        "min_stock": min_stock,
+        "reorder_gap": min_stock - stock_count,
+        "created_at": UPDATED_AT,
+        "updated_at": UPDATED_AT,
+    })
+    return str(result.inserted_id)
+
+async def _gather_results(calls):
+    return await asyncio.gather(*calls, return_exceptions=True)
+
+async def test_concurrent_reserves_never_oversell(products):
+    product_id = await _insert(products, 10)
+    results = await _gather_results([reserve_stock(products, product_id, 1) for _ in range(50)])
+
+    succeeded = [result for result in results if not isinstance(result, Exception)]
+    failed = [result for result in results if isinstance(result, Exception)]
+    assert len(succeeded) == 10
+    assert all(isinstance(error, InsufficientStockError) for error in failed)
+    assert all(after["stock"] >= 0 for _, after in succeeded)
+    assert sorted(after["stock"] for _, after in succeeded) == list(range(10))
+
+    document = await products.find_one({})
+    assert document["stock"] == 0
+    assert document["reorder_gap"] == document["min_stock"] - document["stock"]
+
+async def test_reserve_recomputes_reorder_gap_for_legacy_documents(products):
+    # 背景補齊 reorder_gap 之前的舊文件：欄位不存在時也要得到 min_stock - stock
+    result = await products.insert_one({"name": "舊產品", "stock": 10, "min_stock": 4})
+    before, after = await reserve_stock(products, str(result.inserted_id), 3)
+    assert (after["stock"], after["reorder_gap"]) == (7, -3)
+    assert (before["stock"], before["reorder_gap"]) == (10, -6)
+
+async def test_compensation_recomputes_reorder_gap(products, standalone):
+    legacy = (await products.insert_one({"name": "舊產品", "stock": 10, "min_stock": 4})).inserted_id
+    scarce = await _insert(products, 0)
+    with pytest.raises(InsufficientStockError):
+        await reserve_batch(products, [{"product_id": str(legacy), "quantity": 2}, {"product_id": scarce, "quantity": 1}])
+    document = await products.find_one({"_id": legacy})
+    assert (document["stock"], document["reorder_gap"]) == (10, -6)
+
+async def test_insufficient_stock_reports_available(products):
+    product_id = await _insert(products, 3)
+    with pytest.raises(InsufficientStockError) as excinfo:
+        await reserve_stock(products, product_id, 4)
+    assert (excinfo.value.requested, excinfo.value.available) == (4, 3)
+    assert (await products.find_one({}))["stock"] == 3
+
+async def test_unknown_product(products):
+    with pytest.raises(LookupError):
+        await reserve_stock(products, "000000000000000000000000", 1)
+    with pytest.raises(LookupError):
+        await reserve_stock(products, "not-an-id", 1)
+
+async def test_batch_without_transactions_compensates_earlier_items(products, standalone):
+    plenty = await _insert(products, 100)
+    scarce = await _insert(products, 1)
+    items = [{"product_id": plenty, "quantity": 3}, {"product_id": scarce, "quantity": 2}]
+    # 依 ID 排序後 plenty 先扣減，scarce 失敗時必須把 plenty 加回
+    assert plenty < scarce
+
+    compensated = []
+
+    async def on_compensated(changes):
+        compensated.extend(changes)
+
+    with pytest.raises(InsufficientStockError):
+        await reserve_batch(products, items, on_compensated=on_compensated)
+
+    assert standalone == [{plenty: 3, scarce: 2}]
+    # 加回的產品交給呼叫端同步快取與事件：(扣減前, 加回後)
+    [(before, after)] = compensated
+    assert str(after["_id"]) == plenty
+    assert (before["stock"], after["stock"]) == (100, 100)
+    assert after["updated_at"] >= before["updated_at"]
+    assert stock._transactions_supported is False
+    documents = {str(document["_id"]): document async for document in products.find({})}
+    assert documents[plenty]["stock"] == 100
+    assert documents[plenty]["reorder_gap"] == 5 - 100
+    assert documents[scarce]["stock"] == 1
+
+async def test_batch_without_transactions_skips_the_transaction_afterwards(products, standalone):
+    first = await _insert(products, 10)
+    second = await _insert(products, 10)
+    items = [{"product_id": first, "quantity": 2}, {"product_id": second, "quantity": 1}, {"product_id": first, "quantity": 1}]
+
+    changes = await reserve_batch(products, items)
+    await reserve_batch(products, items)
+
+    # 第一次偵測到錯誤碼 20 之後不再嘗試交易
+    assert len(standalone) == 1
+    assert [after["stock"] for _, after in changes] == [7, 9]
+    documents = {str(document["_id"]): document["stock"] async for document in products.find({})}
+    assert documents == {first: 4, second: 8}
+
+async def test_concurrent_batches_without_transactions(products, standalone):
+    plenty = await _insert(products, 100)
+    scarce = await _insert(products, 5)
+    items = [{"product_id": plenty, "quantity": 1}, {"product_id": scarce, "quantity": 1}]
+
+    results = await _gather_results([reserve_batch(products, items) for _ in range(20)])
+
+    succeeded = [result for result in results if not isinstance(result, Exception)]
+    assert len(succeeded) == 5
+    assert all(isinstance(result, InsufficientStockError) for result in results if isinstance(result, Exception))
+    documents = {str(document["_id"]): document["stock"] async for document in products.find({})}
+    # 失敗的批次已補償，plenty 只扣掉成功批次的數量
+    assert documents == {plenty: 95, scarce: 0}
+
+async def test_other_operation_failures_are_not_treated_as_standalone(products, monkeypatch):
+    async def write_conflict(collection, quantities):
+        raise OperationFailure("WriteConflict", code=112)
+
+    monkeypatch.setattr(stock, "_transactions_supported", None)
+    monkeypatch.setattr(stock, "_reserve_in_transaction", write_conflict)
+    product_id = await _insert(products, 10)
+
+    with pytest.raises(OperationFailure):
+        await reserve_batch(products, [{"product_id": product_id, "quantity": 1}])
+    assert stock._transactions_supported is None
+    assert (await products.find_one({}))["stock"] == 10
+
+async def test_compensated_batch_invalidates_cached_products(standalone):
+    await init_beanie(database=AsyncMongoMockClient()["inventory_test"], document_models=[Product])
+    products = Product.get_motor_collection()
+    plenty = await _insert(products, 100)
+    scarce = await _insert(products, 1)
+    app = create_app(Settings.from_env(metrics_enabled=False))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        cached = await client.get(f"/api/products/{plenty}")
+        assert cached.status_code == 200
+        etag = await collection_etag(products)
+
+        response = await client.post("/api/products/stock/reserve", json={"items": [
+            {"product_id": plenty, "quantity": 3},
+            {"product_id": scarce, "quantity": 2},
+        ]})
+        assert response.status_code == 409
+
+        # 補償改寫了文件：快取與集合 ETag 都要失效，單筆 ETag 也要跟著 updated_at 改變
+        assert await product_cache.backend.get(plenty) is _MISSING
+        reloaded = await client.get(f"/api/products/{plenty}")
+        assert reloaded.json()["stock"] == 100
+        assert reloaded.headers["ETag"] != cached.headers["ETag"]
+        assert await collection_etag(products) != etag
+    await product_cache.clear()
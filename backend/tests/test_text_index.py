@@ -0,0 +1,48 @@
+from services.text_index import InvertedIndex, tokenize
+
+def test_tokenize_words_and_cjk_bigrams():
+    assert tokenize("iPhone 15 Pro") == ["iphone", "15", "pro"]
+    assert tokenize("藍牙耳機") == ["藍牙", "牙耳", "耳機", "藍", "牙", "耳", "機"]
+    # 查詢只用二元組，單一字時用單字
+    assert tokenize("藍牙耳機", for_query=True) == ["藍牙", "牙耳", "耳機"]
+    assert tokenize("機", for_query=True) == ["機"]
+    assert tokenize("-- !!") == []
+
+def _index():
+    index = InvertedIndex()
+    index.add("1", ["藍牙耳機", "音響"])
+    index.add("2", ["無線藍牙喇叭 speaker"])
+    index.add("3", ["iPhone 手機殼", None])
+    return index
+
+def test_search_requires_every_token():
+    index = _index()
+    assert index.search("藍牙") == ["1", "2"]
+    assert index.search("藍牙 耳機") == ["1"]
+    assert index.search("耳機 speaker") == []
+
+def test_search_matches_prefix_of_last_token_only():
+    index = _index()
+    assert index.search("spe") == ["2"]
+    assert index.search("spe", prefix=False) == []
+    assert index.search("手機 iph") == ["3"]
+    assert index.search("iph 手機") == []
+
+def test_search_orders_shorter_documents_first_and_limits():
+    index = _index()
+    index.add("4", ["藍"])
+    assert index.search("藍") == ["4", "1", "2"]
+    assert index.search("藍", limit=1) == ["4"]
+
+def test_add_replaces_and_remove_cleans_vocabulary():
+    index = _index()
+    index.add("2", ["有線喇叭"])
+    assert index.search("speaker") == []
+    assert index.search("喇叭") == ["2"]
+    index.remove("2")
+    index.remove("不存在")
+    assert len(index) == 2
+    assert index.search("喇叭") == []
+    assert "喇叭" not in index._vocabulary
+    index.clear()
+    assert len(index) == 0 and index.search("藍牙") == []
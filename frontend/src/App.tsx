@@ -42,17 +42,46 @@ function App() {
     }
   }
 
+  // 套用單筆產品變更，不必重新載入整個列表
+  const applyProductChange = (id: string, product: Product | null) => {
+    setProducts(prev => {
+      const index = prev.findIndex(p => p.id === id)
+      if (product === null) {
+        return index === -1 ? prev : prev.filter(p => p.id !== id)
+      }
+      if (index === -1) {
+        return [...prev, product]
+      }
+      const next = [...prev]
+      next[index] = product
+      return next
+    })
+  }
+
   useEffect(() => {
-    loadProducts()
     loadStats()
+    // 完整列表只在首次連線或無法補送差異時載入，其後由變更串流更新
+    return productApi.subscribeChanges({
+      onChange: applyProductChange,
+      onReset: loadProducts,
+      onUnavailable: loadProducts
+    })
+  }, [])
+
+  // 低庫存數量由後端推播更新，不需要輪詢統計 API
+  useEffect(() => {
+    return productApi.subscribeLowStock((lowStockCount) => {
+      setStats(prev => ({ ...prev, lowStockCount }))
+    })
   }, [])
 
   // 創建產品
   const handleCreateProduct = async (productData: ProductFormData) => {
     try {
       setLoading(true)
-      await productApi.createProduct(productData)
-      await Promise.all([loadProducts(), loadStats()])
+      const product = await productApi.createProduct(productData)
+      applyProductChange(product.id, product)
+      await loadStats()
       setShowForm(false)
       alert('產品創建成功！')
     } catch (error) {
@@ -69,8 +98,9 @@ function App() {
     
     try {
       setLoading(true)
-      await productApi.updateProduct(editingProduct.id, productData)
-      await Promise.all([loadProducts(), loadStats()])
+      const product = await productApi.updateProduct(editingProduct.id, productData)
+      applyProductChange(product.id, product)
+      await loadStats()
       setEditingProduct(null)
       setShowForm(false)
       alert('產品更新成功！')
@@ -87,7 +117,8 @@ function App() {
     try {
       setLoading(true)
       await productApi.deleteProduct(id)
-      await Promise.all([loadProducts(), loadStats()])
+      applyProductChange(id, null)
+      await loadStats()
       alert('產品刪除成功！')
     } catch (error) {
       console.error('刪除產品失敗:', error)
@@ -1,6 +1,8 @@
 import { Product, ProductFormData, InventoryStats } from '../types/Product'
 
 const API_BASE_URL = 'http://localhost:8000/api'
+// 列表每頁筆數（後端上限 MAX_PAGE_SIZE = 1000）
+const PAGE_SIZE = 1000
 
 // 模擬數據 - 作為後端無法連接時的備用方案
 const generateMockData = (): Product[] => {
@@ -35,23 +37,44 @@ const generateMockData = (): Product[] => {
 
 let mockProducts = generateMockData();
 
+// 轉換 MongoDB 的 _id 和日期格式
+const toProduct = (product: any): Product => ({
+  ...product,
+  id: product._id || product.id,
+  createdAt: product.created_at ? new Date(product.created_at).toISOString().split('T')[0] : new Date().toISOString().split('T')[0],
+  updatedAt: product.updated_at ? new Date(product.updated_at).toISOString().split('T')[0] : new Date().toISOString().split('T')[0]
+})
+
+export interface ProductChangeHandlers {
+  // 單筆變更：product 為 null 代表已刪除
+  onChange: (id: string, product: Product | null) => void
+  // 無法補送差異（首次連線、落後太多或伺服器重啟），需重新載入完整列表
+  onReset: () => void
+  // 瀏覽器不支援或後端無法連線
+  onUnavailable: () => void
+}
+
 export const productApi = {
-  // 獲取所有產品
+  // 獲取所有產品（後端每頁最多 PAGE_SIZE 筆，依 X-Next-Cursor 逐頁讀完）
   getAllProducts: async (): Promise<Product[]> => {
     try {
-      const response = await fetch(`${API_BASE_URL}/products/`)
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`)
-      }
-      const data = await response.json()
-      
-      // 轉換 MongoDB 的 _id 和日期格式
-      return data.map((product: any) => ({
-        ...product,
-        id: product._id || product.id,
-        createdAt: product.created_at ? new Date(product.created_at).toISOString().split('T')[0] : new Date().toISOString().split('T')[0],
-        updatedAt: product.updated_at ? new Date(product.updated_at).toISOString().split('T')[0] : new Date().toISOString().split('T')[0]
-      }))
+      const products: Product[] = []
+      let cursor: string | null = null
+      do {
+        const params = new URLSearchParams({ limit: String(PAGE_SIZE) })
+        if (cursor) {
+          params.set('cursor', cursor)
+        }
+        const response = await fetch(`${API_BASE_URL}/products/?${params}`)
+        if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`)
+        }
+        const data = await response.json()
+        // 轉換 MongoDB 的 _id 和日期格式
+        products.push(...data.map(toProduct))
+        cursor = response.headers.get('X-Next-Cursor')
+      } while (cursor)
+      return products
     } catch (error) {
       console.error('無法連接到後端，使用模擬資料:', error)
       // 返回模擬數據作為備用方案
@@ -209,6 +232,56 @@ export const productApi = {
     }
   },
 
+  // 訂閱低庫存推播（SSE），回傳取消訂閱函式
+  subscribeLowStock: (onCount: (lowStockCount: number) => void): (() => void) => {
+    if (typeof EventSource === 'undefined') {
+      return () => {}
+    }
+    const source = new EventSource(`${API_BASE_URL}/products/alerts/low-stock/stream`)
+    const handle = (event: MessageEvent) => {
+      const data = JSON.parse(event.data)
+      if (typeof data.lowStockCount === 'number') {
+        onCount(data.lowStockCount)
+      }
+    }
+    // snapshot：連線時與推播落後被重新同步時送出目前的低庫存數
+    for (const name of ['snapshot', 'low', 'recovered', 'removed', 'resync']) {
+      source.addEventListener(name, handle as EventListener)
+    }
+    return () => source.close()
+  },
+
+  // 訂閱產品變更（SSE），只傳送有變動的產品；回傳取消訂閱函式
+  subscribeChanges: (handlers: ProductChangeHandlers): (() => void) => {
+    if (typeof EventSource === 'undefined') {
+      handlers.onUnavailable()
+      return () => {}
+    }
+    const source = new EventSource(`${API_BASE_URL}/products/changes/stream`)
+    let connected = false
+    source.addEventListener('reset', () => {
+      connected = true
+      handlers.onReset()
+    })
+    source.addEventListener('change', ((event: MessageEvent) => {
+      connected = true
+      const change = JSON.parse(event.data)
+      if (change.op === 'reset') {
+        handlers.onReset()
+      } else {
+        handlers.onChange(change._id, change.product ? toProduct(change.product) : null)
+      }
+    }) as EventListener)
+    source.onerror = () => {
+      // 從未連上時改用一般 API（含模擬資料）；連上後的斷線由 EventSource 自動重連
+      if (!connected) {
+        source.close()
+        handlers.onUnavailable()
+      }
+    }
+    return () => source.close()
+  },
+
   // 生成測試數據
   seedProducts: async (): Promise<string> => {
     try {